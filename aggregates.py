@@ -0,0 +1,168 @@
+"""
+Mergeable, removable shot summaries for ShotDB's aggregates table.
+
+Every summary covers one metric for one group of valid shots (not IsInvalid,
+not IsDeleted) at one of three grains:
+
+    club      all shots with a club_id                   bucket ""
+    week      one club in one week (Monday of the week)  bucket "2025-02-17"
+    session   one club in one session                    bucket "9149941"
+
+and holds count, mean and M2 (sum of squared deviations) plus a sparse
+histogram over a fixed grid of bins per metric. All of it merges exactly (Chan et al.'s
+parallel variance, bin-wise sums), so summaries can be combined (weeks into
+a club's season) and, since ingest replaces whole sessions, a session's old
+shots can be subtracted again before its new ones are added. Quantiles come
+from the histogram, accurate to one bin width.
+"""
+import math
+from array import array
+from datetime import datetime, timedelta
+
+# metric -> (lowest bin edge, highest bin edge, bin width); values outside
+# the range are counted in the first/last bin.
+METRICS = {
+    "carry_dist_yards":   (0.0, 400.0, 1.0),
+    "total_dist_yards":   (0.0, 450.0, 1.0),
+    "lateral_yards":      (-100.0, 100.0, 0.5),
+    "ball_speed_ms":      (0.0, 100.0, 0.25),
+    "club_head_speed_ms": (0.0, 70.0, 0.25),
+    "smash_factor":       (0.5, 1.8, 0.005),
+    "launch_angle_deg":   (-10.0, 60.0, 0.25),
+    "backspin_rpm":       (0.0, 12000.0, 25.0),
+}
+# Pseudo-metric counting every valid shot of a group, values or not.
+SHOTS = "shots"
+
+GRAINS = ("club", "week", "session")
+
+# Columns summarize() needs from each shot, in this order.
+COLUMNS = ("session_id", "session_date", "club_id", "is_invalid", "is_deleted", *METRICS)
+
+
+def week_of(date):
+    """Monday of the week of an ISO date(time) string, as YYYY-MM-DD ("" if unparsable)."""
+    try:
+        day = datetime.strptime(str(date)[:10], "%Y-%m-%d")
+    except ValueError:
+        return ""
+    return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+
+
+class Summary:
+    """Count / mean / M2 and a fixed-grid histogram ({bin: count}) of one metric."""
+    __slots__ = ("metric", "n", "mean", "m2", "hist")
+
+    def __init__(self, metric, n=0, mean=0.0, m2=0.0, hist=None):
+        self.metric = metric
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.hist = {} if hist is None else hist
+
+    @classmethod
+    def of(cls, metric, values):
+        """Summary of a list of numbers (two-pass, so the mean is exact)."""
+        s = cls(metric)
+        s.n = len(values)
+        if not values:
+            return s
+        s.mean = math.fsum(values) / s.n
+        s.m2 = math.fsum((x - s.mean) ** 2 for x in values)
+        if metric in METRICS:
+            lo, hi, width = METRICS[metric]
+            top = int(round((hi - lo) / width)) - 1
+            hist = s.hist
+            for x in values:
+                i = min(max(int((x - lo) // width), 0), top)
+                hist[i] = hist.get(i, 0) + 1
+        return s
+
+    @classmethod
+    def from_row(cls, metric, n, mean, m2, hist):
+        pairs = array("I")
+        pairs.frombytes(hist)
+        return cls(metric, n, mean, m2, dict(zip(pairs[::2], pairs[1::2])))
+
+    def hist_blob(self):
+        """The histogram as packed native uint32 (bin, count) pairs."""
+        pairs = array("I")
+        for i in sorted(self.hist):
+            pairs.append(i)
+            pairs.append(self.hist[i])
+        return pairs.tobytes()
+
+    def merge(self, other):
+        """Add the shots summarized by `other`."""
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        hist = self.hist
+        for i, c in other.hist.items():
+            hist[i] = hist.get(i, 0) + c
+        return self
+
+    def remove(self, other):
+        """Take out the shots summarized by `other` (which must be part of this summary)."""
+        n = self.n - other.n
+        if n <= 0:
+            self.n, self.mean, self.m2, self.hist = 0, 0.0, 0.0, {}
+            return self
+        mean = (self.n * self.mean - other.n * other.mean) / n
+        delta = other.mean - mean
+        self.m2 = max(0.0, self.m2 - other.m2 - delta * delta * n * other.n / self.n)
+        self.mean = mean
+        self.n = n
+        hist = self.hist
+        for i, c in other.hist.items():
+            left = hist.get(i, 0) - c
+            if left > 0:
+                hist[i] = left
+            else:
+                hist.pop(i, None)
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    def quantile(self, q):
+        """Approximate q-quantile (0..1) from the histogram, interpolated within its bin."""
+        total = sum(self.hist.values())
+        if not total:
+            return None
+        lo, _, width = METRICS[self.metric]
+        target = q * total
+        seen = 0
+        for i in sorted(self.hist):
+            c = self.hist[i]
+            if seen + c >= target:
+                return lo + (i + (target - seen) / c) * width
+            seen += c
+        return lo + (i + 1) * width
+
+
+def summarize(rows):
+    """
+    {(grain, bucket, club_id, metric): Summary} for `rows`, tuples of COLUMNS
+    values (typed as in ShotDB). Invalid and deleted shots are skipped.
+    """
+    values = {}
+    for row in rows:
+        session_id, date, club, invalid, deleted = row[:5]
+        if invalid or deleted or club is None:
+            continue
+        groups = (("club", ""), ("week", week_of(date)), ("session", str(session_id)))
+        for grain, bucket in groups:
+            values.setdefault((grain, bucket, club, SHOTS), []).append(0.0)
+        for metric, x in zip(METRICS, row[5:]):
+            if x is None:
+                continue
+            for grain, bucket in groups:
+                values.setdefault((grain, bucket, club, metric), []).append(x)
+    return {key: (Summary(SHOTS, n=len(xs)) if key[3] == SHOTS else Summary.of(key[3], xs))
+            for key, xs in values.items()}
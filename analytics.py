@@ -0,0 +1,350 @@
+"""
+Per-club and per-session shot analytics over the columnar store (columnar.py).
+
+The metric columns are loaded into NumPy arrays once; every aggregate is a
+grouped, vectorized reduction over all shots at the same time (bincount for
+counts/means/variances, one lexsort per metric for percentiles), so the cost
+does not depend on how many clubs, sessions or players there are.
+
+    shots = load()                                   # shots_columns/, valid shots only
+    by_club = Groups(shots, ["club_id"])
+    summary(by_club, shots)                          # count, mean, std, p10/p50/p90 per metric
+    dispersion(by_club, shots)                       # 95% lateral/carry ellipse per club
+    gapping(shots)                                   # clubs by median carry, gap to the next one
+
+Several stores (one per player) load as one table with a "store" key:
+    shots = load("alice/shots_columns", "bob/shots_columns")
+    Groups(shots, ["store", "club_id"])
+
+Usage:
+    python analytics.py clubs    [--dir shots_columns ...] [--metrics carry_dist_yards,...]
+    python analytics.py sessions [--dir ...]
+    python analytics.py dispersion [--dir ...] [--confidence 0.95]
+    python analytics.py gapping  [--dir ...]
+"""
+import os, sys, time, argparse
+
+import numpy as np
+
+import columnar
+
+METRICS = ("carry_dist_yards", "total_dist_yards", "lateral_yards", "height_yards",
+           "ball_speed_ms", "club_head_speed_ms", "smash_factor", "launch_angle_deg",
+           "launch_direction_deg", "backspin_rpm", "sidespin_rpm", "spin_axis_deg")
+KEYS = ("club_id", "session_id", "session_date")
+PERCENTILES = (10, 50, 90)
+_NUMERIC = {"f32", "f64", "i32", "i64"}
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+class Shots:
+    """Column arrays of the selected shots, plus the category labels of categorical keys."""
+
+    def __init__(self, columns, labels):
+        self.columns = columns
+        self.labels = labels        # column -> array of category strings (code -> label)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+def _load_store(path, names, include_invalid):
+    schema = columnar.load_schema(path)
+    present = [n for n in names if n in schema["columns"]]
+    cols = columnar.load_columns(path, present + [n for n in ("is_invalid", "is_deleted")
+                                                  if n in schema["columns"]])
+    keep = np.ones(schema["rows"], dtype=bool)
+    if not include_invalid:
+        for flag in ("is_invalid", "is_deleted"):
+            if flag in cols:
+                keep &= ~cols.pop(flag)
+    cols = {name: np.asarray(cols[name][keep]) for name in present}
+    labels = {name: np.array(schema["columns"][name]["categories"], dtype=str)
+              for name in present if schema["columns"][name]["type"] == "category"}
+    return cols, labels
+
+
+def load(*paths, metrics=METRICS, keys=KEYS, include_invalid=False):
+    """
+    Load `keys` and `metrics` of the shots in one or more column stores
+    (default shots_columns/). Invalid and deleted shots are dropped unless
+    `include_invalid`. With several stores their category codes are merged
+    and a "store" key column (labelled by directory) is added.
+    """
+    paths = paths or (columnar.COLUMNS_DIR,)
+    names = list(dict.fromkeys((*keys, *metrics)))
+    stores = [_load_store(path, names, include_invalid) for path in paths]
+    if len(stores) == 1:
+        return Shots(*stores[0])
+
+    columns, labels = {}, {}
+    for name in names:
+        parts = [cols[name] for cols, _ in stores if name in cols]
+        if len(parts) != len(stores):
+            continue
+        if name in stores[0][1]:
+            # Map every store's codes into one shared category list (-1 stays -1).
+            merged = np.unique(np.concatenate([lab[name] for _, lab in stores]))
+            parts = [np.append(np.searchsorted(merged, lab[name]), -1)[codes]
+                     for codes, (_, lab) in zip(parts, stores)]
+            labels[name] = merged
+        columns[name] = np.concatenate(parts)
+    columns["store"] = np.repeat(np.arange(len(stores)), [len(Shots(*s)) for s in stores])
+    labels["store"] = np.array([os.path.basename(os.path.dirname(os.path.abspath(p))) or p
+                                for p in paths], dtype=str)
+    return Shots(columns, labels)
+
+
+# ── Grouped reductions ────────────────────────────────────────────────────────
+
+class Groups:
+    """
+    Shots partitioned by the distinct values of one or more key columns.
+    `index` holds each shot's group number; reductions return one value per
+    group, in `keys` order (sorted by key). Missing metric values (NaN) are
+    ignored by every reduction.
+    """
+
+    def __init__(self, shots, by):
+        codes, uniques = [], []
+        for name in by:
+            values, inverse = np.unique(shots[name], return_inverse=True)
+            uniques.append(values)
+            codes.append(inverse.ravel())
+        combined = np.ravel_multi_index(codes, [len(u) for u in uniques]) if codes else \
+            np.zeros(len(shots), dtype=np.intp)
+        present, self.index = np.unique(combined, return_inverse=True)
+        self.index = self.index.ravel()
+        self.size = len(present)
+        parts = np.unravel_index(present, [len(u) for u in uniques]) if codes else ()
+        self.by = list(by)
+        self.keys = {name: u[p] for name, u, p in zip(by, uniques, parts)}
+        self.labels = {name: np.append(shots.labels[name], "")[self.keys[name]]
+                       for name in by if name in shots.labels}
+        self.shots = np.bincount(self.index, minlength=self.size)
+
+    def _valid(self, values):
+        ok = ~np.isnan(values)
+        return self.index[ok], values[ok].astype(np.float64)
+
+    def count(self, values):
+        g, _ = self._valid(values)
+        return np.bincount(g, minlength=self.size)
+
+    def mean(self, values):
+        g, v = self._valid(values)
+        n = np.bincount(g, minlength=self.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.bincount(g, weights=v, minlength=self.size) / n
+
+    def std(self, values):
+        """Sample standard deviation (two-pass, so large offsets don't cancel)."""
+        g, v = self._valid(values)
+        n = np.bincount(g, minlength=self.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(g, weights=v, minlength=self.size) / n
+            sq = np.bincount(g, weights=(v - mean[g]) ** 2, minlength=self.size)
+            return np.sqrt(sq / (n - 1))
+
+    def sorted_within(self, values):
+        """(values sorted by group, then value; shots per group), NaNs dropped."""
+        g, v = self._valid(values)
+        n = np.bincount(g, minlength=self.size)
+        if not len(v):
+            return v, n
+        # One float sort instead of a lexsort: offset every group into its own
+        # band (exact enough: the bands are far wider than float32 input precision).
+        low = v.min()
+        span = v.max() - low + 1.0
+        if span * self.size < 2 ** 32:
+            band = np.repeat(np.arange(self.size) * span, n)
+            return np.sort(g * span + (v - low)) - band + low, n
+        return v[np.lexsort((v, g))], n
+
+    def percentiles(self, values, qs=PERCENTILES):
+        """(groups x len(qs)) array of linearly interpolated percentiles."""
+        v, n = self.sorted_within(values)
+        start = np.cumsum(n) - n
+        pos = start[:, None] + (n[:, None] - 1) * (np.asarray(qs, dtype=np.float64) / 100)[None, :]
+        out = np.full(pos.shape, np.nan)
+        has = n > 0
+        if not has.any():
+            return out
+        pos = pos[has]
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, (start + n - 1)[has][:, None])
+        frac = pos - lo
+        out[has] = v[lo] * (1 - frac) + v[hi] * frac
+        return out
+
+    def covariance(self, x, y):
+        """Per group (n, mean x, mean y, var x, var y, cov xy) over shots where both are present."""
+        ok = ~(np.isnan(x) | np.isnan(y))
+        g, x, y = self.index[ok], x[ok].astype(np.float64), y[ok].astype(np.float64)
+        n = np.bincount(g, minlength=self.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mx = np.bincount(g, weights=x, minlength=self.size) / n
+            my = np.bincount(g, weights=y, minlength=self.size) / n
+            dx, dy = x - mx[g], y - my[g]
+            d = n - 1
+            return (n, mx, my, np.bincount(g, weights=dx * dx, minlength=self.size) / d,
+                    np.bincount(g, weights=dy * dy, minlength=self.size) / d,
+                    np.bincount(g, weights=dx * dy, minlength=self.size) / d)
+
+    def key_rows(self):
+        """One dict of key values (labels for categorical keys) per group."""
+        cols = {name: self.labels.get(name, self.keys[name]) for name in self.by}
+        return [{name: _plain(cols[name][i]) for name in self.by} for i in range(self.size)]
+
+
+def _plain(value):
+    if isinstance(value, np.datetime64):
+        return str(value)[:10] if not np.isnat(value) else ""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ── Reports ───────────────────────────────────────────────────────────────────
+
+def summary(groups, shots, metrics=METRICS, qs=PERCENTILES):
+    """Per group: shot count, then mean/std/percentiles of every metric."""
+    stats = {"shots": groups.shots}
+    for m in metrics:
+        if m not in shots.columns:
+            continue
+        values = shots[m]
+        stats[f"{m}_mean"] = groups.mean(values)
+        stats[f"{m}_std"] = groups.std(values)
+        pct = groups.percentiles(values, qs)
+        for j, q in enumerate(qs):
+            stats[f"{m}_p{q}"] = pct[:, j]
+    return _rows(groups, stats)
+
+
+def dispersion(groups, shots, x="lateral_yards", y="carry_dist_yards", confidence=0.95):
+    """
+    Confidence ellipse of the (x, y) landing positions of each group: centre,
+    semi-axes and the major axis angle from the y axis (degrees, clockwise
+    toward +x), from the closed-form eigen decomposition of each group's 2x2
+    covariance matrix.
+    """
+    n, mx, my, vx, vy, cxy = groups.covariance(shots[x], shots[y])
+    scale = np.sqrt(-2 * np.log(1 - confidence))          # chi-square, 2 d.o.f.
+    half_trace = (vx + vy) / 2
+    root = np.sqrt(((vx - vy) / 2) ** 2 + cxy ** 2)
+    major = scale * np.sqrt(np.maximum(half_trace + root, 0))
+    minor = scale * np.sqrt(np.maximum(half_trace - root, 0))
+    # Orientation of the major axis, measured from the y (target line) axis.
+    angle = np.degrees(0.5 * np.arctan2(2 * cxy, vy - vx))
+    return _rows(groups, {"shots": n, f"{x}_center": mx, f"{y}_center": my,
+                          "semi_major": major, "semi_minor": minor, "angle_deg": angle,
+                          "area": np.pi * major * minor})
+
+
+def gapping(shots, metric="carry_dist_yards", by="club_id", q=50):
+    """Clubs ordered by their `q`th-percentile `metric`, with the gap to the next club down."""
+    groups = Groups(shots, [by])
+    pct = groups.percentiles(shots[metric], (q, 25, 75))
+    typical, spread = pct[:, 0], pct[:, 1:]
+    order = np.argsort(-np.nan_to_num(typical, nan=-np.inf), kind="stable")
+    typical = typical[order]
+    gap = np.append(typical[:-1] - typical[1:], np.nan)
+    rows = []
+    key_rows = groups.key_rows()
+    for rank, i in enumerate(order):
+        rows.append({**key_rows[i], "shots": int(groups.shots[i]),
+                     f"{metric}_p{q}": _round(typical[rank]),
+                     "p25": _round(spread[i, 0]), "p75": _round(spread[i, 1]),
+                     "gap_to_next": _round(gap[rank])})
+    return rows
+
+
+def _round(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _column(values, digits=2):
+    """Per-group values as Python numbers, floats rounded and NaN as None."""
+    if values.dtype.kind in "iub":
+        return values.tolist()
+    values = np.round(values.astype(np.float64), digits)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _rows(groups, stats):
+    rows = groups.key_rows()
+    for name, values in stats.items():
+        for row, value in zip(rows, _column(np.asarray(values))):
+            row[name] = value
+    return rows
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _print_table(rows, columns=None):
+    if not rows:
+        print("(no rows)")
+        return
+    names = columns or list(rows[0])
+    cells = [["" if r.get(n) is None else str(r.get(n)) for n in names] for r in rows]
+    widths = [max(len(n), *(len(c[i]) for c in cells)) for i, n in enumerate(names)]
+    print("  ".join(n.rjust(w) for n, w in zip(names, widths)))
+    for c in cells:
+        print("  ".join(v.rjust(w) for v, w in zip(c, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-club / per-session shot analytics.")
+    parser.add_argument("report", choices=("clubs", "sessions", "dispersion", "gapping"))
+    parser.add_argument("--dir", action="append", help=f"column store(s) (default {columnar.COLUMNS_DIR})")
+    parser.add_argument("--metrics", default="carry_dist_yards,ball_speed_ms,smash_factor,"
+                                             "launch_angle_deg,backspin_rpm,lateral_yards")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--include-invalid", action="store_true")
+    args = parser.parse_args(argv)
+
+    metrics = [m for m in args.metrics.split(",") if m]
+    paths = args.dir or [columnar.COLUMNS_DIR]
+    for path in paths:
+        stored = columnar.load_schema(path)["columns"]
+        unknown = [m for m in metrics if stored.get(m, {}).get("type") not in _NUMERIC]
+        if unknown:
+            parser.error(f"--metrics: {', '.join(unknown)} not a numeric column of {path}")
+    # dispersion and gapping read fixed columns besides --metrics.
+    extra = {"dispersion": ["lateral_yards", "carry_dist_yards"], "gapping": ["carry_dist_yards"]}
+    t0 = time.perf_counter()
+    shots = load(*paths, metrics=list(dict.fromkeys(metrics + extra.get(args.report, []))),
+                 include_invalid=args.include_invalid)
+    by = (["store"] if "store" in shots.columns else [])
+    if args.report == "clubs":
+        rows = summary(Groups(shots, by + ["club_id"]), shots, metrics, qs=(50,))
+        columns = by + ["club_id", "shots"] + [f"{m}_{s}" for m in metrics for s in ("mean", "std", "p50")]
+    elif args.report == "sessions":
+        rows = summary(Groups(shots, by + ["session_id", "session_date", "club_id"]), shots, metrics, qs=())
+        columns = None
+    elif args.report == "dispersion":
+        rows = dispersion(Groups(shots, by + ["club_id"]), shots, confidence=args.confidence)
+        columns = None
+    else:
+        rows = []
+        for store in (range(len(shots.labels["store"])) if by else [None]):
+            prefix = {} if store is None else {"store": shots.labels["store"][store]}
+            rows += [{**prefix, **row} for row in gapping(_only_store(shots, store))]
+        columns = None
+    elapsed = (time.perf_counter() - t0) * 1000
+    _print_table(rows, columns)
+    print(f"\n{len(shots)} shots, {len(rows)} groups in {elapsed:.0f} ms", file=sys.stderr)
+
+
+def _only_store(shots, store):
+    if store is None:
+        return shots
+    keep = shots["store"] == store
+    return Shots({name: col[keep] for name, col in shots.columns.items()}, shots.labels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark analytics.py on a synthetic shot table.
+
+Builds N shots spread over P players, C clubs and S sessions per player
+directly as column arrays (no CSV), then times each report and checks a few
+groups against plain per-group NumPy.
+
+Usage: python bench_analytics.py [n_shots] [players]
+"""
+import sys, time
+
+import numpy as np
+
+import analytics
+
+
+def synthetic(n, players, clubs=14, sessions_per_player=200, seed=0):
+    rng = np.random.default_rng(seed)
+    club = rng.integers(0, clubs, n).astype(np.int16)
+    base = 60 + 15 * (clubs - club)                     # longer clubs carry further
+    cols = {
+        "store": rng.integers(0, players, n),
+        "club_id": club,
+        "session_id": rng.integers(0, players * sessions_per_player, n).astype(np.int64),
+        "carry_dist_yards": (base + rng.normal(0, 8, n)).astype(np.float32),
+        "lateral_yards": rng.normal(0, 6, n).astype(np.float32),
+    }
+    for name in analytics.METRICS:
+        cols.setdefault(name, rng.normal(100, 20, n).astype(np.float32))
+    cols["carry_dist_yards"][rng.random(n) < 0.02] = np.nan     # some missing values
+    labels = {"club_id": np.array([f"club{i}" for i in range(clubs)]),
+              "store": np.array([f"player{i}" for i in range(players)])}
+    return analytics.Shots(cols, labels)
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"  {label:<34} {(time.perf_counter() - t0) * 1000:>8.1f} ms  ({len(result)} groups)")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    shots = synthetic(n, players)
+    print(f"{n:,} shots, {players} players, {len(analytics.METRICS)} metrics")
+
+    t0 = time.perf_counter()
+    by_club = analytics.Groups(shots, ["store", "club_id"])
+    rows = timed("summary per player+club", lambda: analytics.summary(by_club, shots))
+    timed("summary per session", lambda: analytics.summary(
+        analytics.Groups(shots, ["session_id"]), shots, ("carry_dist_yards", "ball_speed_ms")))
+    timed("dispersion per player+club", lambda: analytics.dispersion(by_club, shots))
+    timed("gapping (all players)", lambda: analytics.gapping(shots))
+    print(f"  {'total':<34} {(time.perf_counter() - t0) * 1000:>8.1f} ms")
+
+    # Spot-check against straightforward per-group NumPy.
+    carry = shots["carry_dist_yards"]
+    for i in (0, by_club.size // 2, by_club.size - 1):
+        store, club = by_club.keys["store"][i], by_club.keys["club_id"][i]
+        v = carry[(shots["store"] == store) & (shots["club_id"] == club)].astype(np.float64)
+        v = v[~np.isnan(v)]
+        for stat, expect in (("mean", v.mean()), ("std", v.std(ddof=1)),
+                             ("p10", np.percentile(v, 10)), ("p90", np.percentile(v, 90))):
+            got = rows[i][f"carry_dist_yards_{stat}"]
+            assert abs(got - expect) < 0.01, (i, stat, got, expect)
+    print("  per-group results match plain NumPy")
+
+
+if __name__ == "__main__":
+    main()
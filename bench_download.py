@@ -0,0 +1,90 @@
+"""
+Download throughput benchmark against the local fake SOAP server.
+
+Starts fake_server.py in-process (synthetic data or --fixtures), then runs
+a full `download_all.py --full --no-cache` in a fresh temporary directory for
+every worker count, and reports wall time, sessions/s, shots/s, requests,
+bytes sent by the server and the downloader's peak RSS.
+
+Usage:
+    python bench_download.py --workers 1,2,4,8 --sessions 200 --shots 80 --latency 40
+    python bench_download.py --workers 4,16 --error-rate 0.05 --stream
+"""
+import os, sys, json, time, argparse, tempfile, subprocess
+
+import fake_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_download(url, workers, extra_args, cwd):
+    """Run one download in `cwd`; returns (seconds, peak RSS in MB, exit status, output)."""
+    cmd = [sys.executable, os.path.join(HERE, "download_all.py"), "--full", "--no-cache",
+           "--no-login", "--url", url, "--workers", str(workers), *extra_args]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = proc.stdout.read().decode(errors="replace")
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - t0
+    # ru_maxrss is in KiB on Linux.
+    return elapsed, usage.ru_maxrss / 1024, proc.returncode, output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark download_all.py against fake_server.py.")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--chunk-size", type=int, help="passed through to download_all.py")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="starting client request rate (default 1000, i.e. unthrottled)")
+    parser.add_argument("--stream", action="store_true", help="benchmark --stream output")
+    parser.add_argument("--json", help="also write the results to this file")
+    fake_server.add_data_args(parser)
+    fake_server.add_fault_args(parser)
+    args = parser.parse_args(argv)
+
+    data = fake_server.data_from_args(args)
+    server = fake_server.start_server(data, fake_server.faults_from_args(args))
+    n_sessions, n_shots = len(data.sessions), data.n_shots
+    print(f"Fake server: {n_sessions} sessions, {n_shots} shots at {server.url}")
+
+    extra = ["--rate", str(args.rate)]
+    if args.chunk_size:
+        extra += ["--chunk-size", str(args.chunk_size)]
+    if args.stream:
+        extra.append("--stream")
+
+    results = []
+    print(f"\n{'workers':>7} {'seconds':>8} {'sess/s':>8} {'shots/s':>9} {'requests':>9} "
+          f"{'MB sent':>8} {'peak RSS':>9}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        server.stats.reset()
+        with tempfile.TemporaryDirectory(prefix="bench_download_") as tmp:
+            elapsed, rss, code, output = run_download(server.url, workers, extra, tmp)
+        if code != 0:
+            print(output[-2000:])
+            sys.exit(f"download_all.py exited with {code} (workers={workers})")
+        row = {
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "sessions_per_sec": round(n_sessions / elapsed, 2),
+            "shots_per_sec": round(n_shots / elapsed, 1),
+            "requests": server.stats.requests,
+            "server_errors": server.stats.errors,
+            "bytes_sent": server.stats.bytes_sent,
+            "peak_rss_mb": round(rss, 1),
+        }
+        results.append(row)
+        print(f"{workers:>7} {elapsed:>8.2f} {row['sessions_per_sec']:>8.1f} "
+              f"{row['shots_per_sec']:>9.0f} {row['requests']:>9} "
+              f"{row['bytes_sent'] / 1e6:>8.2f} {rss:>7.0f}MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sessions": n_sessions, "shots": n_shots, "args": vars(args),
+                       "results": results}, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark the compiled batch flattener against the original flatten_shot.
+
+Shots are synthesised in the real GetSessionResultData layout (every
+ResultParameters key as a *_PARAMETER_STRING string, WeatherData,
+GolfSwingParameters, plus the extra parameters the API sends that the CSV
+ignores). Both implementations must produce identical rows.
+
+Usage: python bench_flatten.py [n_shots]
+"""
+import sys, time, random
+
+from shot_schema import CSV_FIELDS, flatten_rows, flatten_columns
+from fake_server import make_shot
+
+
+def _p(params, key):
+    """Pull a _PARAMETER_STRING value, return empty string if missing."""
+    return params.get(key + "_PARAMETER_STRING", "") or ""
+
+
+def reference_flatten(shot, sess_info):
+    """The original hand-written flatten_shot, kept verbatim as the baseline."""
+    params  = shot.get("ResultParameters", {}) or {}
+    weather = shot.get("WeatherData", {}) or {}
+    swing   = shot.get("GolfSwingParameters", {}) or {}
+
+    return {
+        # Session
+        "session_id":              sess_info["sessionID"],
+        "session_name":            sess_info["displayName"],
+        "session_date":            sess_info["createDate"],
+        "app_version":             sess_info["appVersion"],
+        "session_location":        sess_info["location"],
+        # Shot identity
+        "result_id":               shot.get("ResultID", ""),
+        "swing_index":             shot.get("SwingIndex", ""),
+        "shot_datetime":           shot.get("ShotDateTime", ""),
+        "club_id":                 shot.get("ClubID", ""),
+        "club_type_id":            shot.get("ClubTypeID", ""),
+        "is_invalid":              shot.get("IsInvalid", ""),
+        "is_deleted":              shot.get("IsDeleted", ""),
+        "result_type":             shot.get("ResultType", ""),
+        # Shot classification
+        "shot_classification":     swing.get("SHOTCLASSIFICATION_PARAMETER_STRING", ""),
+        "detection_mode":          swing.get("DETECTION_MODE_PARAMETER_STRING", ""),
+        "radar_type":              swing.get("RADARCAMERATYPE", ""),
+        "range_ball":              swing.get("RANGEBALL", ""),
+        # Distances
+        "carry_dist_yards":        _p(params, "CARRYDIST"),
+        "total_dist_yards":        _p(params, "TOTALDIST"),
+        "roll_dist_yards":         _p(params, "ROLLDIST"),
+        "lateral_yards":           _p(params, "LATERAL"),
+        "curve_dist_yards":        _p(params, "CURVEDIST"),
+        "height_yards":            _p(params, "HEIGHT"),
+        "flight_time_sec":         _p(params, "FLIGHTTIME"),
+        # Speed & power
+        "ball_speed_ms":           _p(params, "LAUNCHSPEED"),
+        "club_head_speed_ms":      _p(params, "CLUBHEADSPEED"),
+        "club_head_speed_post_ms": _p(params, "CLUBHEADSPEEDPOST"),
+        "smash_factor":            _p(params, "SMASH"),
+        # Launch
+        "launch_angle_deg":        _p(params, "LAUNCHELEV"),
+        "launch_direction_deg":    _p(params, "LAUNCHAZIM"),
+        # Spin
+        "backspin_rpm":            _p(params, "BACKSPIN"),
+        "sidespin_rpm":            _p(params, "SIDESPIN"),
+        "total_spin_rpm":          _p(params, "SPIN"),
+        "spin_is_estimate":        params.get("SPIN_IS_ESTIMATE", ""),
+        "spin_axis_deg":           _p(params, "SPINAXIS"),
+        "spin_loft_deg":           _p(params, "SPINLOFT"),
+        # Club / impact
+        "face_angle_deg":          _p(params, "CLUBFACEANGLE"),
+        "face_to_path_deg":        _p(params, "FACETOPATH"),
+        "effective_loft_deg":      _p(params, "EFFECTIVELOFT"),
+        "swing_plane_tilt_deg":    _p(params, "SWINGPLANETILT"),
+        "swing_plane_rotation_deg":_p(params, "SWINGPLANEROTATION"),
+        "club_strike_dir_deg":     _p(params, "CLUBSTRIKEDIR"),
+        "club_strike_dir_vert_deg":_p(params, "CLUBSTRIKEDIRVERT"),
+        "impact_elev_deg":         _p(params, "IMPACTELEV"),
+        "fusion_impact_lateral":   params.get("FusionImpactLocationLateral", ""),
+        "fusion_impact_vertical":  params.get("FusionImpactLocationVertical", ""),
+        "club_low_point":          params.get("CLUB_LOW_POINT", ""),
+        # Weather
+        "weather_temperature_c":   weather.get("WEATHER_TEMPERATURE", ""),
+        "weather_humidity_pct":    weather.get("WEATHER_HUMIDITY", ""),
+        "weather_pressure_atm":    weather.get("WEATHER_PRESSURE", ""),
+        "weather_wind_speed_ms":   weather.get("WEATHER_WIND_SPEED", ""),
+        "weather_wind_dir_deg":    weather.get("WEATHER_WIND_DIRECTION_ANGLE", ""),
+        "gps_latitude":            weather.get("LATITUDE", ""),
+        "gps_longitude":           weather.get("LONGITUDE", ""),
+        "altitude_m":              weather.get("ALTITUDE", ""),
+    }
+
+
+def bench(label, fn, repeat=3):
+    best = min(_timed(fn) for _ in range(repeat))
+    return label, best
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    sess = {"sessionID": "9149941", "displayName": "Tuesday, 02:40 PM",
+            "createDate": "2026-02-24 22:41:03", "appVersion": "iOS_FS Golf_9.5.0", "location": ""}
+    shots = [make_shot(i, rng) for i in range(n)]
+
+    expected = [tuple(reference_flatten(s, sess)[k] for k in CSV_FIELDS) for s in shots[:1000]]
+    assert flatten_rows(shots[:1000], sess) == expected, "compiled flattener output differs"
+    assert flatten_columns(shots[:1000], sess) == dict(zip(CSV_FIELDS, map(list, zip(*expected)))), \
+        "compiled column flattener output differs"
+
+    results = [
+        bench("reference flatten_shot (dict per shot)", lambda: [reference_flatten(s, sess) for s in shots]),
+        bench("compiled flatten_rows (tuples)",         lambda: flatten_rows(shots, sess)),
+        bench("compiled flatten_columns (columns)",     lambda: flatten_columns(shots, sess)),
+    ]
+    base = results[0][1]
+    print(f"{n:,} shots, best of 3")
+    for label, t in results:
+        print(f"  {label:<42} {t * 1000:8.1f} ms  {n / t:>12,.0f} shots/s  x{base / t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup benchmark for the flightscope.py subcommands.
+
+Downloads a synthetic data set from fake_server.py (in-process) into a
+temporary directory with `flightscope.py sync --db --columns`, then runs each
+command there N times in a fresh interpreter and reports the median wall time
+above a bare `python -c pass`, plus which heavy modules it imported (from
+-X importtime). Startup is timed with `<command> --help`: every import done
+and the arguments parsed, but no work. The offline commands fail the run if
+their startup takes 100 ms or more or loads requests, dotenv, Playwright or
+NumPy; full runs are listed for reference.
+
+Usage:
+    python bench_startup.py [--runs 15] [--sessions 40] [--shots 60]
+"""
+import os, sys, time, argparse, tempfile, statistics, subprocess
+
+import fake_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, "flightscope.py")
+BUDGET_MS = 100
+HEAVY = ("requests", "dotenv", "playwright", "numpy", "xml.etree")
+
+# (label, argv, offline: startup must stay within BUDGET_MS without heavy imports)
+STARTUP = [
+    ("flightscope --help",             ["--help"],                         True),
+    ("query --help",                   ["query", "--help"],                True),
+    ("stats --help",                   ["stats", "--help"],                True),
+    ("export --help",                  ["export", "--help"],               True),
+    ("export csv --help",              ["export", "csv", "--help"],        True),
+    ("analyze --help (NumPy)",         ["analyze", "--help"],              False),
+    ("sync --help (network stack)",    ["sync", "--help"],                 False),
+]
+RUNS = [
+    ("query --club 3 --limit 20",      ["query", "--club", "3", "--limit", "20"]),
+    ("query --min-carry 150",          ["query", "--min-carry", "150"]),
+    ("stats",                          ["stats"]),
+    ("stats --grain week",             ["stats", "--grain", "week"]),
+    ("export csv",                     ["export", "csv", "--out", "export.csv"]),
+    ("analyze clubs",                  ["analyze", "clubs"]),
+]
+
+
+def run(argv, cwd, importtime=False):
+    """Wall seconds of one command in a fresh interpreter (and its stderr)."""
+    cmd = [sys.executable, *(["-X", "importtime"] if importtime else []), *argv]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode:
+        raise SystemExit(f"{' '.join(argv)} failed:\n{proc.stderr.decode(errors='replace')}")
+    return elapsed, proc.stderr.decode(errors="replace")
+
+
+def heavy_imports(argv, cwd):
+    _, log = run(argv, cwd, importtime=True)
+    loaded = {line.rsplit("|", 1)[-1].strip() for line in log.splitlines()
+              if line.startswith("import time:")}
+    return sorted(m for m in HEAVY if m in loaded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark flightscope.py startup.")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--shots", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    data = fake_server.Dataset.synthetic(args.sessions, args.shots, roll_points=0)
+    server = fake_server.start_server(data)
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as cwd:
+        run([CLI, "sync", "--full", "--no-cache", "--no-login", "--url", server.url,
+             "--rate", "1000", "--db", "--columns"], cwd)
+        server.shutdown()
+        print(f"{len(data.sessions)} sessions, {data.n_shots} shots; median of {args.runs} runs\n")
+
+        def median_ms(argv):
+            return statistics.median(run(argv, cwd)[0] for _ in range(args.runs)) * 1000
+
+        base = median_ms(["-c", "pass"])
+        print(f"  {'python -c pass':<32} {base:>7.1f} ms\n\nStartup (above python -c pass):")
+        failed = []
+        for label, cmd, offline in STARTUP:
+            ms = median_ms([CLI, *cmd]) - base
+            heavy = heavy_imports([CLI, *cmd], cwd)
+            ok = not offline or (ms < BUDGET_MS and not heavy)
+            if not ok:
+                failed.append(label)
+            note = f"< {BUDGET_MS} ms " + ("ok" if ok else "FAILED") if offline else ""
+            print(f"  {label:<32} {ms:>+7.1f} ms  {note:<16}"
+                  f"{'imports ' + ', '.join(heavy) if heavy else ''}")
+        print("\nFull runs (above python -c pass):")
+        for label, cmd in RUNS:
+            print(f"  {label:<32} {median_ms([CLI, *cmd]) - base:>+7.1f} ms")
+    if failed:
+        raise SystemExit(f"\nOver the startup budget: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Full-fidelity recordings ("cassettes") of SOAP traffic, and replay.
+
+A cassette is a SQLite file with one row per request/response exchange:
+the complete request params, status, response headers, the whole decoded
+body (zlib-compressed) and how long the exchange took. Rows are indexed by
+the same request key as the response cache, so replay is a single lookup.
+
+Recording: FlightScopeClient(recorder=Cassette(path)) records everything it
+sends; the Playwright interceptors call record_playwright() for every SOAP
+response the browser sees. Replay: FlightScopeClient(replay=Cassette(path))
+mounts a ReplayAdapter that answers from the cassette without any network
+or rate limiting. A request recorded several times is replayed in recorded
+order, then its last response repeats.
+
+Usage:
+    python download_all.py --full --record run.cassette
+    python download_all.py --full --no-cache --replay run.cassette
+    python cassette.py stats run.cassette
+    python cassette.py show run.cassette GetSessionLite
+"""
+import io
+import sys
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from response_cache import cache_key
+
+CASSETTE_FILE = "soap.cassette"
+
+# Stored bodies are decoded, so these no longer describe them.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request the cassette does not contain."""
+
+
+class Cassette:
+    """Thread-safe cassette file; see the module docstring."""
+
+    def __init__(self, path=CASSETTE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS exchanges (
+                    id          INTEGER PRIMARY KEY,
+                    key         TEXT NOT NULL,
+                    method      TEXT NOT NULL,
+                    params      TEXT NOT NULL,
+                    status      INTEGER NOT NULL,
+                    headers     TEXT NOT NULL,
+                    body        BLOB NOT NULL,
+                    body_size   INTEGER NOT NULL,
+                    elapsed     REAL NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    source      TEXT NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS exchanges_key ON exchanges (key, id)")
+
+    # ── Recording ──
+
+    def record(self, params, status, headers, body, elapsed, source="client"):
+        """Store one exchange. `body` is the decoded response body (bytes or str)."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        headers = {k: v for k, v in dict(headers).items() if k.lower() not in _DROP_HEADERS}
+        row = (cache_key(params), params.get("method") or params.get("action") or "?",
+               json.dumps(params, sort_keys=True), status, json.dumps(headers),
+               zlib.compress(body, 6), len(body), elapsed, time.time(), source)
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO exchanges (key, method, params, status, headers, body, "
+                             "body_size, elapsed, recorded_at, source) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def record_playwright(self, response):
+        """Record a Playwright Response to a SOAP request (call from page.on("response"))."""
+        request = response.request
+        params = dict(parse_qsl(request.post_data or urlsplit(request.url).query,
+                                keep_blank_values=True))
+        timing = request.timing or {}
+        elapsed = max(0.0, timing.get("responseEnd", 0)) / 1000
+        self.record(params, response.status, response.headers, response.body(), elapsed,
+                    source="browser")
+
+    # ── Replay ──
+
+    def lookup(self, params):
+        """(status, headers, body bytes) for the next recorded response to `params`."""
+        key = cache_key(params)
+        with self._lock:
+            rows = self._db.execute("SELECT status, headers, body FROM exchanges "
+                                    "WHERE key = ? ORDER BY id", (key,)).fetchall()
+            if not rows:
+                raise CassetteMiss(f"{params.get('method')} not in {self.path}")
+            i = self._cursors.get(key, 0)
+            self._cursors[key] = i + 1
+        status, headers, body = rows[min(i, len(rows) - 1)]
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def exchanges(self, method=None):
+        """Iterate recorded exchanges as dicts (bodies decoded), in recording order."""
+        sql = "SELECT method, params, status, headers, body, elapsed, source FROM exchanges"
+        args = ()
+        if method:
+            sql += " WHERE method = ?"
+            args = (method,)
+        for m, params, status, headers, body, elapsed, source in self._db.execute(sql + " ORDER BY id", args):
+            yield {"method": m, "params": json.loads(params), "status": status,
+                   "headers": json.loads(headers), "body": zlib.decompress(body).decode("utf-8", "replace"),
+                   "elapsed": elapsed, "source": source}
+
+    def stats(self):
+        return self._db.execute("""
+            SELECT method, COUNT(*), SUM(body_size), SUM(LENGTH(body)), AVG(elapsed)
+            FROM exchanges GROUP BY method ORDER BY COUNT(*) DESC""").fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """requests transport that answers every request from a Cassette."""
+
+    def __init__(self, cassette, **kwargs):
+        self.cassette = cassette
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        body = request.body or urlsplit(request.url).query
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        status, headers, content = self.cassette.lookup(dict(parse_qsl(body, keep_blank_values=True)))
+        raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status,
+                           preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 2 and argv[0] == "stats":
+        cassette = Cassette(argv[1])
+        print(f"{'method':<42} {'count':>6} {'bytes':>12} {'stored':>10} {'avg ms':>7}")
+        for method, n, size, stored, elapsed in cassette.stats():
+            print(f"{method:<42} {n:>6} {size:>12,} {stored:>10,} {elapsed * 1000:>7.0f}")
+    elif len(argv) >= 2 and argv[0] == "show":
+        cassette = Cassette(argv[1])
+        for ex in cassette.exchanges(argv[2] if len(argv) > 2 else None):
+            print(f"[{ex['status']}] {ex['method']} {json.dumps(ex['params'])} "
+                  f"({len(ex['body']):,} chars, {ex['elapsed'] * 1000:.0f} ms, {ex['source']})")
+            print(f"    {ex['body'][:300]}")
+    else:
+        print(__doc__.split("Usage:")[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Durable checkpoint journal for download runs.
+
+The journal is an append-only NDJSON file. Its first line describes the run
+(options, the session list and the fetch plan); every following line records
+one session that has been fully fetched and written, together with the byte
+sizes of the output files at that point. Each line is fsync'd before the next
+session starts, so after a crash the journal says exactly which sessions are
+done and how much of each partial output file can be trusted.
+
+The journal is deleted once the run's outputs and sync state are in place;
+if it still exists at startup, the previous run was interrupted.
+"""
+import os, json
+
+JOURNAL_FILE = "download.journal"
+
+
+class Journal:
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self._f = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """
+        Return (header, entries) from an interrupted run, or (None, []).
+        A torn last line (crash mid-write) is ignored.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return None, []
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        if not records or "header" not in records[0]:
+            return None, []
+        return records[0]["header"], [r for r in records[1:] if "sid" in r]
+
+    def start(self, header):
+        """Begin a new journal for a fresh run."""
+        self._f = open(self.path, "wb")
+        self._append({"header": header})
+
+    def reopen(self, entries):
+        """Continue an interrupted journal, dropping anything after its last good entry."""
+        header, _ = self.load()
+        self._f = open(self.path, "wb")
+        self._append({"header": header})
+        for entry in entries:
+            self._append(entry)
+
+    def record(self, sid, **fields):
+        """Durably record that session `sid` is complete."""
+        self._append({"sid": sid, **fields})
+
+    def _append(self, record):
+        self._f.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def finish(self):
+        """The run completed: close and delete the journal."""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
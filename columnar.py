@@ -0,0 +1,177 @@
+"""
+Columnar typed shot store: one NumPy .npy file per shot column.
+
+Built from shots_all.csv (or any iterable of flatten_shot rows) using the types
+declared in shot_schema.SHOT_FIELDS, so analysis code can memory-map just the
+columns it needs instead of re-parsing the CSV:
+
+    cols = load_columns(columns=["club_id", "carry_dist_yards"])
+    cols["carry_dist_yards"]            # float32, NaN where missing
+
+Layout of shots_columns/:
+    schema.json     row count, per-column type, file and category list
+    <column>.npy    f32/f64 (NaN = missing), i32/i64 (-1 = missing), bool,
+                    datetime64[s] (NaT = missing), unicode str, or for
+                    categorical columns int16/int32 codes (-1 = missing)
+                    into schema["columns"][name]["categories"]
+
+Usage: python columnar.py [shots_all.csv] [shots_columns]
+"""
+import os, sys, csv, json, shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+from shot_schema import SHOT_FIELDS
+
+COLUMNS_DIR = "shots_columns"
+CHUNK_ROWS = 65536
+
+_NP_TYPES = {"f32": np.float32, "f64": np.float64, "i32": np.int32, "i64": np.int64}
+_TRUE = {"1", "true", "yes", "y", "t"}
+_NAT = np.datetime64("NaT", "s")
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _to_int(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        try:
+            return int(float(v))
+        except (TypeError, ValueError):
+            return -1
+
+
+def _to_datetime(v):
+    if not v:
+        return _NAT
+    try:
+        dt = datetime.fromisoformat(str(v))
+    except ValueError:
+        return _NAT
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, "s")
+
+
+class ColumnWriter:
+    """Accumulate flat shot rows in typed chunks and save them as a column store."""
+
+    def __init__(self, out_dir=COLUMNS_DIR, fields=SHOT_FIELDS, chunk_rows=CHUNK_ROWS):
+        self.out_dir = out_dir
+        self.fields = [(name, dtype) for name, _, _, dtype in fields]
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._buf = {name: [] for name, _ in self.fields}
+        self._chunks = {name: [] for name, _ in self.fields}
+        self._categories = {name: {} for name, dtype in self.fields if dtype == "category"}
+
+    def add(self, row):
+        for name, _ in self.fields:
+            self._buf[name].append(row.get(name, ""))
+        self.rows += 1
+        if len(self._buf[self.fields[0][0]]) >= self.chunk_rows:
+            self._flush()
+
+    def _convert(self, name, dtype, values):
+        if dtype in ("f32", "f64"):
+            return np.array([_to_float(v) for v in values], dtype=_NP_TYPES[dtype])
+        if dtype in ("i32", "i64"):
+            return np.array([_to_int(v) for v in values], dtype=_NP_TYPES[dtype])
+        if dtype == "bool":
+            return np.array([str(v).strip().lower() in _TRUE for v in values], dtype=bool)
+        if dtype == "datetime":
+            return np.array([_to_datetime(v) for v in values], dtype="datetime64[s]")
+        if dtype == "category":
+            codes = self._categories[name]
+            return np.array([codes.setdefault(v, len(codes)) if v != "" else -1 for v in values],
+                            dtype=np.int32)
+        return np.array([str(v) for v in values], dtype=str)
+
+    def _flush(self):
+        for name, dtype in self.fields:
+            if self._buf[name]:
+                self._chunks[name].append(self._convert(name, dtype, self._buf[name]))
+                self._buf[name] = []
+
+    def finish(self):
+        """Write all columns to a fresh directory and swap it into place."""
+        self._flush()
+        tmp = self.out_dir + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        schema = {"rows": self.rows, "columns": {}}
+        for name, dtype in self.fields:
+            chunks = self._chunks[name]
+            if chunks:
+                arr = np.concatenate(chunks)
+            elif dtype == "category":
+                arr = np.empty(0, dtype=np.int32)
+            elif dtype == "datetime":
+                arr = np.empty(0, dtype="datetime64[s]")
+            else:
+                arr = np.empty(0, dtype=_NP_TYPES.get(dtype, bool if dtype == "bool" else str))
+            meta = {"type": dtype, "file": name + ".npy"}
+            if dtype == "category":
+                cats = list(self._categories[name])
+                if len(cats) < np.iinfo(np.int16).max:
+                    arr = arr.astype(np.int16)
+                meta["categories"] = cats
+            np.save(os.path.join(tmp, meta["file"]), arr)
+            schema["columns"][name] = meta
+
+        with open(os.path.join(tmp, "schema.json"), "w") as f:
+            json.dump(schema, f, indent=2)
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+        os.replace(tmp, self.out_dir)
+        return schema
+
+
+def build_from_rows(rows, out_dir=COLUMNS_DIR):
+    writer = ColumnWriter(out_dir)
+    for row in rows:
+        writer.add(row)
+    return writer.finish()
+
+
+def build_from_csv(csv_path="shots_all.csv", out_dir=COLUMNS_DIR):
+    """Stream shots_all.csv into a column store."""
+    with open(csv_path, newline="") as f:
+        return build_from_rows(csv.DictReader(f), out_dir)
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+def load_schema(path=COLUMNS_DIR):
+    with open(os.path.join(path, "schema.json")) as f:
+        return json.load(f)
+
+
+def load_columns(path=COLUMNS_DIR, columns=None, mmap=True):
+    """Return {column: ndarray}, memory-mapped unless mmap=False."""
+    schema = load_schema(path)
+    names = columns or list(schema["columns"])
+    return {name: np.load(os.path.join(path, schema["columns"][name]["file"]),
+                          mmap_mode="r" if mmap else None)
+            for name in names}
+
+
+def decode(codes, categories):
+    """Turn categorical codes back into their string values ("" for missing)."""
+    lookup = np.array(list(categories) + [""], dtype=str)
+    return lookup[np.asarray(codes)]
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "shots_all.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else COLUMNS_DIR
+    schema = build_from_csv(src, dst)
+    print(f"Saved {schema['rows']} shots x {len(schema['columns'])} columns to {dst}/")
@@ -0,0 +1,57 @@
+"""Shared fixtures: fake_server.py endpoints and in-process download_all runs."""
+import os, io, json, contextlib
+
+import pytest
+
+import fake_server
+
+
+def dataset(n_sessions=12, shots=8, seed=42):
+    """Small synthetic data set without trajectories."""
+    return fake_server.Dataset.synthetic(n_sessions, shots, roll_points=0, seed=seed)
+
+
+@pytest.fixture
+def fake():
+    """start(data=None, faults=None) -> a running fake_server (shut down after the test)."""
+    servers = []
+
+    def start(data=None, faults=None):
+        server = fake_server.start_server(data or dataset(), faults)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def download(monkeypatch):
+    """download(server, cwd, *args): run download_all.main in `cwd`; returns its output."""
+    import download_all
+
+    def run(server, cwd, *args):
+        os.makedirs(cwd, exist_ok=True)
+        monkeypatch.chdir(cwd)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            download_all.main(["--no-login", "--url", server.url, "--rate", "1000", *args])
+        return out.getvalue()
+
+    return run
+
+
+def serve(server, data):
+    """Make `server` answer from `data` from now on (its response bodies are memoized)."""
+    server.soap = fake_server.SoapHandler(data)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def raw_shots(data):
+    """{sessionID: [raw shot dicts]} of a Dataset, for building a changed copy."""
+    return {sid: [json.loads(s) for s in shots] for sid, shots in data.shot_json.items()}
@@ -0,0 +1,283 @@
+"""
+Persistent ResultID / GolfSwingID index of every shot in the archive.
+
+Each shot must be in the archive once, but fetch windows can overlap: the
+speculative last window of a session asks for more shots than it knows of,
+and GetSessionResultData happily runs past the range it was asked for.
+DedupIndex records which session owns every ResultID, and which ResultID
+every GolfSwingID belongs to, so download_all drops a duplicate with a dict
+lookup as the shot arrives instead of rescanning shots_all.json.
+
+    dedup_index.bin   little-endian int64: magic, shot count, then three
+                      arrays of that length sorted by ResultID: ResultIDs,
+                      owning SessionIDs, GolfSwingIDs (0 = unknown)
+
+The first session to claim a shot keeps it. A run releases every session it
+is about to re-fetch before claiming any, so a session never competes with
+its own old shots, and a shot that moved between two re-fetched sessions
+ends up in the one that has it now.
+
+Usage:
+    python dedup_index.py stats
+    python dedup_index.py build [sync_state.json]    # from the last run's ResultIDs
+    python dedup_index.py reconcile [--no-login]     # local counts vs getTotalStatsForPlayer
+"""
+import os, sys, csv, argparse
+from array import array
+
+from shot_schema import CSV_FIELDS
+
+INDEX_FILE = "dedup_index.bin"
+
+_MAGIC = 0x46534458_00000001    # "FSDX", version 1
+_SWAP = sys.byteorder != "little"
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class DedupIndex:
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.owner = {}         # ResultID -> SessionID
+        self.swing_of = {}      # ResultID -> GolfSwingID
+        self.swing = {}         # GolfSwingID -> ResultID
+        self.sessions = {}      # SessionID -> [ResultID]
+        self.dropped = []       # (SessionID, ResultID, reason) this run
+        self.loaded = False
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """The index saved at `path`, or an empty one (loaded=False) if there is none."""
+        index = cls(path)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return index
+        values = array("q")
+        values.frombytes(data)
+        if _SWAP:
+            values.byteswap()
+        if len(values) < 2 or values[0] != _MAGIC or len(values) != 2 + 3 * values[1]:
+            raise ValueError(f"{path}: not a dedup index (delete it to rebuild)")
+        n = values[1]
+        rids, sids, gsids = values[2:2 + n], values[2 + n:2 + 2 * n], values[2 + 2 * n:]
+        index.owner = dict(zip(rids, sids))
+        for rid, sid, gsid in zip(rids, sids, gsids):
+            index.sessions.setdefault(sid, []).append(rid)
+            if gsid:
+                index.swing_of[rid] = gsid
+                index.swing[gsid] = rid
+        index.loaded = True
+        return index
+
+    def save(self):
+        """Write the index atomically as sorted arrays."""
+        rids = sorted(self.owner)
+        values = array("q", (_MAGIC, len(rids)))
+        values.extend(rids)
+        values.extend(self.owner[rid] for rid in rids)
+        values.extend(self.swing_of.get(rid, 0) for rid in rids)
+        if _SWAP:
+            values.byteswap()
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(values.tobytes())
+        os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self.owner)
+
+    def __contains__(self, result_id):
+        return _int(result_id) in self.owner
+
+    # ── Updates ──
+
+    def release(self, session_id):
+        """Forget every shot of one session."""
+        for rid in self.sessions.pop(int(session_id), ()):
+            del self.owner[rid]
+            gsid = self.swing_of.pop(rid, None)
+            if gsid is not None and self.swing.get(gsid) == rid:
+                del self.swing[gsid]
+
+    def release_all(self, session_ids):
+        """Forget every shot of the sessions about to be fetched again."""
+        for sid in session_ids:
+            self.release(sid)
+
+    def claim(self, session_id, shots):
+        """
+        Make `shots` (raw shot dicts) the shots of `session_id`, replacing what
+        it held before, and return the ones to keep: a shot is dropped if its
+        ResultID belongs to another session or came earlier in `shots`, or if
+        its GolfSwingID belongs to another ResultID. Each drop is appended to
+        self.dropped as (SessionID, ResultID, reason).
+        """
+        sid = int(session_id)
+        self.release(sid)
+        kept, rids = [], []
+        for shot in shots:
+            rid, gsid = _int(shot.get("ResultID")), _int(shot.get("GolfSwingID"))
+            if rid is None:
+                kept.append(shot)
+                continue
+            owner = self.owner.get(rid)
+            if owner is not None:
+                self.dropped.append((sid, rid, "repeated in session" if owner == sid
+                                     else f"already in session {owner}"))
+                continue
+            if gsid and self.swing.get(gsid, rid) != rid:
+                self.dropped.append((sid, rid, f"GolfSwingID {gsid} is ResultID {self.swing[gsid]}"))
+                continue
+            self.owner[rid] = sid
+            if gsid:
+                self.swing_of[rid] = gsid
+                self.swing[gsid] = rid
+            rids.append(rid)
+            kept.append(shot)
+        self.sessions[sid] = rids
+        return kept
+
+    def assign(self, session_id, result_ids):
+        """Record already-deduplicated ResultIDs (no GolfSwingIDs) for a session."""
+        sid = int(session_id)
+        # Keep the GolfSwingIDs the session's shots already had.
+        swings = {rid: self.swing_of[rid] for rid in self.sessions.get(sid, ()) if rid in self.swing_of}
+        self.release(sid)
+        rids = []
+        for rid in map(_int, result_ids):
+            if rid is None or rid in self.owner:
+                continue
+            self.owner[rid] = sid
+            gsid = swings.get(rid)
+            if gsid and gsid not in self.swing:
+                self.swing_of[rid] = gsid
+                self.swing[gsid] = rid
+            rids.append(rid)
+        self.sessions[sid] = rids
+
+    def seed(self, state):
+        """Build the index from a sync state (sessions in their saved order)."""
+        for sid, entry in state.get("sessions", {}).items():
+            self.assign(sid, entry.get("shot_ids", ()))
+
+    def retain(self, session_ids):
+        """Release every session not in `session_ids` (gone from the server)."""
+        keep = {int(sid) for sid in session_ids}
+        for sid in [sid for sid in self.sessions if sid not in keep]:
+            self.release(sid)
+
+
+# ── Reconciliation ────────────────────────────────────────────────────────────
+
+def local_counts(index, csv_path="shots_all.csv"):
+    """Shot counts of the local archive: rows in shots_all.csv by validity, and the index."""
+    counts = {"csv_rows": 0, "deleted": 0, "invalid": 0, "valid": 0,
+              "indexed": len(index), "sessions": len(index.sessions),
+              "with_swing_id": len(index.swing_of)}
+    if not os.path.exists(csv_path):
+        return counts
+    deleted, invalid = CSV_FIELDS.index("is_deleted"), CSV_FIELDS.index("is_invalid")
+    truthy = {"1", "true", "yes", "y", "t"}
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            counts["csv_rows"] += 1
+            if row[deleted].strip().lower() in truthy:
+                counts["deleted"] += 1
+            elif row[invalid].strip().lower() in truthy:
+                counts["invalid"] += 1
+            else:
+                counts["valid"] += 1
+    return counts
+
+
+def server_total(rows):
+    """(field, value) of the shot total in getTotalStatsForPlayer rows, or None."""
+    for row in rows:
+        for field, text in row.items():
+            value = _int(text)
+            if value is not None and "shot" in field.lower():
+                return field, value
+    return None
+
+
+def reconcile(client, index, csv_path="shots_all.csv"):
+    """Report lines comparing the local archive with the server's shot total."""
+    local = local_counts(index, csv_path)
+    try:
+        total = server_total(client.get_total_stats())
+    except Exception as e:
+        total = None
+        print(f"      getTotalStatsForPlayer failed: {e}")
+
+    def line(label, n, base=None):
+        diff = "" if base is None else f"  ({n - base:+,})"
+        return f"      {label:<34}{n:>9,}{diff}"
+
+    server = total[1] if total else None
+    lines = []
+    if total:
+        lines.append(line(f"Server total ({total[0]})", server))
+    else:
+        lines.append("      Server total                      unavailable")
+    lines += [
+        line("Local shots (shots_all.csv)", local["csv_rows"], server),
+        line("  deleted", local["deleted"]),
+        line("  invalid", local["invalid"]),
+        line("  valid", local["valid"], server),
+        line("Dedup index ResultIDs", local["indexed"], server),
+        f"      {'':<34}in {local['sessions']:,} sessions, "
+        f"{local['with_swing_id']:,} with a GolfSwingID",
+    ]
+    if index.dropped:
+        lines.append(line("Duplicates dropped this run", len(index.dropped)))
+    return lines
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ResultID / GolfSwingID dedup index.")
+    parser.add_argument("--index", default=INDEX_FILE)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="what the index holds")
+    p = sub.add_parser("build", help="rebuild the index from a sync state's ResultIDs")
+    p.add_argument("state", nargs="?", default="sync_state.json")
+    p = sub.add_parser("reconcile", help="compare local shot counts with getTotalStatsForPlayer")
+    p.add_argument("--csv", default="shots_all.csv")
+    p.add_argument("--url", help="SOAP endpoint (default: FLIGHTSCOPE_SOAP_URL or the real one)")
+    p.add_argument("--no-login", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        from download_all import load_sync_state
+        index = DedupIndex(args.index)
+        index.seed(load_sync_state(args.state))
+        index.save()
+        print(f"Indexed {len(index):,} shots in {len(index.sessions):,} sessions into {args.index}")
+        return
+
+    index = DedupIndex.load(args.index)
+    if not index.loaded:
+        print(f"{args.index} not found (run download_all.py or `dedup_index.py build`)")
+    if args.cmd == "stats":
+        print(f"{len(index):,} ResultIDs in {len(index.sessions):,} sessions, "
+              f"{len(index.swing):,} GolfSwingIDs")
+    elif args.cmd == "reconcile":
+        from fs_client import FlightScopeClient
+        options = {"url": args.url} if args.url else {}
+        client = (FlightScopeClient(**options) if args.no_login
+                  else FlightScopeClient.login(**options))
+        print("\n".join(reconcile(client, index, args.csv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,343 +1,827 @@
 """
 Download all sessions and all shot data from myflightscope.com.
 Saves results to: shots_all.json, shots_all.csv, sessions.json
-"""
-import os, json, time, csv, xml.etree.ElementTree as ET
-from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
-import requests
-
-load_dotenv(os.path.expanduser("~/.config/flightscope/.env"))
-EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
-PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
-
-SOAP_URL = "https://myflightscope.com/wp-content/plugins/fs-soap-frame/public/index.php"
-USER_ID = "573120"
-PLAYER_ID = "573120"
-
-
-# ── Auth ──────────────────────────────────────────────────────────────────────
-
-def get_cookies():
-    """Log in via browser and return session cookies."""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
-        page.click("text=LOGIN", timeout=10000)
-        page.wait_for_selector("input[type='email']", timeout=15000)
-        page.fill("input[type='email']", EMAIL)
-        page.fill("input[type='password']", PASSWORD)
-        page.click("button:has-text('LOG IN')")
-        try:
-            page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
-        except:
-            pass
-        time.sleep(3)
-        cookies = context.cookies()
-        browser.close()
-    return cookies
-
-
-def make_session(cookies_list):
-    """Build a requests.Session with the browser cookies."""
-    s = requests.Session()
-    for c in cookies_list:
-        s.cookies.set(c["name"], c["value"], domain=c.get("domain", ""))
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
-        "Referer": "https://myflightscope.com/",
-        "Origin": "https://myflightscope.com",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "X-Requested-With": "XMLHttpRequest",
-    })
-    return s
-
-
-def api_post(s, params):
-    resp = s.post(SOAP_URL, data=params)
-    resp.raise_for_status()
-    return resp.text
+(or shots_all.ndjson instead of shots_all.json with --stream)
 
+By default only new sessions (and recent sessions whose ResultsRange changed)
+are fetched; everything else is carried over from the previous run using
+sync_state.json. Pass --full to re-download everything.
+"""
+import os, io, json, csv, argparse, itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from fs_client import FlightScopeClient, SOAP_URL
+from cassette import Cassette, CassetteMiss
+from metrics import Metrics, METRICS_FILE
+from profiling import Profiler, PROFILE_DIR
+from ratelimit import TokenBucket
+from resilience import RetryPolicy, RetryError
+from response_cache import ResponseCache, CacheMiss, CACHE_FILE
+from shot_schema import CSV_FIELDS, flatten_rows
+from trajectory_store import TrajectoryStore, TRAJ_FILE
+from shot_db import ShotDB, DB_FILE
+from checkpoint import Journal, JOURNAL_FILE
+from dedup_index import DedupIndex, INDEX_FILE, reconcile
+
+SESSIONS_FILE   = "sessions.json"
+SHOTS_JSON_FILE = "shots_all.json"
+SHOTS_CSV_FILE  = "shots_all.csv"
+SHOTS_NDJSON_FILE = "shots_all.ndjson"
+SYNC_STATE_FILE = "sync_state.json"
+FAILED_FILE     = "failed_shots.json"
+
+# Sessions created within this many days get their ResultsRange re-checked on
+# an incremental run (shots can still be added/removed from a live session).
+RECHECK_DAYS = 7
+
+# Concurrency cap and starting request rate (req/s); the rate adapts at runtime.
+WORKERS = 4
+START_RATE = 4.0
+
+# Shots requested per GetSessionResultData call; bounds per-response memory.
+CHUNK_SIZE = 100
+
+# Session listing: page size, and the first year to search for sessions.
+LIST_PAGE_SIZE = 100
+LIST_FIRST_YEAR = 2012
 
 # ── Session list ──────────────────────────────────────────────────────────────
 
-def get_all_sessions(s):
-    """Fetch all sessions via paginated listSessionsWithScoreForPlayerAndFilter."""
-    all_sessions = []
-    batch = 100
-    start = 0
-    while True:
-        xml_text = api_post(s, {
-            "playerID": PLAYER_ID,
-            "filterApp": "All",
-            "filterStartDate": "2012-01-01",
-            "filterEndDate": "2030-12-31",
-            "startIndex": str(start),
-            "count": str(batch),
-            "method": "listSessionsWithScoreForPlayerAndFilter",
-        })
-        try:
-            root = ET.fromstring(xml_text)
-        except ET.ParseError as e:
-            print(f"  XML parse error at index {start}: {e}")
-            break
-
-        sessions = root.findall("Session")
-        if not sessions:
-            break
-
-        for sess in sessions:
-            all_sessions.append({
-                "sessionID":     sess.findtext("sessionID"),
-                "displayName":   sess.findtext("sessionDisplayName"),
-                "createDate":    sess.findtext("sessionCreateDate"),
-                "appVersion":    sess.findtext("appVersion"),
-                "location":      sess.findtext("sessionLocation") or "",
-                "sessionTypeID": sess.findtext("sessionTypeID"),
-            })
-
-        print(f"  Sessions {start}–{start + len(sessions) - 1} fetched.")
-        if len(sessions) < batch:
-            break
-        start += batch
-        time.sleep(0.5)
-
-    return all_sessions
+def _list_window(client, window, batch=LIST_PAGE_SIZE):
+    """
+    List one date window. Returns (sessions, None) when the window fit in one
+    page, or (sessions, [halves]) when the page was full and the window should
+    be subdivided. A full single-day window is paged with startIndex instead.
+    """
+    lo, hi = window
+    sessions = client.list_sessions(lo.isoformat(), hi.isoformat(), count=batch)
+    if len(sessions) < batch:
+        return sessions, None
+    if (hi - lo).days <= 1:
+        start = batch
+        while True:
+            page = client.list_sessions(lo.isoformat(), hi.isoformat(), start, batch)
+            sessions.extend(page)
+            if len(page) < batch:
+                return sessions, None
+            start += batch
+    mid = lo + (hi - lo) // 2
+    # Halves share their boundary day so nothing is lost whether the API treats
+    # filterEndDate as inclusive or exclusive; duplicates are merged later.
+    return [], [(lo, mid), (mid, hi)]
+
+
+def get_all_sessions(client, pool=None, first_year=LIST_FIRST_YEAR):
+    """
+    Fetch all sessions via listSessionsWithScoreForPlayerAndFilter.
+    The date range is split into one window per year and the windows are
+    listed concurrently on `pool`; any window that returns a full page is
+    split in half and listed again. Results are merged, deduplicated by
+    sessionID and returned newest first.
+    """
+    today = date.today()
+    bounds = [date(y, 1, 1) for y in range(first_year, today.year + 1)] + [date(today.year + 5, 1, 1)]
+    windows = list(zip(bounds[:-1], bounds[1:]))
+    lookup = pool.map if pool else map
+
+    by_id = {}
+    rounds = 0
+    while windows:
+        rounds += 1
+        next_windows = []
+        for sessions, halves in lookup(lambda w: _list_window(client, w), windows):
+            for sess in sessions:
+                by_id[sess["sessionID"]] = sess
+            next_windows.extend(halves or ())
+        print(f"  Listed {len(windows)} date windows (round {rounds}); {len(by_id)} sessions so far.")
+        windows = next_windows
+
+    return sorted(by_id.values(),
+                  key=lambda sess: (sess["createDate"] or "", int(sess["sessionID"] or 0)),
+                  reverse=True)
 
 
 # ── Shot data ─────────────────────────────────────────────────────────────────
 
-def _unwrap_response(text):
-    """Strip the <Response>…</Response> XML wrapper and parse as JSON."""
-    text = text.strip()
-    if text.startswith("<Response>") and text.endswith("</Response>"):
-        return json.loads(text[len("<Response>"):-len("</Response>")])
-    # Sometimes the API returns raw JSON without wrapper
-    return json.loads(text)
+def get_session_result_ids(client, session_id):
+    """Return list of ResultIDs for a session via GetSessionLite."""
+    data = client.get_session_lite(session_id)
+    return [r["ResultID"] for r in data.get("ResultsRange") or []]
 
 
-def get_session_result_ids(s, session_id):
-    """Return list of ResultIDs for a session via GetSessionLite."""
-    text = api_post(s, {
-        "method":    "GetSessionLite",
-        "UserID":    USER_ID,
-        "SessionID": session_id,
-        "ShareID":   "",
-    })
+def _fetch_window(client, session_id, ids):
+    """One GetSessionResultData call for a contiguous window of ResultIDs."""
+    data = client.get_result_data(session_id, ids[0], len(ids))
+    wanted = set(ids)
+    # Only keep shots from this window; the API happily runs past the range.
+    return [shot for shot in data if str(shot.get("ResultID", "")) in wanted]
+
+
+def _fetch_window_split(client, session_id, ids, failed):
+    """
+    Fetch a window; if the call fails or comes back incomplete, split it in
+    half and retry each half, down to single shots. A bad shot therefore costs
+    O(log n) extra calls instead of degrading the whole session to n calls.
+    A window that failed because the service itself kept failing is not
+    split (smaller requests would fail the same way); all its shots are
+    reported as failed instead.
+    """
     try:
-        data = _unwrap_response(text)
-        return [r["ResultID"] for r in data.get("ResultsRange", [])]
+        shots = _fetch_window(client, session_id, ids)
+        if len(shots) >= len(ids):
+            return shots
+        problem = f"{len(ids) - len(shots)} of {len(ids)} shots missing"
+    except RetryError as e:
+        if e.service:
+            print(f"    Session {session_id}: {len(ids)} shots failed: {e}")
+            failed.extend((session_id, rid, str(e)) for rid in ids)
+            return []
+        shots = []
+        problem = str(e)
     except Exception as e:
-        print(f"    GetSessionLite parse error: {e}")
-        return []
+        shots = []
+        problem = str(e)
+
+    if len(ids) == 1:
+        if not shots:
+            print(f"    Shot {ids[0]} error: {problem}")
+            failed.append((session_id, ids[0], problem))
+        return shots
+    mid = len(ids) // 2
+    return (_fetch_window_split(client, session_id, ids[:mid], failed)
+            + _fetch_window_split(client, session_id, ids[mid:], failed))
 
 
-def get_shots_for_session(s, session_id, result_ids):
+def get_shots_for_session(client, session_id, result_ids, chunk_size=CHUNK_SIZE, pool=None,
+                          failed=None):
     """
     Fetch shot data for a session.
-    Tries one bulk call first; falls back to per-ResultID calls if needed.
-    Returns a list of shot dicts.
+    The known ResultsRange is paged in windows of `chunk_size` shots, fetched
+    concurrently on `pool` when given; failing windows are bisected to isolate
+    the bad shots, which are appended to `failed` as (sessionID, ResultID, error).
+    Returns a list of shot dicts in ResultsRange order.
     """
     if not result_ids:
         return []
+    if failed is None:
+        failed = []
+
+    windows = [result_ids[i:i + chunk_size] for i in range(0, len(result_ids), chunk_size)]
+    fetch = lambda ids: _fetch_window_split(client, session_id, ids, failed)
+    results = pool.map(fetch, windows) if pool else map(fetch, windows)
+
+    shots = []
+    for window_shots in results:
+        shots.extend(window_shots)
+    return shots
+
 
-    # Bulk call: start from first ResultID, ask for all of them
+def get_shots_speculative(client, session_id, known_ids, chunk_size=CHUNK_SIZE, pool=None):
+    """
+    Fetch a session's shots without asking GetSessionLite first, from the
+    ResultIDs the last run saw. The known ResultIDs are paged as usual, but
+    the last window asks for one shot more than it knows of, to tell whether
+    the session has grown.
+    Returns (result_ids, shots), or None if the result cannot be shown to be
+    exactly the known shots: a known shot is missing, anything comes back
+    past the last known shot (a new shot, or the API running on into another
+    session; shots do not say which), or a request failed or is not in the
+    response cache / cassette. The caller then falls back to GetSessionLite.
+    """
+    windows = [known_ids[i:i + chunk_size] for i in range(0, len(known_ids), chunk_size)]
+    last = len(windows) - 1
+    fetch = lambda i: client.get_result_data(session_id, windows[i][0],
+                                             len(windows[i]) + (1 if i == last else 0))
     try:
-        text = api_post(s, {
-            "method":            "GetSessionResultData",
-            "UserID":            USER_ID,
-            "SessionID":         session_id,
-            "StartResultID":     result_ids[0],
-            "Limit":             str(len(result_ids) + 10),
-            "ForcedSurfaceType": "",
-            "ShareID":           "",
-        })
-        data = _unwrap_response(text)
-        if isinstance(data, list) and len(data) > 0:
-            return data
-    except Exception as e:
-        print(f"    Bulk GetSessionResultData failed: {e}. Falling back to per-shot calls.")
+        results = list(pool.map(fetch, range(len(windows))) if pool else map(fetch, range(len(windows))))
+    except (RetryError, ValueError, CacheMiss, CassetteMiss):
+        return None
 
-    # Fallback: one call per ResultID
     shots = []
-    for rid in result_ids:
-        try:
-            text = api_post(s, {
-                "method":            "GetSessionResultData",
-                "UserID":            USER_ID,
-                "SessionID":         session_id,
-                "StartResultID":     rid,
-                "Limit":             "1",
-                "ForcedSurfaceType": "",
-                "ShareID":           "",
-            })
-            data = _unwrap_response(text)
-            if isinstance(data, list) and data:
-                shots.append(data[0])
-        except Exception as e:
-            print(f"    Shot {rid} error: {e}")
-        time.sleep(0.1)
+    for i, (ids, data) in enumerate(zip(windows, results)):
+        by_id = {str(shot.get("ResultID", "")): shot for shot in data}
+        if not by_id.keys() >= set(ids):
+            return None
+        if i == last and by_id.keys() - set(ids):
+            return None
+        shots.extend(by_id[rid] for rid in ids)
+    return [str(shot.get("ResultID", "")) for shot in shots], shots
+
+
+def fetch_session(client, session_id, result_ids, chunk_size=CHUNK_SIZE, pool=None, failed=None,
+                  speculate=False, fell_back=None, check=False):
+    """
+    (result_ids, shots) for one session planned by plan_sync(). With
+    `speculate`, try get_shots_speculative() first; if that cannot vouch for
+    its result, the session is appended to `fell_back` and fetched the usual
+    way after a GetSessionLite call (or, if that fails too, from the
+    ResultIDs the last run knew of; the session then stays incomplete).
+    `check` makes that GetSessionLite call without speculating, for sessions
+    planned speculatively by a run that is resumed without speculation.
+    """
+    if failed is None:
+        failed = []
+    if speculate:
+        found = get_shots_speculative(client, session_id, result_ids, chunk_size=chunk_size, pool=pool)
+        if found is not None:
+            return found
+        if fell_back is not None:
+            fell_back.append(session_id)
+        check = True
+    if check:
+        ids, error = _result_ids_or_error(client, session_id)
+        if error is not None:
+            print(f"    Session {session_id}: GetSessionLite failed: {error}")
+            failed.append((session_id, None, error))
+        else:
+            result_ids = ids
+    return result_ids, get_shots_for_session(client, session_id, result_ids, chunk_size=chunk_size,
+                                             pool=pool, failed=failed)
+
+
+# ── Sync state ────────────────────────────────────────────────────────────────
+
+def load_sync_state(path=SYNC_STATE_FILE):
+    """Load the per-session sync state left by the previous run (or an empty one)."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"sessions": {}}
+    state.setdefault("sessions", {})
+    return state
 
-    return shots
 
+def save_sync_state(state, path=SYNC_STATE_FILE):
+    """Write the sync state atomically so a crash never leaves it half-written."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _is_recent(sess, days):
+    try:
+        created = datetime.strptime(sess["createDate"][:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return True
+    return created >= datetime.now() - timedelta(days=days)
+
+
+def _result_ids_or_error(client, sid):
+    try:
+        return get_session_result_ids(client, sid), None
+    except (RetryError, ValueError, CacheMiss, CassetteMiss) as e:
+        return None, str(e)
 
-# ── Flatten ───────────────────────────────────────────────────────────────────
-
-def _p(params, key):
-    """Pull a _PARAMETER_STRING value, return empty string if missing."""
-    return params.get(key + "_PARAMETER_STRING", "") or ""
-
-
-def flatten_shot(shot, sess_info):
-    """Convert a raw shot dict + session info into a flat CSV-ready row."""
-    params  = shot.get("ResultParameters", {}) or {}
-    weather = shot.get("WeatherData", {}) or {}
-    swing   = shot.get("GolfSwingParameters", {}) or {}
-
-    return {
-        # Session
-        "session_id":              sess_info["sessionID"],
-        "session_name":            sess_info["displayName"],
-        "session_date":            sess_info["createDate"],
-        "app_version":             sess_info["appVersion"],
-        "session_location":        sess_info["location"],
-        # Shot identity
-        "result_id":               shot.get("ResultID", ""),
-        "swing_index":             shot.get("SwingIndex", ""),
-        "shot_datetime":           shot.get("ShotDateTime", ""),
-        "club_id":                 shot.get("ClubID", ""),
-        "club_type_id":            shot.get("ClubTypeID", ""),
-        "is_invalid":              shot.get("IsInvalid", ""),
-        "is_deleted":              shot.get("IsDeleted", ""),
-        "result_type":             shot.get("ResultType", ""),
-        # Shot classification
-        "shot_classification":     swing.get("SHOTCLASSIFICATION_PARAMETER_STRING", ""),
-        "detection_mode":          swing.get("DETECTION_MODE_PARAMETER_STRING", ""),
-        "radar_type":              swing.get("RADARCAMERATYPE", ""),
-        "range_ball":              swing.get("RANGEBALL", ""),
-        # Distances
-        "carry_dist_yards":        _p(params, "CARRYDIST"),
-        "total_dist_yards":        _p(params, "TOTALDIST"),
-        "roll_dist_yards":         _p(params, "ROLLDIST"),
-        "lateral_yards":           _p(params, "LATERAL"),
-        "curve_dist_yards":        _p(params, "CURVEDIST"),
-        "height_yards":            _p(params, "HEIGHT"),
-        "flight_time_sec":         _p(params, "FLIGHTTIME"),
-        # Speed & power
-        "ball_speed_ms":           _p(params, "LAUNCHSPEED"),
-        "club_head_speed_ms":      _p(params, "CLUBHEADSPEED"),
-        "club_head_speed_post_ms": _p(params, "CLUBHEADSPEEDPOST"),
-        "smash_factor":            _p(params, "SMASH"),
-        # Launch
-        "launch_angle_deg":        _p(params, "LAUNCHELEV"),
-        "launch_direction_deg":    _p(params, "LAUNCHAZIM"),
-        # Spin
-        "backspin_rpm":            _p(params, "BACKSPIN"),
-        "sidespin_rpm":            _p(params, "SIDESPIN"),
-        "total_spin_rpm":          _p(params, "SPIN"),
-        "spin_is_estimate":        params.get("SPIN_IS_ESTIMATE", ""),
-        "spin_axis_deg":           _p(params, "SPINAXIS"),
-        "spin_loft_deg":           _p(params, "SPINLOFT"),
-        # Club / impact
-        "face_angle_deg":          _p(params, "CLUBFACEANGLE"),
-        "face_to_path_deg":        _p(params, "FACETOPATH"),
-        "effective_loft_deg":      _p(params, "EFFECTIVELOFT"),
-        "swing_plane_tilt_deg":    _p(params, "SWINGPLANETILT"),
-        "swing_plane_rotation_deg":_p(params, "SWINGPLANEROTATION"),
-        "club_strike_dir_deg":     _p(params, "CLUBSTRIKEDIR"),
-        "club_strike_dir_vert_deg":_p(params, "CLUBSTRIKEDIRVERT"),
-        "impact_elev_deg":         _p(params, "IMPACTELEV"),
-        "fusion_impact_lateral":   params.get("FusionImpactLocationLateral", ""),
-        "fusion_impact_vertical":  params.get("FusionImpactLocationVertical", ""),
-        "club_low_point":          params.get("CLUB_LOW_POINT", ""),
-        # Weather
-        "weather_temperature_c":   weather.get("WEATHER_TEMPERATURE", ""),
-        "weather_humidity_pct":    weather.get("WEATHER_HUMIDITY", ""),
-        "weather_pressure_atm":    weather.get("WEATHER_PRESSURE", ""),
-        "weather_wind_speed_ms":   weather.get("WEATHER_WIND_SPEED", ""),
-        "weather_wind_dir_deg":    weather.get("WEATHER_WIND_DIRECTION_ANGLE", ""),
-        "gps_latitude":            weather.get("LATITUDE", ""),
-        "gps_longitude":           weather.get("LONGITUDE", ""),
-        "altitude_m":              weather.get("ALTITUDE", ""),
-    }
+
+def plan_sync(client, sessions, state, full=False, recheck_days=RECHECK_DAYS, pool=None, failed=None,
+              speculative=None):
+    """
+    Decide which sessions need their shots (re)downloaded.
+    Returns {sessionID: result_ids} for sessions to fetch. Sessions already in
+    the state are only re-checked (one GetSessionLite call) if they are recent
+    or some of their shots could not be fetched last time. A session whose
+    check fails is kept as it was, or fetched as empty if it is new, and
+    reported in `failed` as (sessionID, None, error) so the next run retries it.
+    When `speculative` is a set, known sessions that are downloaded again
+    regardless (--full, or incomplete last time) skip the check: they are
+    returned with their previous ResultIDs and added to `speculative`, for
+    get_shots_speculative().
+    """
+    if failed is None:
+        failed = []
+    known = state["sessions"]
+    check = [sess["sessionID"] for sess in sessions
+             if full or sess["sessionID"] not in known or _is_recent(sess, recheck_days)
+             or known[sess["sessionID"]].get("incomplete")]
+    if speculative is not None:
+        guess = [sid for sid in check if known.get(sid, {}).get("result_ids")
+                 and (full or known[sid].get("incomplete"))]
+        speculative.update(guess)
+        check = [sid for sid in check if sid not in speculative]
+    lookup = pool.map if pool else map
+    to_fetch = {sid: known[sid]["result_ids"] for sid in speculative or ()}
+    for sid, (result_ids, error) in zip(check, lookup(lambda sid: _result_ids_or_error(client, sid), check)):
+        prev = known.get(sid)
+        if error is not None:
+            print(f"    Session {sid}: GetSessionLite failed: {error}")
+            failed.append((sid, None, error))
+            if prev is None or full:
+                to_fetch[sid] = []
+            continue
+        if (prev is not None and not full and not prev.get("incomplete")
+                and set(result_ids) == set(prev["result_ids"])):
+            continue
+        to_fetch[sid] = result_ids
+    return to_fetch
+
+
+def _ordered_map(pool, fn, items, window):
+    """Like pool.map, but keeps at most `window` results running or buffered."""
+    items = iter(items)
+    pending = deque(pool.submit(fn, item) for item in itertools.islice(items, window))
+    while pending:
+        fut = pending.popleft()
+        for item in itertools.islice(items, 1):
+            pending.append(pool.submit(fn, item))
+        yield fut.result()
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+
+def load_previous_shots(state, keep_sids, path=SHOTS_JSON_FILE):
+    """Return {sessionID: [raw shots]} from the previous shots_all.json for kept sessions."""
+    if not keep_sids:
+        return {}
+    owner = {}
+    for sid in keep_sids:
+        for rid in state["sessions"][sid]["shot_ids"]:
+            owner[rid] = sid
+    by_session = {sid: [] for sid in keep_sids}
+    with open(path) as f:
+        for shot in json.load(f):
+            sid = owner.get(str(shot.get("ResultID", "")))
+            if sid is not None:
+                by_session[sid].append(shot)
+    return by_session
+
+
+class JsonOutput:
+    """Collect every shot in memory and write shots_all.json/.csv at the end."""
+    name = "json"
+
+    def __init__(self, state, keep_sids):
+        self.previous = load_previous_shots(state, keep_sids)
+        self.raw  = []
+        self.flat = []
+
+    def add_session(self, sess, shots, rows):
+        self.raw.extend(shots)
+        self.flat.extend(rows)
+        return {"shot_ids": [str(shot.get("ResultID", "")) for shot in shots]}
+
+    def keep_session(self, sess, entry):
+        shots = self.previous.pop(sess["sessionID"])
+        return self.add_session(sess, shots, flatten_rows(shots, sess))
+
+    def sizes(self):
+        return {}
+
+    def finish(self):
+        with open(SHOTS_JSON_FILE, "w") as f:
+            json.dump(self.raw, f, indent=2)
+        print(f"      Saved {SHOTS_JSON_FILE}")
+
+        if self.flat:
+            with open(SHOTS_CSV_FILE, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_FIELDS)
+                writer.writerows(self.flat)
+            print(f"      Saved {SHOTS_CSV_FILE}")
+
+
+class StreamOutput:
+    """
+    Write each session's shots to shots_all.ndjson (one shot per line) and
+    shots_all.csv as soon as it arrives, fsync'ing at every session boundary.
+    Memory stays flat: only one session is ever held. Files are written as
+    *.partial and renamed into place by finish(); the byte span of every
+    session is recorded so unchanged sessions can be copied verbatim next run.
+    """
+    name = "ndjson"
+
+    def __init__(self, ndjson_path=SHOTS_NDJSON_FILE, csv_path=SHOTS_CSV_FILE, resume_sizes=None):
+        """resume_sizes (from sizes()) reopens the .partial files of an interrupted run."""
+        self.paths = (ndjson_path, csv_path)
+        self._prev = None
+        if resume_sizes is None:
+            self.ndjson = open(ndjson_path + ".partial", "wb")
+            self.csv = open(csv_path + ".partial", "wb")
+            self._write(self.csv, self._csv_bytes([CSV_FIELDS]))
+            return
+        self.ndjson = open(ndjson_path + ".partial", "r+b")
+        self.csv = open(csv_path + ".partial", "r+b")
+        for f, key in ((self.ndjson, "ndjson"), (self.csv, "csv")):
+            f.truncate(resume_sizes[key])
+            f.seek(0, os.SEEK_END)
+
+    def sizes(self):
+        return {"ndjson": self.ndjson.tell(), "csv": self.csv.tell()}
+
+    @staticmethod
+    def _csv_bytes(rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode()
+
+    @staticmethod
+    def _write(f, data):
+        start = f.tell()
+        f.write(data)
+        return [start, len(data)]
+
+    def _commit(self):
+        for f in (self.ndjson, self.csv):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add_session(self, sess, shots, rows):
+        lines = b"".join(json.dumps(shot, separators=(",", ":")).encode() + b"\n" for shot in shots)
+        rows = self._csv_bytes(rows)
+        spans = {
+            "shot_ids":    [str(shot.get("ResultID", "")) for shot in shots],
+            "ndjson_span": self._write(self.ndjson, lines),
+            "csv_span":    self._write(self.csv, rows),
+        }
+        self._commit()
+        return spans
+
+    def keep_session(self, sess, entry):
+        if self._prev is None:
+            self._prev = tuple(open(p, "rb") for p in self.paths)
+        spans = {"shot_ids": entry["shot_ids"]}
+        for key, src, dst in zip(("ndjson_span", "csv_span"), self._prev, (self.ndjson, self.csv)):
+            start, length = entry[key]
+            src.seek(start)
+            spans[key] = [dst.tell(), length]
+            while length:
+                chunk = src.read(min(length, 1 << 20))
+                dst.write(chunk)
+                length -= len(chunk)
+        self._commit()
+        return spans
+
+    def finish(self):
+        for f in (self.ndjson, self.csv) + (self._prev or ()):
+            f.close()
+        for path in self.paths:
+            os.replace(path + ".partial", path)
+            print(f"      Saved {path}")
+
+
+def iter_ndjson(path=SHOTS_NDJSON_FILE):
+    """Yield raw shots one at a time from a shots_all.ndjson file."""
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download all FlightScope sessions and shots.")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore sync_state.json and re-download every session")
+    parser.add_argument("--recheck-days", type=int, default=RECHECK_DAYS,
+                        help="re-check ResultsRange of sessions created in the last N days "
+                             f"(default {RECHECK_DAYS})")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"max sessions fetched in parallel (default {WORKERS})")
+    parser.add_argument("--rate", type=float, default=START_RATE,
+                        help=f"starting request rate in req/s; adapts to 429/5xx (default {START_RATE})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"shots per GetSessionResultData request (default {CHUNK_SIZE})")
+    parser.add_argument("--stream", action="store_true",
+                        help=f"write {SHOTS_NDJSON_FILE} and {SHOTS_CSV_FILE} incrementally "
+                             "with flat memory use")
+    parser.add_argument("--columns", action="store_true",
+                        help=f"also build the typed column store from {SHOTS_CSV_FILE} (needs numpy)")
+    parser.add_argument("--split-trajectories", action="store_true",
+                        help=f"move each shot's RollModel into {TRAJ_FILE} instead of the raw shot output")
+    parser.add_argument("--db", action="store_true",
+                        help=f"keep the indexed SQLite shot database ({DB_FILE}) up to date")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"don't read or write the response cache ({CACHE_FILE})")
+    parser.add_argument("--offline", action="store_true",
+                        help="answer every request from the response cache; no login, no network")
+    parser.add_argument("--cache-size", type=int, default=512,
+                        help="response cache size limit in MB (default 512)")
+    parser.add_argument("--retries", type=int, default=RetryPolicy().attempts,
+                        help="attempts per request on network errors and 429/5xx "
+                             f"(default {RetryPolicy().attempts})")
+    parser.add_argument("--url", default=SOAP_URL,
+                        help="SOAP endpoint (default: FLIGHTSCOPE_SOAP_URL or myflightscope.com)")
+    parser.add_argument("--no-login", action="store_true",
+                        help="send requests without logging in (for a local fake_server.py)")
+    parser.add_argument("--record", metavar="CASSETTE",
+                        help="record every request/response in full to this cassette file")
+    parser.add_argument("--replay", metavar="CASSETTE",
+                        help="answer every request from a recorded cassette; no login, no network")
+    parser.add_argument("--metrics", default=METRICS_FILE, metavar="FILE",
+                        help=f"write run metrics (latency percentiles, stage timings) as JSON "
+                             f"(default {METRICS_FILE})")
+    parser.add_argument("--prometheus", metavar="FILE",
+                        help="also write the run metrics as a Prometheus textfile")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                        help="profile every stage with cProfile and tracemalloc, writing "
+                             f"<stage>.pstats and allocations.txt to DIR (default {PROFILE_DIR}/)")
+    parser.add_argument("--no-speculate", action="store_true",
+                        help="always ask GetSessionLite for a session's ResultIDs before fetching "
+                             "its shots, even when the last run's are known")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="compare local shot counts with getTotalStatsForPlayer at the end")
+    parser.add_argument("--restart", action="store_true",
+                        help=f"discard the checkpoint of an interrupted run ({JOURNAL_FILE}) "
+                             "instead of resuming it")
+    args = parser.parse_args(argv)
+    workers = max(args.workers, 1)
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the response cache")
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+
+    cache = None if args.no_cache else ResponseCache(max_bytes=args.cache_size << 20)
+
     print("=" * 60)
     print("  FlightScope Full Data Download")
     print("=" * 60)
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile)
+        print(f"  Profiling every stage into {args.profile}/ (slower than a normal run)")
+    metrics = Metrics(profiler)
+
+    state = load_sync_state()
+    output_name = "ndjson" if args.stream else "json"
+    previous_files = ((SHOTS_NDJSON_FILE, SHOTS_CSV_FILE) if args.stream else (SHOTS_JSON_FILE,))
+    if args.split_trajectories:
+        previous_files += (TRAJ_FILE,)
+    full = (args.full or not state["sessions"] or state.get("output", "json") != output_name
+            or state.get("split_trajectories", False) != args.split_trajectories
+            or not all(os.path.exists(p) for p in previous_files))
+
+    # An interrupted run left its journal behind: resume it with the same
+    # session list and plan, skipping every session it already completed.
+    journal = Journal()
+    header, done_entries = (None, []) if args.restart else journal.load()
+    if header is not None and (header["output"] != output_name
+                               or header["split_trajectories"] != args.split_trajectories):
+        print(f"\n      Ignoring {JOURNAL_FILE}: it was written with different output options.")
+        header, done_entries = None, []
+    resuming = header is not None
+    if resuming:
+        full = header["full"]
+        print(f"\n      Mode: resuming interrupted {'full download' if full else 'incremental sync'}"
+              f" ({len(done_entries)} sessions already done)")
+    else:
+        print(f"\n      Mode: {'full download' if full else 'incremental sync'}")
 
     # Step 1: Login
-    print("\n[1/4] Logging in...")
-    cookies = get_cookies()
-    s = make_session(cookies)
+    skip_login = args.offline or args.no_login or args.replay
+    print("\n[1/4] Login skipped." if skip_login else "\n[1/4] Logging in...")
+    cassette = Cassette(args.record or args.replay) if args.record or args.replay else None
+    client_options = dict(workers=workers, limiter=TokenBucket(rate=args.rate, burst=workers),
+                          retry=RetryPolicy(attempts=max(args.retries, 1)),
+                          cache=cache, offline=args.offline, url=args.url,
+                          recorder=cassette if args.record else None,
+                          replay=cassette if args.replay else None, profiler=profiler)
+    with metrics.stage("login"):
+        client = (FlightScopeClient(**client_options) if skip_login
+                  else FlightScopeClient.login(**client_options))
+    pool = ThreadPoolExecutor(max_workers=workers)
     print("      Done.\n")
 
     # Step 2: All sessions
-    print("[2/4] Fetching all sessions...")
-    sessions = get_all_sessions(s)
+    if resuming:
+        print("[2/4] Using the session list of the interrupted run...")
+        sessions = header["sessions"]
+    else:
+        print("[2/4] Fetching all sessions...")
+        with metrics.stage("list") as listed:
+            sessions = get_all_sessions(client, pool=pool)
+            listed["items"] = len(sessions)
     print(f"      {len(sessions)} sessions found.\n")
 
-    with open("sessions.json", "w") as f:
+    with open(SESSIONS_FILE, "w") as f:
         json.dump(sessions, f, indent=2)
-    print("      Saved sessions.json\n")
+    print(f"      Saved {SESSIONS_FILE}\n")
+
+    db = ShotDB() if args.db else None
+    if db is not None:
+        db.upsert_sessions(sessions)
 
     # Step 3: All shots
-    print("[3/4] Fetching shot data for every session...")
-    all_shots_raw  = []
-    all_shots_flat = []
+    print(f"[3/4] Fetching shot data for new/changed sessions ({workers} workers)...")
+    # Session tasks only coordinate; every shot-data request runs on chunk_pool,
+    # so at most `workers` requests are in flight.
+    chunk_pool = ThreadPoolExecutor(max_workers=workers)
+    failed = []
+    # Cached and recorded responses only cover the plain GetSessionResultData
+    # windows, never the speculative ones.
+    speculate = not (args.no_speculate or args.offline or args.replay)
+    speculative = set() if speculate else None
+    if resuming:
+        to_fetch = header["to_fetch"]
+        # Sessions the interrupted run planned speculatively; without
+        # speculation now, they get their GetSessionLite check when fetched.
+        speculative = set(header.get("speculative", ()))
+    else:
+        with metrics.stage("lite", items=len(sessions)):
+            to_fetch = plan_sync(client, sessions, state, full=full,
+                                 recheck_days=args.recheck_days, pool=pool, failed=failed,
+                                 speculative=speculative)
+    keep_sids = [sess["sessionID"] for sess in sessions if sess["sessionID"] not in to_fetch]
+    done = {e["sid"]: e for e in done_entries}
+    # A full download rebuilds the index along with the outputs; otherwise the
+    # saved one covers every kept session (seeded from the sync state if missing).
+    dedup = DedupIndex() if full else DedupIndex.load()
+    if not full and not dedup.loaded:
+        dedup.seed(state)
+    dedup.release_all(to_fetch)
+    checkpoint = done_entries[-1]["sizes"] if done_entries else (header or {}).get("sizes")
+
+    if args.stream:
+        output = StreamOutput(resume_sizes=checkpoint)
+    else:
+        with metrics.stage("load_previous"):
+            output = JsonOutput(state, keep_sids)
+    trajectories = None
+    if args.split_trajectories:
+        trajectories = TrajectoryStore().open(truncate=full and not resuming,
+                                              sizes=checkpoint.get("traj") if resuming else None)
+
+    def sizes():
+        sizes = output.sizes()
+        if trajectories is not None:
+            sizes["traj"] = trajectories.sizes()
+        return sizes
+
+    if resuming:
+        journal.reopen(done_entries)
+    else:
+        journal.start({"output": output_name, "split_trajectories": args.split_trajectories,
+                       "full": full, "sessions": sessions, "to_fetch": to_fetch,
+                       "speculative": sorted(speculative or ()), "sizes": sizes()})
+    print(f"      {len(to_fetch)} to fetch, {len(keep_sids)} unchanged.\n")
+
+    # Sessions are fetched concurrently but consumed in listing order, so the
+    # output files are identical to a serial run.
+    fetch_sids = [sess["sessionID"] for sess in sessions
+                  if sess["sessionID"] in to_fetch and sess["sessionID"] not in done]
+    fell_back = []
+
+    def fetch(sid):
+        return fetch_session(client, sid, to_fetch[sid], chunk_size=args.chunk_size, pool=chunk_pool,
+                             failed=failed, speculate=speculate and sid in (speculative or ()),
+                             fell_back=fell_back, check=not speculate and sid in (speculative or ()))
+    if profiler is not None:
+        fetch = profiler.wrap("fetch", fetch)
+    fetched_shots = _ordered_map(pool, fetch, fetch_sids, window=2 * workers)
+
+    new_state = {"output": output.name, "split_trajectories": args.split_trajectories,
+                 "sessions": {}}
+    total_shots = 0
     skipped = 0
+    fetched = 0
 
     for i, sess in enumerate(sessions):
         sid  = sess["sessionID"]
         name = sess["displayName"]
-        date = sess["createDate"][:10]
-        print(f"  [{i+1:>3}/{len(sessions)}] {sid}  {date}  {name}")
-
-        result_ids = get_session_result_ids(s, sid)
-        if not result_ids:
-            print(f"           → 0 results, skipping.")
+        day  = sess["createDate"][:10]
+        shots = None
+
+        if sid in done:
+            # Completed before the interruption. Stream outputs already hold it
+            # on disk; the in-memory JSON output needs its shots back.
+            sess_state = done[sid]["state"]
+            dedup.assign(sid, sess_state["shot_ids"])
+            if output.name == "json":
+                with metrics.stage("write"):
+                    if sid in to_fetch:
+                        shots = done[sid]["shots"]
+                        output.add_session(sess, shots, flatten_rows(shots, sess))
+                    else:
+                        output.keep_session(sess, state["sessions"][sid])
+        else:
+            if sid in to_fetch:
+                print(f"  [{i+1:>3}/{len(sessions)}] {sid}  {day}  {name}")
+                with metrics.stage("result_data") as waited:
+                    result_ids, shots = next(fetched_shots)
+                    waited["items"] = len(shots)
+                fetched += 1
+                n_dropped = len(dedup.dropped)
+                shots = dedup.claim(sid, shots)
+                n_dropped = len(dedup.dropped) - n_dropped
+                dups = f" ({n_dropped} duplicates dropped)" if n_dropped else ""
+                if not shots:
+                    print(f"           → 0 {'shots returned' if result_ids else 'results'}{dups}, skipping.")
+                else:
+                    print(f"           → {len(shots)} shots ✓{dups}")
+                with metrics.stage("flatten", items=len(shots)):
+                    if trajectories is not None:
+                        for shot in shots:
+                            trajectories.split_shot(shot)
+                    rows = flatten_rows(shots, sess)
+                with metrics.stage("write", items=len(shots)):
+                    if trajectories is not None:
+                        trajectories.commit()
+                    entry = output.add_session(sess, shots, rows)
+                    if db is not None:
+                        db.replace_session_shots(sid, rows)
+            else:
+                result_ids = state["sessions"][sid]["result_ids"]
+                with metrics.stage("write"):
+                    entry = output.keep_session(sess, state["sessions"][sid])
+
+            sess_state = {"result_ids": result_ids, **entry}
+            if any(f_sid == sid for f_sid, _, _ in failed):
+                sess_state["incomplete"] = True
+            if output.name == "json" and sid in to_fetch:
+                journal.record(sid, state=sess_state, sizes=sizes(), shots=shots)
+            else:
+                journal.record(sid, state=sess_state, sizes=sizes())
+
+        new_state["sessions"][sid] = sess_state
+        total_shots += len(sess_state["shot_ids"])
+        if not sess_state["shot_ids"]:
             skipped += 1
-            time.sleep(0.2)
-            continue
 
-        shots = get_shots_for_session(s, sid, result_ids)
-        if not shots:
-            print(f"           → 0 shots returned, skipping.")
-            skipped += 1
-            time.sleep(0.2)
-            continue
-
-        print(f"           → {len(shots)} shots ✓")
-        for shot in shots:
-            all_shots_raw.append(shot)
-            all_shots_flat.append(flatten_shot(shot, sess))
-
-        time.sleep(0.3)
-
-    print(f"\n      Total shots: {len(all_shots_raw)}  |  Sessions skipped: {skipped}\n")
+    pool.shutdown()
+    chunk_pool.shutdown()
+    print(f"\n      Sessions fetched: {fetched}  |  Total shots: {total_shots}"
+          f"  |  Sessions without shots: {skipped}")
+    guessed = sum(1 for sid in fetch_sids if sid in (speculative or ())) if speculate else 0
+    if guessed:
+        print(f"      {guessed - len(fell_back)} of {guessed} known sessions "
+              f"fetched without GetSessionLite")
+    print(f"      Requests: {client.stats.summary()}")
+    print(f"      Retries: {client.retry.summary()}, circuit breaker opened {client.breaker.trips}x")
+    if dedup.dropped:
+        print(f"      {len(dedup.dropped)} duplicate shots dropped: "
+              + ", ".join(f"{sid}/{rid}" for sid, rid, _ in dedup.dropped[:10])
+              + (" ..." if len(dedup.dropped) > 10 else ""))
+    if failed:
+        print(f"      {len(failed)} shots/sessions could not be fetched: "
+              + ", ".join(f"{sid}/{rid or '*'}" for sid, rid, _ in failed[:10])
+              + (" ..." if len(failed) > 10 else ""))
+        print(f"      They are listed in {FAILED_FILE} and retried on the next run.")
+    print()
 
     # Step 4: Save
     print("[4/4] Saving output files...")
-
-    with open("shots_all.json", "w") as f:
-        json.dump(all_shots_raw, f, indent=2)
-    print("      Saved shots_all.json")
-
-    if all_shots_flat:
-        fieldnames = list(all_shots_flat[0].keys())
-        with open("shots_all.csv", "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_shots_flat)
-        print("      Saved shots_all.csv")
+    if failed:
+        with open(FAILED_FILE, "w") as f:
+            json.dump([{"session_id": sid, "result_id": rid, "error": error}
+                       for sid, rid, error in failed], f, indent=2)
+        print(f"      Saved {FAILED_FILE}")
+    elif os.path.exists(FAILED_FILE):
+        os.remove(FAILED_FILE)
+    with metrics.stage("save"):
+        output.finish()
+        if trajectories is not None:
+            trajectories.close()
+            print(f"      Saved {TRAJ_FILE}")
+        if db is not None:
+            # Unchanged sessions only need loading if the database is new to them.
+            current = {sess["sessionID"] for sess in sessions}
+            missing = current - db.loaded_sessions()
+            if missing:
+                db.ingest_csv(SHOTS_CSV_FILE, only_sessions=missing)
+            db.prune_sessions(current)
+            db.close()
+            print(f"      Updated {DB_FILE}")
+        if args.columns:
+            import columnar
+            schema = columnar.build_from_csv(SHOTS_CSV_FILE, columnar.COLUMNS_DIR)
+            print(f"      Saved {columnar.COLUMNS_DIR}/ ({len(schema['columns'])} typed columns)")
+
+    # Only record the new state once the outputs it describes are on disk.
+    dedup.retain(sess["sessionID"] for sess in sessions)
+    dedup.save()
+    print(f"      Saved {INDEX_FILE}")
+    save_sync_state(new_state)
+    journal.finish()
+    print(f"      Saved {SYNC_STATE_FILE}")
+
+    if args.reconcile:
+        print("\n      Reconciliation:")
+        print("\n".join(reconcile(client, dedup, SHOTS_CSV_FILE)))
+
+    if cache is not None:
+        print(f"      Response cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+    if cassette is not None:
+        if args.record:
+            print(f"      Recorded {args.record}")
+        cassette.close()
+
+    print(metrics.report())
+    metrics.write_json(args.metrics, client)
+    print(f"      Saved {args.metrics}")
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus, client)
+        print(f"      Saved {args.prometheus}")
+    if profiler is not None:
+        profiler.close()
+        stages = profiler.write()
+        print(f"      Saved {args.profile}/ ({', '.join(stages)})")
 
     print("\n" + "=" * 60)
-    print(f"  Done! {len(all_shots_raw)} shots across {len(sessions) - skipped} sessions.")
+    print(f"  Done! {total_shots} shots across {len(sessions) - skipped} sessions.")
     print("=" * 60)
 
 
@@ -0,0 +1,333 @@
+"""
+Download the sessions and shots of many players in one job.
+
+Logins come from accounts.json (fs_auth.load_accounts(); without it, the .env
+login and its own player). All accounts log in concurrently, each with its own
+cookie cache, and every player gets a partition with the outputs of
+download_all.py --stream:
+
+    players/<playerID>/sessions.json, shots_all.ndjson, shots_all.csv,
+                       sync_state.json, dedup_index.bin
+
+Each partition is synced incrementally on its own, but the session fetches of
+all players go through one scheduler: fair_order() interleaves them by the
+shots each player has been given so far, over one worker pool and one shared
+TokenBucket. A player with 500 sessions does not hold up one with 5, and the
+site sees the request rate of a single job.
+
+A player whose session list or sync plan cannot be fetched is reported and
+left out; the others carry on. Every partition keeps its own checkpoint
+journal (checkpoint.py), so an interrupted job resumes each player from the
+last session it wrote.
+
+Usage:
+    python download_players.py [--accounts FILE] [--players 573120,573121] [--full]
+    python fake_server.py --players 12 --port 8099 &
+    python download_players.py --url http://127.0.0.1:8099/ --no-login --accounts test_accounts.json
+"""
+import os, json, time, heapq, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import fs_auth
+from fs_client import FlightScopeClient, SOAP_URL
+from ratelimit import TokenBucket
+from resilience import RetryPolicy
+from response_cache import ResponseCache
+from shot_schema import flatten_rows
+from dedup_index import DedupIndex, INDEX_FILE
+from checkpoint import Journal, JOURNAL_FILE
+from download_all import (get_all_sessions, plan_sync, fetch_session, load_sync_state,
+                          save_sync_state, _ordered_map, StreamOutput, RECHECK_DAYS, CHUNK_SIZE,
+                          SESSIONS_FILE, SHOTS_NDJSON_FILE, SHOTS_CSV_FILE, SYNC_STATE_FILE)
+
+PLAYERS_DIR = "players"
+WORKERS = 8
+START_RATE = 8.0
+# Browser logins are heavy; this many run at once.
+LOGIN_WORKERS = 4
+
+
+class Player:
+    """One player's partition: its client, files, sync plan and progress."""
+
+    def __init__(self, player_id, account, client, root=PLAYERS_DIR):
+        self.id = player_id
+        self.account = account
+        self.client = client
+        self.dir = os.path.join(root, player_id)
+        self.state = {"sessions": {}}
+        self.full = True
+        self.sessions = []
+        self.to_fetch = {}
+        self.speculative = set()
+        self.failed = []
+        self.fell_back = []
+        self.shots = 0
+        self.fetched = 0
+        self.journal = Journal(self.path(JOURNAL_FILE))
+        self.resuming = False
+        self.done = {}              # sessionID -> journal entry of an interrupted run
+        self.checkpoint = None      # output sizes to resume from
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+
+def login_all(accounts, skip_login=False, url=SOAP_URL):
+    """
+    {account name: cookies} for every account that could log in, logging in
+    LOGIN_WORKERS at a time (cached cookies are checked against `url`).
+    Accounts that fail are reported and left out.
+    """
+    def login(account):
+        return () if skip_login else fs_auth.get_cookies(account=account, url=url)
+
+    cookies = {}
+    with ThreadPoolExecutor(max_workers=LOGIN_WORKERS) as logins:
+        futures = {account.name: logins.submit(login, account) for account in accounts}
+        for name, fut in futures.items():
+            try:
+                cookies[name] = fut.result()
+            except Exception as e:
+                print(f"      {name}: login failed: {e}")
+    return cookies
+
+
+def fair_order(players):
+    """
+    Every (player, sessionID) to fetch, each player's in listing order, with
+    players interleaved so that the one given the fewest shots so far (by
+    planned ResultIDs; an empty session counts as one) always goes next.
+    """
+    queues = [(p, [sess["sessionID"] for sess in p.sessions
+                   if sess["sessionID"] in p.to_fetch and sess["sessionID"] not in p.done])
+              for p in players]
+    heap = [(0, i, 0) for i, (_, sids) in enumerate(queues) if sids]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        given, i, k = heapq.heappop(heap)
+        player, sids = queues[i]
+        sid = sids[k]
+        order.append((player, sid))
+        if k + 1 < len(sids):
+            heapq.heappush(heap, (given + max(len(player.to_fetch[sid]), 1), i, k + 1))
+    return order
+
+
+class Partition:
+    """
+    Writes one player's outputs as its sessions come in, in listing order,
+    journalling each session so an interrupted job can resume it.
+    """
+
+    def __init__(self, player, full):
+        self.player = player
+        self.output = StreamOutput(player.path(SHOTS_NDJSON_FILE), player.path(SHOTS_CSV_FILE),
+                                   resume_sizes=player.checkpoint)
+        self.dedup = DedupIndex(player.path(INDEX_FILE)) if full else \
+            DedupIndex.load(player.path(INDEX_FILE))
+        if not full and not self.dedup.loaded:
+            self.dedup.seed(player.state)
+        self.dedup.release_all(player.to_fetch)
+        self.new_state = {"output": self.output.name, "split_trajectories": False, "sessions": {}}
+        self._next = 0
+        journal = player.journal
+        if player.resuming:
+            # Sessions are journalled in listing order, so the done ones come first.
+            journal.reopen(list(player.done.values()))
+            for sess in player.sessions[:len(player.done)]:
+                sess_state = player.done[sess["sessionID"]]["state"]
+                self.dedup.assign(sess["sessionID"], sess_state["shot_ids"])
+                self.new_state["sessions"][sess["sessionID"]] = sess_state
+                player.shots += len(sess_state["shot_ids"])
+            self._next = len(player.done)
+        else:
+            journal.start({"full": full, "sessions": player.sessions, "to_fetch": player.to_fetch,
+                           "speculative": sorted(player.speculative), "sizes": self.output.sizes()})
+
+    def _keep_until(self, sid=None):
+        """Copy over the unchanged sessions listed before `sid` (all remaining if None)."""
+        sessions = self.player.sessions
+        while self._next < len(sessions) and sessions[self._next]["sessionID"] != sid:
+            sess = sessions[self._next]
+            entry = self.player.state["sessions"][sess["sessionID"]]
+            self._record(sess, entry["result_ids"], self.output.keep_session(sess, entry))
+            self._next += 1
+
+    def add(self, sid, result_ids, shots):
+        self._keep_until(sid)
+        sess = self.player.sessions[self._next]
+        shots = self.dedup.claim(sid, shots)
+        self._record(sess, result_ids, self.output.add_session(sess, shots, flatten_rows(shots, sess)))
+        self._next += 1
+        self.player.fetched += 1
+        return len(shots)
+
+    def _record(self, sess, result_ids, entry):
+        sid = sess["sessionID"]
+        sess_state = {"result_ids": result_ids, **entry}
+        if any(f_sid == sid for f_sid, _, _ in self.player.failed):
+            sess_state["incomplete"] = True
+        self.player.journal.record(sid, state=sess_state, sizes=self.output.sizes())
+        self.new_state["sessions"][sid] = sess_state
+        self.player.shots += len(entry["shot_ids"])
+
+    def finish(self):
+        self._keep_until()
+        self.output.finish()
+        self.dedup.retain(sess["sessionID"] for sess in self.player.sessions)
+        self.dedup.save()
+        save_sync_state(self.new_state, self.player.path(SYNC_STATE_FILE))
+        self.player.journal.finish()
+
+
+def _is_full(player, forced):
+    state = player.state
+    files = (player.path(SHOTS_NDJSON_FILE), player.path(SHOTS_CSV_FILE))
+    return (forced or not state["sessions"] or state.get("output") != "ndjson"
+            or state.get("split_trajectories", False) or not all(map(os.path.exists, files)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the shots of many players in one job.")
+    parser.add_argument("--accounts", default=fs_auth.ACCOUNTS_FILE,
+                        help="accounts JSON (default: %(default)s; without it, the .env login)")
+    parser.add_argument("--players", help="comma-separated player IDs to sync (default: all)")
+    parser.add_argument("--out", default=PLAYERS_DIR, help="partition root (default: %(default)s/)")
+    parser.add_argument("--full", action="store_true", help="re-download every player's sessions")
+    parser.add_argument("--recheck-days", type=int, default=RECHECK_DAYS)
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"concurrent requests across all players (default {WORKERS})")
+    parser.add_argument("--rate", type=float, default=START_RATE,
+                        help=f"starting request rate shared by all players (default {START_RATE}/s)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--no-speculate", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--url", default=SOAP_URL)
+    parser.add_argument("--no-login", action="store_true")
+    args = parser.parse_args(argv)
+    workers = max(args.workers, 1)
+    t0 = time.perf_counter()
+
+    accounts = (fs_auth.load_accounts(args.accounts) if os.path.exists(args.accounts)
+                else [fs_auth.DEFAULT_ACCOUNT])
+    wanted = set(args.players.split(",")) if args.players else None
+
+    print("=" * 60)
+    print("  FlightScope Multi-Player Download")
+    print("=" * 60)
+
+    # Step 1: Logins
+    print(f"\n[1/4] {'Login skipped' if args.no_login else 'Logging in'} "
+          f"({len(accounts)} accounts)...")
+    cache = None if args.no_cache else ResponseCache()
+    shared = dict(workers=workers, limiter=TokenBucket(rate=args.rate, burst=workers),
+                  retry=RetryPolicy(), cache=cache, url=args.url)
+    cookies = login_all(accounts, skip_login=args.no_login, url=args.url)
+    players, seen = [], set()
+    for account in accounts:
+        if account.name not in cookies:
+            continue
+        for pid in account.players:
+            if pid in seen or (wanted is not None and pid not in wanted):
+                continue
+            seen.add(pid)
+            client = FlightScopeClient(cookies[account.name], user_id=account.user_id,
+                                       player_id=pid, account=account, **shared)
+            players.append(Player(pid, account, client, args.out))
+    print(f"      {len(players)} players.\n")
+    if not players:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    chunk_pool = ThreadPoolExecutor(max_workers=workers)
+
+    # Step 2: Session lists and sync plans, all players at once
+    print("[2/4] Listing sessions...")
+
+    def plan(player):
+        os.makedirs(player.dir, exist_ok=True)
+        player.state = load_sync_state(player.path(SYNC_STATE_FILE))
+        header, entries = player.journal.load()
+        partials = [player.path(name) + ".partial" for name in (SHOTS_NDJSON_FILE, SHOTS_CSV_FILE)]
+        if header is not None and all(map(os.path.exists, partials)):
+            # Resume the interrupted run with its session list and plan.
+            player.resuming = True
+            player.full = header["full"]
+            player.sessions = header["sessions"]
+            player.to_fetch = header["to_fetch"]
+            player.speculative = set(header["speculative"])
+            player.done = {e["sid"]: e for e in entries}
+            player.checkpoint = entries[-1]["sizes"] if entries else header["sizes"]
+            return
+        player.full = _is_full(player, args.full)
+        player.sessions = get_all_sessions(player.client, pool=pool)
+        with open(player.path(SESSIONS_FILE), "w") as f:
+            json.dump(player.sessions, f, indent=2)
+        player.to_fetch = plan_sync(player.client, player.sessions, player.state, full=player.full,
+                                    recheck_days=args.recheck_days, pool=pool,
+                                    failed=player.failed,
+                                    speculative=None if args.no_speculate else player.speculative)
+
+    with ThreadPoolExecutor(max_workers=min(len(players), workers)) as planners:
+        futures = [(p, planners.submit(plan, p)) for p in players]
+        for p, fut in futures:
+            try:
+                fut.result()
+            except Exception as e:
+                print(f"      {p.id}: listing failed: {e}")
+                players.remove(p)
+    for p in players:
+        print(f"      {p.id:>10}: {len(p.sessions):>4} sessions, {len(p.to_fetch):>4} to fetch"
+              f"{' (full)' if p.full else ''}"
+              f"{f' (resuming, {len(p.done)} sessions done)' if p.resuming else ''}")
+    print()
+    if not players:
+        pool.shutdown()
+        chunk_pool.shutdown()
+        return
+
+    # Step 3: Shots, fairly interleaved across players
+    order = fair_order(players)
+    print(f"[3/4] Fetching {len(order)} sessions of {len(players)} players ({workers} workers)...")
+    partitions = {p.id: Partition(p, p.full) for p in players}
+
+    def fetch(item):
+        player, sid = item
+        # Resumed plans may hold speculative sessions even with --no-speculate.
+        guessed = sid in player.speculative
+        return fetch_session(player.client, sid, player.to_fetch[sid], chunk_size=args.chunk_size,
+                             pool=chunk_pool, failed=player.failed,
+                             speculate=guessed and not args.no_speculate, fell_back=player.fell_back,
+                             check=guessed and args.no_speculate)
+
+    for n, ((player, sid), (result_ids, shots)) in enumerate(
+            zip(order, _ordered_map(pool, fetch, order, window=2 * workers)), 1):
+        kept = partitions[player.id].add(sid, result_ids, shots)
+        print(f"  [{n:>4}/{len(order)}] {player.id}/{sid}  → {kept} shots")
+    pool.shutdown()
+    chunk_pool.shutdown()
+
+    # Step 4: Save every partition
+    print(f"\n[4/4] Saving {len(players)} partitions under {args.out}/...")
+    for p in players:
+        partitions[p.id].finish()
+        dropped = len(partitions[p.id].dedup.dropped)
+        print(f"      {p.id:>10}: {p.shots:>6} shots, {p.fetched:>4} sessions fetched"
+              + (f", {len(p.failed)} failures (retried next run)" if p.failed else "")
+              + (f", {dropped} duplicates dropped" if dropped else ""))
+    requests = sum(p.client.stats.totals()["requests"] for p in players)
+    print(f"      Requests: {requests} across all players, "
+          f"{shared['retry'].summary()}, final rate {shared['limiter'].rate:.1f}/s")
+    if cache is not None:
+        cache.close()
+
+    print("\n" + "=" * 60)
+    print(f"  Done! {sum(p.shots for p in players)} shots for {len(players)} players "
+          f"in {time.perf_counter() - t0:.1f}s.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Local stand-in for the myflightscope.com SOAP endpoint (fs-soap-frame/public/index.php).
+
+Serves listSessionsWithScoreForPlayerAndFilter, GetSessionLite,
+GetSessionResultData and getUserProfile with the same wire format as the
+real site, from either
+
+  - synthetic data: N sessions x M shots in the real GetSessionResultData
+    layout, with a RollModel of configurable size, for one player or for
+    several (--players; each lists only its own sessions), or
+  - fixtures: the outputs of a previous download (sessions.json,
+    sync_state.json and shots_all.json or shots_all.ndjson) in a directory.
+
+Faults can be injected to exercise the client: fixed + random latency,
+5xx responses, dropped connections, truncated <Response> bodies and a
+server-side rate limit answered with 429 + Retry-After.
+
+Usage:
+    python fake_server.py --sessions 200 --shots 80 --latency 50 --error-rate 0.02
+    python fake_server.py --fixtures ~/flightscope --port 8099
+    python fake_server.py --players 12 --sessions 30     # players 573120..573131
+    python download_all.py --url http://127.0.0.1:8099/ --no-login --no-cache
+"""
+import os, json, gzip, time, random, socket, argparse, threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape
+
+from shot_schema import SHOT_FIELDS
+
+PLAYER_ID = "573120"
+APP_VERSIONS = ["iOS_FS Golf_9.5.0", "Android_FSGolf_8.5.21", "FS Skills_3.1"]
+
+
+# ── Data ──────────────────────────────────────────────────────────────────────
+
+def make_shot(i, rng, roll_points=0, player=PLAYER_ID):
+    """One raw shot in the GetSessionResultData layout (ResultID 250000000 + i)."""
+    params, weather, swing, shot = {}, {}, {}, {}
+    for _, source, key, dtype in SHOT_FIELDS:
+        value = f"{rng.uniform(-50, 300):.3f}" if dtype.startswith("f") else str(rng.randint(0, 9))
+        if source == "param":
+            params[key + "_PARAMETER_STRING"] = value
+        elif source == "rparam":
+            params[key] = value
+        elif source == "weather":
+            weather[key] = value
+        elif source == "swing":
+            swing[key] = rng.choice(["Draw", "Fade", "Straight", "Indoor", "Outdoor"])
+        elif source == "shot":
+            shot[key] = str(250000000 + i) if key == "ResultID" else value
+    for extra in ("APEXDIST", "DESCENTANGLE", "LANDINGSPEED", "MAXHEIGHTDIST", "OBJECTDIST"):
+        params[extra + "_PARAMETER_STRING"] = f"{rng.uniform(0, 100):.3f}"
+    shot.update(ResultParameters=params, WeatherData=weather, GolfSwingParameters=swing,
+                GolfSwingID=str(90000000 + i), PlayerID=player)
+    if roll_points:
+        path = [{"Pos": f"{t * 0.9:.4f};{t * 4.1:.4f};{max(0.0, t * (30 - t)) / 10:.4f}",
+                 "Time": round(t * 0.02, 3)} for t in range(roll_points)]
+        shot["RollModel"] = {"BallFlight": path, "BounceRoll": path[: roll_points // 4]}
+    return shot
+
+
+class Dataset:
+    """Sessions (newest first) and the raw shots of each, pre-serialized."""
+
+    def __init__(self, sessions, shots_by_session, player_of=None):
+        self.sessions = sorted(sessions, key=lambda s: s["createDate"], reverse=True)
+        self.player_of = player_of      # sessionID -> playerID; None = every player sees all
+        self.result_ids = {}
+        self.shot_json = {}
+        for sess in self.sessions:
+            shots = shots_by_session.get(sess["sessionID"], [])
+            self.result_ids[sess["sessionID"]] = [str(s.get("ResultID", "")) for s in shots]
+            self.shot_json[sess["sessionID"]] = [json.dumps(s, separators=(",", ":")) for s in shots]
+
+    @property
+    def n_shots(self):
+        return sum(len(ids) for ids in self.result_ids.values())
+
+    @classmethod
+    def synthetic(cls, n_sessions=100, shots_per_session=60, roll_points=60, seed=42, players=1):
+        """n_sessions per player; with players > 1, player p is PLAYER_ID + p."""
+        start = datetime(2014, 1, 1)
+        sessions, shots, player_of, n = [], {}, {}, 0
+        for p in range(players):
+            rng = random.Random(seed + p)
+            player = str(int(PLAYER_ID) + p)
+            for k in range(n_sessions):
+                sid = str(9000000 + p * 100000 + k)
+                created = start + timedelta(hours=rng.randint(0, 12 * 365 * 24))
+                sessions.append({
+                    "sessionID": sid,
+                    "displayName": created.strftime("%d-%b-%Y %I:%M %p"),
+                    "createDate": created.strftime("%Y-%m-%d %H:%M:%S"),
+                    "appVersion": rng.choice(APP_VERSIONS),
+                    "location": "",
+                    "sessionTypeID": "17",
+                })
+                count = max(0, int(rng.gauss(shots_per_session, shots_per_session / 4)))
+                shots[sid] = [make_shot(n + j, rng, roll_points, player) for j in range(count)]
+                player_of[sid] = player
+                n += count
+        return cls(sessions, shots, player_of if players > 1 else None)
+
+    @classmethod
+    def from_fixtures(cls, path):
+        """Load the sessions.json / sync_state.json / shots_all.* a download left in `path`."""
+        with open(os.path.join(path, "sessions.json")) as f:
+            sessions = json.load(f)
+        with open(os.path.join(path, "sync_state.json")) as f:
+            state = json.load(f)["sessions"]
+        ndjson = os.path.join(path, "shots_all.ndjson")
+        if os.path.exists(ndjson):
+            with open(ndjson) as f:
+                raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(os.path.join(path, "shots_all.json")) as f:
+                raw = json.load(f)
+        by_id = {str(s.get("ResultID", "")): s for s in raw}
+        shots = {sid: [by_id[rid] for rid in entry["shot_ids"] if rid in by_id]
+                 for sid, entry in state.items()}
+        return cls(sessions, shots)
+
+
+# ── Responses ─────────────────────────────────────────────────────────────────
+
+def _session_xml(sess):
+    fields = (("sessionID", "sessionID"), ("sessionDisplayName", "displayName"),
+              ("sessionCreateDate", "createDate"), ("appVersion", "appVersion"),
+              ("sessionLocation", "location"), ("sessionTypeID", "sessionTypeID"))
+    return ("  <Session>\n" + "".join(f"    <{tag}>{escape(str(sess.get(key) or ''))}</{tag}>\n"
+                                     for tag, key in fields) + "  </Session>\n")
+
+
+class SoapHandler:
+    """Builds response bodies for a Dataset; cached so the server is never the bottleneck."""
+
+    def __init__(self, data):
+        self.data = data
+        self.body = lru_cache(maxsize=8192)(self._body)
+
+    def _body(self, method, *args):
+        return getattr(self, method)(*args).encode()
+
+    def dispatch(self, params):
+        method = params.get("method", "")
+        if method == "listSessionsWithScoreForPlayerAndFilter":
+            return self.body(method, params.get("playerID", ""),
+                             params.get("filterStartDate", ""), params.get("filterEndDate", ""),
+                             int(params.get("startIndex") or 0), int(params.get("count") or 10))
+        if method == "GetSessionLite":
+            return self.body(method, params.get("SessionID", ""))
+        if method == "GetSessionResultData":
+            return self.body(method, params.get("SessionID", ""), params.get("StartResultID", ""),
+                             int(params.get("Limit") or 1))
+        if method == "getUserProfile":
+            return self.body(method)
+        return f"<error>unknown method {escape(method)}</error>".encode()
+
+    def listSessionsWithScoreForPlayerAndFilter(self, player, start_date, end_date, start, count):
+        owner = self.data.player_of
+        match = [s for s in self.data.sessions if start_date <= s["createDate"][:10] <= end_date
+                 and (owner is None or owner.get(s["sessionID"]) == player)]
+        page = match[start:start + count]
+        return (f'<Sessions recordCount="{len(page)}">\n' + "".join(map(_session_xml, page))
+                + f"  <Total>{len(match)}</Total>\n</Sessions>")
+
+    def GetSessionLite(self, sid):
+        sess = next((s for s in self.data.sessions if s["sessionID"] == sid), None)
+        if sess is None:
+            return "<Response>null</Response>"
+        return "<Response>" + json.dumps({
+            "SessionID": sid, "DisplayName": sess["displayName"], "CreateDate": sess["createDate"],
+            "ResultsRange": [{"ResultID": rid} for rid in self.data.result_ids[sid]],
+        }) + "</Response>"
+
+    def GetSessionResultData(self, sid, start_id, limit):
+        ids = self.data.result_ids.get(sid, [])
+        try:
+            i = ids.index(start_id)
+        except ValueError:
+            return "<Response>[]</Response>"
+        return "<Response>[" + ",".join(self.data.shot_json[sid][i:i + limit]) + "]</Response>"
+
+    def getUserProfile(self):
+        return f"<Profile>\n  <User>\n    <ID>{PLAYER_ID}</ID>\n  </User>\n</Profile>"
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+class Faults:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, drop_rate=0.0,
+                 malformed_rate=0.0, rate_limit=0.0, seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.malformed_rate = malformed_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)       # (second, requests served in it)
+
+    def over_limit(self):
+        """Fixed one-second window: True once `rate_limit` requests were served this second."""
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            second, n = self._window
+            now = int(time.monotonic())
+            if now != second:
+                second, n = now, 0
+            self._window = (second, n + 1)
+            return n >= self.rate_limit
+
+    def roll(self):
+        with self._lock:
+            return self.rng.random()
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = self.bytes_sent = self.errors = 0
+
+    def add(self, nbytes, error=False):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += nbytes
+            self.errors += error
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.bytes_sent = self.errors = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive, like the real site
+    # Send headers and body in one segment; otherwise Nagle + delayed ACK add
+    # ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, *args):
+        pass
+
+    def _params(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else self.path.partition("?")[2]
+        return {k: v[0] for k, v in parse_qs(body, keep_blank_values=True).items()}
+
+    def _send(self, status, body, headers=()):
+        if status == 200 and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, 1)
+            headers = (*headers, ("Content-Encoding", "gzip"))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.add(len(body), error=status != 200)
+
+    def do_POST(self):
+        params = self._params()
+        faults = self.server.faults
+        if faults.over_limit():
+            return self._send(429, b"Too Many Requests", (("Retry-After", "1"),))
+        if faults.latency or faults.jitter:
+            time.sleep(faults.latency + faults.jitter * faults.rng.random())
+        r = faults.roll()
+        if r < faults.drop_rate:
+            self.server.stats.add(0, error=True)
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+        r -= faults.drop_rate
+        if r < faults.error_rate:
+            return self._send(faults.rng.choice((500, 502, 503)), b"<html>Bad Gateway</html>")
+        body = self.server.soap.dispatch(params)
+        if r - faults.error_rate < faults.malformed_rate:
+            body = body[: len(body) // 2]
+        self._send(200, body)
+
+    do_GET = do_POST
+
+
+def start_server(data, faults=None, host="127.0.0.1", port=0):
+    """Start the fake endpoint on a background thread; returns the server (see .url)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.soap = SoapHandler(data)
+    server.faults = faults or Faults()
+    server.stats = Stats()
+    server.url = f"http://{host}:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_fault_args(parser):
+    parser.add_argument("--latency", type=float, default=0.0, help="fixed latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to N ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 5xx")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of dropped connections")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="fraction of 200 responses truncated mid-body")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="requests/s served before answering 429 (0 = unlimited)")
+
+
+def faults_from_args(args):
+    return Faults(args.latency, args.jitter, args.error_rate, args.drop_rate,
+                  args.malformed_rate, args.rate_limit)
+
+
+def add_data_args(parser):
+    parser.add_argument("--fixtures", help="serve the outputs of a previous download in this directory")
+    parser.add_argument("--sessions", type=int, default=100, help="synthetic sessions (default 100)")
+    parser.add_argument("--shots", type=int, default=60, help="mean shots per session (default 60)")
+    parser.add_argument("--roll-points", type=int, default=60,
+                        help="RollModel samples per shot (default 60)")
+    parser.add_argument("--players", type=int, default=1,
+                        help="synthetic players, each with its own --sessions (default 1)")
+
+
+def data_from_args(args):
+    if args.fixtures:
+        return Dataset.from_fixtures(args.fixtures)
+    return Dataset.synthetic(args.sessions, args.shots, args.roll_points, players=args.players)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the FlightScope SOAP endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_data_args(parser)
+    add_fault_args(parser)
+    args = parser.parse_args(argv)
+
+    data = data_from_args(args)
+    server = start_server(data, faults_from_args(args), args.host, args.port)
+    print(f"Serving {len(data.sessions)} sessions / {data.n_shots} shots on {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        s = server.stats
+        print(f"\n{s.requests} requests, {s.errors} errors, {s.bytes_sent:,} bytes sent")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
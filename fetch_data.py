@@ -1,15 +1,11 @@
 """
 Log into myflightscope.com and capture all data API calls made after login.
 """
-import os
 import json
 import time
-from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 
-load_dotenv(os.path.expanduser("~/.config/flightscope/.env"))
-EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
-PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
+import fs_auth
 
 api_responses = {}
 
@@ -32,27 +28,10 @@ def main():
 
         page.on("response", on_response)
 
-        # --- Step 1: Load main page and click LOGIN ---
-        print("Loading main page...")
-        page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
-        page.click("text=LOGIN", timeout=10000)
-
-        # Wait for the form
-        page.wait_for_selector("input[type='email']", timeout=15000)
-        print("Login form ready, filling credentials...")
-
-        page.fill("input[type='email']", EMAIL)
-        page.fill("input[type='password']", PASSWORD)
-
-        # --- Step 2: Submit login ---
-        page.click("button:has-text('LOG IN'), input[type='submit']")
-        print("Login submitted, waiting...")
-        # Wait for page to navigate away from login (URL changes on success)
-        try:
-            page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
-        except:
-            pass  # might stay on same URL but logged in
-        time.sleep(5)  # let the app fully load
+        # --- Step 1-2: Log in ---
+        print("Logging in...")
+        fs_auth.browser_login(page)
+        time.sleep(2)  # let the app fully load
 
         # Take screenshot to confirm login
         page.screenshot(path="after_login.png", full_page=True)
@@ -0,0 +1,179 @@
+"""
+One command for every FlightScope tool.
+
+    python flightscope.py sync [...]           download / incremental sync (download_all.py)
+    python flightscope.py sync-players [...]   many players in one job (download_players.py)
+    python flightscope.py export csv|columns|db [...]
+                                               rebuild outputs from the local download
+    python flightscope.py query [...]          filter shots in shots.sqlite (shot_db.py query)
+    python flightscope.py stats [...]          precomputed per-club/week/session stats
+                                               (the aggregates in shots.sqlite)
+    python flightscope.py analyze clubs|sessions|dispersion|gapping [...]
+                                               NumPy analytics over shots_columns/ (analytics.py)
+
+Every other argument goes to the underlying script, whose own --help lists
+them. Nothing is imported until a subcommand runs, and then only what it
+needs: the offline commands never load requests, dotenv or Playwright, and
+only `export columns` and `analyze` load NumPy. bench_startup.py measures it.
+"""
+import sys
+
+# name -> (module, function, summary). The function gets the remaining argv.
+COMMANDS = {
+    "sync":         ("download_all", "main", "download / incremental sync (network)"),
+    "sync-players": ("download_players", "main", "download many players in one job (network)"),
+    "export":       ("flightscope", "export", "rebuild shots_all.csv, shots_columns/ or shots.sqlite"),
+    "query":        ("flightscope", "query", "filter shots in shots.sqlite"),
+    "stats":        ("flightscope", "stats", "precomputed per-club/week/session stats"),
+    "analyze":      ("analytics", "main", "clubs|sessions|dispersion|gapping over shots_columns/"),
+}
+
+
+def _usage():
+    lines = ["usage: flightscope <command> [options]", "", "commands:"]
+    lines += [f"  {name:<14}{summary}" for name, (_, _, summary) in COMMANDS.items()]
+    lines += ["", "`flightscope <command> --help` lists a command's options."]
+    return "\n".join(lines)
+
+
+def _db_first(argv):
+    """shot_db.py takes --db before its subcommand; accept it anywhere."""
+    argv = list(argv)
+    for i, arg in enumerate(argv):
+        if arg == "--db" and i + 1 < len(argv):
+            return ["--db", argv[i + 1]] + argv[:i] + argv[i + 2:]
+        if arg.startswith("--db="):
+            return ["--db", arg[5:]] + argv[:i] + argv[i + 1:]
+    return argv
+
+
+# ── Offline commands ──────────────────────────────────────────────────────────
+
+def query(argv):
+    import shot_db
+    sys.argv[0] = "flightscope"         # shot_db's subparser adds " query"
+    shot_db.main(_db_first(["query", *argv]))
+
+
+def stats(argv):
+    import time, argparse
+    import aggregates, shot_db
+    parser = argparse.ArgumentParser(prog="flightscope stats",
+                                     description="Per-club/week/session stats from shots.sqlite's "
+                                                 "precomputed aggregates (no shot is read).")
+    parser.add_argument("--db", default=shot_db.DB_FILE)
+    parser.add_argument("--grain", choices=aggregates.GRAINS, default="club")
+    parser.add_argument("--metric", action="append", choices=list(aggregates.METRICS),
+                        help="repeatable (default: carry_dist_yards)")
+    parser.add_argument("--club")
+    parser.add_argument("--since", help="YYYY-MM-DD (week and club grains)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    db = shot_db.ShotDB(args.db)
+    rows = db.summaries(args.grain, args.metric or ["carry_dist_yards"],
+                        club=args.club, since=args.since)
+    db.close()
+    shot_db._print_table(rows)
+    print(f"\n{len(rows)} groups in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+
+
+def export_csv(src=None, out="shots_all.csv", sessions_path="sessions.json",
+               state_path="sync_state.json"):
+    """
+    Re-flatten the raw shots of the last download (shots_all.ndjson or
+    shots_all.json) into `out`, e.g. after SHOT_FIELDS changed. Sessions come
+    from sessions.json and each shot's session from sync_state.json. Returns
+    the number of rows written.
+    """
+    import os, csv, json
+    from shot_schema import CSV_FIELDS, flatten_rows
+
+    if src is None:
+        src = "shots_all.ndjson" if os.path.exists("shots_all.ndjson") else "shots_all.json"
+    with open(sessions_path) as f:
+        sessions = {sess["sessionID"]: sess for sess in json.load(f)}
+    with open(state_path) as f:
+        owner = {rid: sid for sid, entry in json.load(f)["sessions"].items()
+                 for rid in entry["shot_ids"]}
+    with open(src) as f:
+        if src.endswith(".ndjson"):
+            shots = (json.loads(line) for line in f if line.strip())
+        else:
+            shots = iter(json.load(f))
+
+        tmp = out + ".tmp"
+        n = 0
+        with open(tmp, "w", newline="") as dst:
+            writer = csv.writer(dst)
+            writer.writerow(CSV_FIELDS)
+            batch, batch_sid = [], None
+            for shot in shots:
+                sid = owner.get(str(shot.get("ResultID", "")))
+                if sid != batch_sid and batch:
+                    writer.writerows(flatten_rows(batch, sessions[batch_sid]))
+                    n += len(batch)
+                    batch = []
+                if sid in sessions:
+                    batch.append(shot)
+                batch_sid = sid
+            if batch:
+                writer.writerows(flatten_rows(batch, sessions[batch_sid]))
+                n += len(batch)
+    os.replace(tmp, out)
+    return n
+
+
+def export(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="flightscope export",
+                                     description="Rebuild outputs from the local download, offline.")
+    sub = parser.add_subparsers(dest="what", required=True)
+    p = sub.add_parser("csv", help="shots_all.csv from shots_all.ndjson/.json")
+    p.add_argument("--src", help="raw shots (default: shots_all.ndjson if present, else shots_all.json)")
+    p.add_argument("--out", default="shots_all.csv")
+    p = sub.add_parser("columns", help="shots_columns/ (NumPy) from shots_all.csv")
+    p.add_argument("csv", nargs="?", default="shots_all.csv")
+    p.add_argument("--out", default=None)
+    p = sub.add_parser("db", help="shots.sqlite from shots_all.csv + sessions.json")
+    p.add_argument("csv", nargs="?", default="shots_all.csv")
+    p.add_argument("--db", default=None)
+    args = parser.parse_args(argv)
+
+    if args.what == "csv":
+        n = export_csv(args.src, args.out)
+        print(f"Saved {args.out} ({n} shots)")
+    elif args.what == "columns":
+        import columnar
+        out = args.out or columnar.COLUMNS_DIR
+        schema = columnar.build_from_csv(args.csv, out)
+        print(f"Saved {out}/ ({len(schema['columns'])} typed columns)")
+    else:
+        import shot_db
+        shot_db.main(["--db", args.db or shot_db.DB_FILE, "ingest", args.csv])
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(_usage())
+        return
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"flightscope: unknown command {name!r}\n\n{_usage()}", file=sys.stderr)
+        sys.exit(2)
+    module, function, _ = COMMANDS[name]
+    if module == "flightscope":
+        fn = globals()[function]
+    else:
+        import importlib
+        fn = getattr(importlib.import_module(module), function)
+    # Delegated scripts name themselves after sys.argv[0] in --help and errors.
+    sys.argv[0] = f"flightscope {name}"
+    fn(rest)
+
+
+if __name__ == "__main__":
+    main()
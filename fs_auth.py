@@ -0,0 +1,205 @@
+"""
+Shared myflightscope.com login with a persistent cookie cache.
+
+Cookies from a browser login are saved (with their expiry) next to the .env
+file. Later runs reuse them after one cheap getUserProfile call confirms they
+still work, so Playwright is only imported and launched when they don't.
+
+The .env login is the default Account. accounts.json in the same directory
+can list more (see load_accounts()); each has its own cookie cache.
+"""
+import os, json, time, threading
+from dotenv import load_dotenv
+
+CONFIG_DIR = os.path.expanduser("~/.config/flightscope")
+load_dotenv(os.path.join(CONFIG_DIR, ".env"))
+EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
+PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
+
+# FLIGHTSCOPE_SOAP_URL points every script at another endpoint (e.g. fake_server.py).
+SOAP_URL = os.getenv("FLIGHTSCOPE_SOAP_URL",
+                     "https://myflightscope.com/wp-content/plugins/fs-soap-frame/public/index.php")
+USER_ID = "573120"
+COOKIE_CACHE = os.path.join(CONFIG_DIR, "cookies.json")
+ACCOUNTS_FILE = os.path.join(CONFIG_DIR, "accounts.json")
+
+# Session cookies carry no expiry of their own; don't trust them beyond this.
+MAX_CACHE_AGE = 12 * 3600
+
+_UNAUTH_MARKERS = ("not logged in", "not authorized", "unauthorized", "session expired",
+                   "invalid session", "please log in")
+
+
+# ── Accounts ──────────────────────────────────────────────────────────────────
+
+class Account:
+    """One myflightscope.com login and the players downloaded through it."""
+
+    def __init__(self, name, email, password, user_id=USER_ID, players=None, cookie_cache=None):
+        self.name = name
+        self.email = email
+        self.password = password
+        self.user_id = str(user_id)
+        self.players = [str(p) for p in players or (user_id,)]
+        self.cookie_cache = cookie_cache or os.path.join(CONFIG_DIR, f"cookies-{name}.json")
+
+    def __repr__(self):
+        return f"Account({self.name!r}, user {self.user_id}, players {', '.join(self.players)})"
+
+
+DEFAULT_ACCOUNT = Account("default", EMAIL, PASSWORD, USER_ID, cookie_cache=COOKIE_CACHE)
+
+
+def load_accounts(path=ACCOUNTS_FILE):
+    """
+    Accounts from a JSON list such as
+
+        [{"name": "coach", "email": "coach@example.com", "password_env": "FS_COACH_PASSWORD",
+          "user_id": "600001", "players": ["573120", "573121"]}]
+
+    "password" may be given inline instead of "password_env"; "players"
+    defaults to the account's own user_id.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    accounts = []
+    for i, entry in enumerate(entries):
+        password = entry.get("password")
+        if password is None and entry.get("password_env"):
+            password = os.getenv(entry["password_env"])
+        accounts.append(Account(entry.get("name") or f"account{i + 1}", entry.get("email"),
+                                password, entry.get("user_id", USER_ID), entry.get("players")))
+    names = [a.name for a in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: account names must be unique")
+    return accounts
+
+
+# ── Browser login ─────────────────────────────────────────────────────────────
+
+def browser_login(page, account=None):
+    """Fill in and submit the login form on an open Playwright page."""
+    account = account or DEFAULT_ACCOUNT
+    page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
+    page.click("text=LOGIN", timeout=10000)
+    page.wait_for_selector("input[type='email']", timeout=15000)
+    page.fill("input[type='email']", account.email)
+    page.fill("input[type='password']", account.password)
+    page.click("button:has-text('LOG IN')")
+    try:
+        page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
+    except Exception:
+        pass
+    time.sleep(3)
+
+
+def login_cookies(account=None):
+    """Log in with headless Chromium, cache the cookies and return them."""
+    from playwright.sync_api import sync_playwright
+
+    account = account or DEFAULT_ACCOUNT
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        page = context.new_page()
+        browser_login(page, account)
+        cookies = context.cookies()
+        browser.close()
+    save_cookies(cookies, account.cookie_cache)
+    return cookies
+
+
+# ── Cookie cache ──────────────────────────────────────────────────────────────
+
+def save_cookies(cookies, path=COOKIE_CACHE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+
+def load_cookies(path=COOKIE_CACHE):
+    """Return cached cookies, or None if missing, too old or any cookie has expired."""
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    now = time.time()
+    if now - cached.get("saved_at", 0) > MAX_CACHE_AGE:
+        return None
+    cookies = cached.get("cookies") or []
+    for c in cookies:
+        expires = c.get("expires", -1)
+        if expires is not None and 0 < expires <= now:
+            return None
+    return cookies or None
+
+
+def clear_cookies(path=COOKIE_CACHE):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ── Validation ────────────────────────────────────────────────────────────────
+
+def looks_unauthenticated(status, text):
+    """Best-effort check whether a SOAP response means the login has lapsed."""
+    if status in (401, 403):
+        return True
+    head = (text or "")[:500].lower()
+    return any(m in head for m in _UNAUTH_MARKERS)
+
+
+def cookies_valid(cookies, user_id=USER_ID, url=SOAP_URL):
+    """Confirm cookies still work with one cheap getUserProfile call to `url`."""
+    import requests
+
+    s = requests.Session()
+    for c in cookies:
+        s.cookies.set(c["name"], c["value"], domain=c.get("domain", ""))
+    try:
+        resp = s.post(url, data={"UserID": user_id, "method": "getUserProfile"}, timeout=15)
+    except requests.RequestException:
+        return False
+    return (resp.ok and bool(resp.text.strip())
+            and not looks_unauthenticated(resp.status_code, resp.text))
+
+
+def get_cookies(force_login=False, account=None, url=SOAP_URL):
+    """
+    Return working cookies: cached ones if still valid (checked against the
+    SOAP endpoint `url`), otherwise from a fresh login.
+    """
+    account = account or DEFAULT_ACCOUNT
+    if not force_login:
+        cookies = load_cookies(account.cookie_cache)
+        if cookies and cookies_valid(cookies, account.user_id, url):
+            return cookies
+    return login_cookies(account)
+
+
+_relogin_lock = threading.Lock()
+
+
+def refresh_cookies(s, stale_cookies, account=None):
+    """
+    Re-login after a request came back unauthenticated and load the new cookies
+    into requests.Session `s`. Safe to call from several worker threads: only
+    the first caller logs in, the rest pick up its cookies.
+    """
+    account = account or DEFAULT_ACCOUNT
+    with _relogin_lock:
+        if s.cookies.get_dict() != stale_cookies:
+            return
+        # Another client of the same account may have logged in already.
+        fresh = load_cookies(account.cookie_cache)
+        if not fresh or {c["name"]: c["value"] for c in fresh} == stale_cookies:
+            clear_cookies(account.cookie_cache)
+            fresh = login_cookies(account)
+        for c in fresh:
+            s.cookies.set(c["name"], c["value"], domain=c.get("domain", ""))
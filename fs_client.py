@@ -0,0 +1,370 @@
+"""
+Shared HTTP client for the myflightscope.com SOAP endpoint.
+
+Every script talks to the API through FlightScopeClient, so connection
+pooling, compression, rate limiting, retries, caching and accounting live in
+one place:
+
+  - one keep-alive connection pool sized to the worker count
+  - Accept-Encoding negotiated for every codec urllib3 can decode here
+    (gzip/deflate, plus br/zstd when brotli/zstandard are installed)
+  - requests paced by a shared TokenBucket (ratelimit.py) and retried behind
+    the host's circuit breaker (resilience.py)
+  - optional ResponseCache / offline mode (response_cache.py)
+  - per-method request count, wire bytes, decoded bytes and latency
+  - GetSessionResultData parsed incrementally as the body arrives
+    (stream_json.py), one shot at a time
+  - optional recording of every exchange to a cassette, or replay from one
+    instead of the network (cassette.py)
+
+Login itself stays in fs_auth.py.
+"""
+import json
+import itertools
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from collections import defaultdict
+
+import requests
+from urllib3.util import make_headers
+
+import fs_auth
+from ratelimit import TokenBucket, ThrottledAdapter
+from resilience import RetryPolicy, breaker_for
+from response_cache import CacheMiss
+from cassette import ReplayAdapter
+from stream_json import parse_array
+
+SOAP_URL = fs_auth.SOAP_URL
+USER_ID = fs_auth.USER_ID
+PLAYER_ID = fs_auth.USER_ID
+
+# (connect, read) timeout per request, so a stalled connection gets retried.
+REQUEST_TIMEOUT = (10, 120)
+
+# Decoded bytes handed to a streaming parser at a time.
+STREAM_CHUNK = 64 * 1024
+
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+    "Referer": "https://myflightscope.com/",
+    "Origin": "https://myflightscope.com",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "X-Requested-With": "XMLHttpRequest",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+
+# ── Response parsing ──────────────────────────────────────────────────────────
+
+def unwrap_response(text):
+    """Strip the <Response>…</Response> XML wrapper and parse as JSON."""
+    text = text.strip()
+    if text.startswith("<Response>") and text.endswith("</Response>"):
+        return json.loads(text[len("<Response>"):-len("</Response>")])
+    # Sometimes the API returns raw JSON without wrapper
+    return json.loads(text)
+
+
+def _expect(kind, method):
+    def parse(text):
+        data = unwrap_response(text)
+        if not isinstance(data, kind):
+            raise ValueError(f"unexpected {method} payload: {type(data).__name__}")
+        return data
+    return parse
+
+
+def xml_rows(root):
+    """Child elements of an XML document as a list of {tag: text} dicts."""
+    return [row for row in ({field.tag: field.text for field in child} for child in root) if row]
+
+
+def _session_entry(sess):
+    return {
+        "sessionID":     sess.findtext("sessionID"),
+        "displayName":   sess.findtext("sessionDisplayName"),
+        "createDate":    sess.findtext("sessionCreateDate"),
+        "appVersion":    sess.findtext("appVersion"),
+        "location":      sess.findtext("sessionLocation") or "",
+        "sessionTypeID": sess.findtext("sessionTypeID"),
+    }
+
+
+# ── Accounting ────────────────────────────────────────────────────────────────
+
+class RequestStats:
+    """Thread-safe per-method request count, bytes and every request's latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_method = defaultdict(lambda: {"requests": 0, "wire_bytes": 0, "body_bytes": 0,
+                                              "seconds": 0.0, "throttled": 0.0,
+                                              "latencies": array("d")})
+
+    def record(self, method, seconds, wire_bytes, body_bytes, throttled=0.0):
+        """`seconds` from sending to the last byte; `throttled` is the rate-limiter wait before it."""
+        with self._lock:
+            m = self.by_method[method]
+            m["requests"] += 1
+            m["wire_bytes"] += wire_bytes
+            m["body_bytes"] += body_bytes
+            m["seconds"] += seconds
+            m["throttled"] += throttled
+            m["latencies"].append(seconds)
+
+    def methods(self):
+        """Copy of the per-method counters (see metrics.py)."""
+        with self._lock:
+            return {method: dict(m, latencies=array("d", m["latencies"]))
+                    for method, m in self.by_method.items()}
+
+    def totals(self):
+        with self._lock:
+            total = {"requests": 0, "wire_bytes": 0, "body_bytes": 0, "seconds": 0.0,
+                     "throttled": 0.0}
+            for m in self.by_method.values():
+                for k in total:
+                    total[k] += m[k]
+            return total
+
+    def summary(self):
+        t = self.totals()
+        if not t["requests"]:
+            return "0 requests"
+        return (f"{t['requests']} requests, {t['wire_bytes'] / 1e6:.1f} MB on the wire "
+                f"({t['body_bytes'] / 1e6:.1f} MB decoded), "
+                f"avg {t['seconds'] / t['requests'] * 1000:.0f} ms"
+                + (f" (+{t['throttled'] / t['requests'] * 1000:.0f} ms rate-limited)"
+                   if t["throttled"] else ""))
+
+
+# ── Client ────────────────────────────────────────────────────────────────────
+
+class FlightScopeClient:
+    """
+    Thread-safe SOAP client. Share one instance between all worker threads;
+    `workers` sizes the connection pool so none of them waits for a socket.
+    """
+
+    def __init__(self, cookies=(), workers=4, limiter=None, retry=None, cache=None,
+                 offline=False, url=SOAP_URL, user_id=USER_ID, player_id=PLAYER_ID,
+                 recorder=None, replay=None, profiler=None, account=None):
+        self.url = url
+        self.user_id = user_id
+        self.player_id = player_id
+        self.cache = cache
+        self.offline = offline
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or TokenBucket(burst=max(workers, 1))
+        self.breaker = breaker_for(url)
+        self.stats = RequestStats()
+        self.recorder = recorder
+        self.profiler = profiler
+        self.account = account          # fs_auth.Account to log in again with (default: .env)
+
+        self.session = requests.Session()
+        if replay is not None:
+            adapter = ReplayAdapter(replay)
+        else:
+            adapter = ThrottledAdapter(self.limiter, pool_connections=1,
+                                       pool_maxsize=max(workers, 1), pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(HEADERS)
+        self.set_cookies(cookies)
+
+    def set_cookies(self, cookies):
+        for c in cookies:
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain", ""))
+
+    @classmethod
+    def login(cls, force_login=False, account=None, **kwargs):
+        """
+        Client with working cookies from fs_auth (cached or a fresh browser
+        login) for `account` (default: the .env login), acting as its user and,
+        unless player_id is given, its first player.
+        """
+        if account is not None:
+            kwargs.setdefault("user_id", account.user_id)
+            kwargs.setdefault("player_id", account.players[0])
+        cookies = fs_auth.get_cookies(force_login=force_login, account=account,
+                                      url=kwargs.get("url", SOAP_URL))
+        return cls(cookies, account=account, **kwargs)
+
+    # ── Transport ──
+
+    def _send(self, verb, params):
+        t0 = time.perf_counter()
+        if verb == "GET":
+            resp = self.session.get(self.url, params=params, timeout=REQUEST_TIMEOUT)
+        else:
+            resp = self.session.post(self.url, data=params, timeout=REQUEST_TIMEOUT)
+        body = resp.content
+        elapsed = time.perf_counter() - getattr(resp, "sent_at", t0)
+        # urllib3 counts the raw (still compressed) bytes it read off the socket.
+        wire = resp.raw.tell() if hasattr(resp.raw, "tell") else len(body)
+        self.stats.record(params.get("method") or params.get("action") or "?",
+                          elapsed, wire, len(body), getattr(resp, "throttled", 0.0))
+        if self.recorder is not None:
+            self.recorder.record(params, resp.status_code, resp.headers, body, elapsed)
+        return resp
+
+    def _attempt(self, verb, params):
+        cookies = self.session.cookies.get_dict()
+        resp = self._send(verb, params)
+        if fs_auth.looks_unauthenticated(resp.status_code, resp.text):
+            # Cookies lapsed mid-run: log in again once and retry.
+            fs_auth.refresh_cookies(self.session, cookies, self.account)
+            resp = self._send(verb, params)
+        resp.raise_for_status()
+        return resp.text
+
+    def _open_stream(self, verb, params):
+        """Send a request without reading the body: (response, first chunk, chunk iterator, t0)."""
+        t0 = time.perf_counter()
+        if verb == "GET":
+            resp = self.session.get(self.url, params=params, timeout=REQUEST_TIMEOUT, stream=True)
+        else:
+            resp = self.session.post(self.url, data=params, timeout=REQUEST_TIMEOUT, stream=True)
+        chunks = resp.iter_content(STREAM_CHUNK)
+        return resp, next(chunks, b""), chunks, t0
+
+    def _attempt_stream(self, verb, params, consume, body):
+        """
+        _attempt() for a body that `consume` parses chunk by chunk as it is
+        read. Decoded chunks are also appended to `body` when it is a list
+        (for the cache or the recorder).
+        """
+        cookies = self.session.cookies.get_dict()
+        resp, first, chunks, t0 = self._open_stream(verb, params)
+        if fs_auth.looks_unauthenticated(resp.status_code, first.decode("utf-8", "replace")):
+            resp.close()
+            fs_auth.refresh_cookies(self.session, cookies, self.account)
+            resp, first, chunks, t0 = self._open_stream(verb, params)
+        size = 0
+
+        def read():
+            nonlocal size
+            for chunk in itertools.chain((first,), chunks):
+                size += len(chunk)
+                if body is not None:
+                    body.append(chunk)
+                yield chunk
+
+        reader = read()
+        with resp:
+            try:
+                resp.raise_for_status()
+                return consume(reader)
+            finally:
+                # Read whatever the parser did not (an error page, a malformed
+                # tail) so the exchange is accounted and recorded in full.
+                for _ in reader:
+                    pass
+                elapsed = time.perf_counter() - getattr(resp, "sent_at", t0)
+                wire = resp.raw.tell() if hasattr(resp.raw, "tell") else size
+                self.stats.record(params.get("method") or params.get("action") or "?",
+                                  elapsed, wire, size, getattr(resp, "throttled", 0.0))
+                if self.recorder is not None:
+                    self.recorder.record(params, resp.status_code, resp.headers,
+                                         b"".join(body), elapsed)
+
+    def call(self, params, parse=None, verb="POST", stream=None):
+        """
+        Send one request and return the body, or parse(body) when given.
+        With `stream`, return stream(chunks) instead: the body is handed over
+        in decoded chunks as it arrives and never held whole (unless it has
+        to be cached or recorded).
+        Network errors, 429/5xx and bodies that `parse` rejects are retried
+        with backoff behind the circuit breaker; only bodies that parsed are
+        cached. Raises resilience.RetryError when the retries are used up.
+        """
+        if self.profiler is not None:
+            if parse is not None:
+                parse = self.profiler.wrap("parse", parse)
+            if stream is not None:
+                stream = self.profiler.wrap("parse", stream)
+        if stream is not None:
+            parse = lambda text: stream((text,))
+        if self.cache is not None:
+            text = self.cache.get(params, ignore_ttl=self.offline)
+            if text is not None:
+                try:
+                    return parse(text) if parse else text
+                except (ValueError, ET.ParseError):
+                    pass    # unreadable cached body: fetch it again
+        if self.offline:
+            raise CacheMiss(f"{params.get('method')} not in the response cache")
+
+        def attempt():
+            if stream is None:
+                text = self._attempt(verb, params)
+                return text, (parse(text) if parse else text)
+            keep = self.recorder is not None or (self.cache is not None and self.cache.cacheable(params))
+            body = [] if keep else None
+            result = self._attempt_stream(verb, params, stream, body)
+            return (b"".join(body).decode("utf-8") if keep else None), result
+
+        text, result = self.retry.call(attempt, breaker=self.breaker,
+                                       what=params.get("method") or params.get("action"))
+        if self.cache is not None and text is not None:
+            self.cache.put(params, text)
+        return result
+
+    # ── API methods ──
+
+    def list_sessions(self, start_date, end_date, start=0, count=100, app="All"):
+        """One page of listSessionsWithScoreForPlayerAndFilter as session dicts."""
+        root = self.call({
+            "playerID": self.player_id,
+            "filterApp": app,
+            "filterStartDate": start_date,
+            "filterEndDate": end_date,
+            "startIndex": str(start),
+            "count": str(count),
+            "method": "listSessionsWithScoreForPlayerAndFilter",
+        }, parse=ET.fromstring)
+        return [_session_entry(sess) for sess in root.findall("Session")]
+
+    def get_session_lite(self, session_id):
+        """GetSessionLite: session summary including its ResultsRange."""
+        return self.call({
+            "method":    "GetSessionLite",
+            "UserID":    self.user_id,
+            "SessionID": session_id,
+            "ShareID":   "",
+        }, parse=_expect(dict, "GetSessionLite"))
+
+    def get_result_data(self, session_id, start_result_id, limit, surface="", route=None):
+        """
+        GetSessionResultData: up to `limit` raw shots starting at `start_result_id`,
+        parsed one shot at a time as the body streams in. `route` maps heavy
+        members (e.g. "RollModel") to None to drop them unparsed, or to
+        fn(shot, raw_json) to hand them over; see stream_json.py.
+        """
+        return self.call({
+            "method":            "GetSessionResultData",
+            "UserID":            self.user_id,
+            "SessionID":         session_id,
+            "StartResultID":     start_result_id,
+            "Limit":             str(limit),
+            "ForcedSurfaceType": surface,
+            "ShareID":           "",
+        }, stream=lambda chunks: parse_array(chunks, route))
+
+    def get_total_stats(self):
+        return xml_rows(self.call({"playerID": self.player_id,
+                                   "method": "getTotalStatsForPlayer"}, parse=ET.fromstring))
+
+    def get_dashboard_stats(self):
+        return xml_rows(self.call({"playerID": self.player_id,
+                                   "method": "getDashboardStatsForPlayer"}, parse=ET.fromstring))
+
+    def get_user_profile(self):
+        return xml_rows(self.call({"UserID": self.user_id,
+                                   "method": "getUserProfile"}, parse=ET.fromstring))
@@ -1,81 +1,26 @@
 """
 Use the discovered API to fetch all sessions and all shot data.
 """
-import os
-import json
-import xml.etree.ElementTree as ET
-import time
-from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
-import requests as req_lib
+from fs_client import FlightScopeClient, PLAYER_ID
+from resilience import RetryPolicy
+from response_cache import ResponseCache
 
-load_dotenv(os.path.expanduser("~/.config/flightscope/.env"))
-EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
-PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
-
-SOAP_URL = "https://myflightscope.com/wp-content/plugins/fs-soap-frame/public/index.php"
-PLAYER_ID = "573120"
-
-def get_session_cookies():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-
-        page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
-        page.click("text=LOGIN", timeout=10000)
-        page.wait_for_selector("input[type='email']", timeout=15000)
-        page.fill("input[type='email']", EMAIL)
-        page.fill("input[type='password']", PASSWORD)
-        page.click("button:has-text('LOG IN')")
-        try:
-            page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
-        except:
-            pass
-        time.sleep(3)
-        cookies = context.cookies()
-        browser.close()
-    return cookies
-
-def soap_post(session, method, extra_params=None):
+def soap_post(client, method, extra_params=None):
     data = {"method": method}
     if extra_params:
         data.update(extra_params)
-    resp = session.post(SOAP_URL, data=data)
-    return resp.text
-
-def parse_xml_to_dict(xml_text):
-    """Best-effort XML to list-of-dicts converter."""
     try:
-        root = ET.fromstring(xml_text)
-        results = []
-        for child in root:
-            row = {}
-            for field in child:
-                row[field.tag] = field.text
-            if row:
-                results.append(row)
-        return results
+        return client.call(data)
     except Exception as e:
-        return [{"error": str(e), "raw": xml_text[:200]}]
+        return f"<error>{e}</error>"
 
 def main():
     print("Step 1: Logging in to get session cookies...")
-    cookies_list = get_session_cookies()
-
-    session = req_lib.Session()
-    for c in cookies_list:
-        session.cookies.set(c['name'], c['value'], domain=c.get('domain', ''))
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
-        "Referer": "https://myflightscope.com/",
-        "Origin": "https://myflightscope.com",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "X-Requested-With": "XMLHttpRequest",
-    })
+    # Probing unknown methods: one attempt each, no backoff on errors.
+    client = FlightScopeClient.login(cache=ResponseCache(), retry=RetryPolicy(attempts=1))
 
     print("\nStep 2: Fetching all sessions...")
-    xml = soap_post(session, "listSessionsWithScoreForPlayerAndFilter", {
+    xml = soap_post(client, "listSessionsWithScoreForPlayerAndFilter", {
         "playerID": PLAYER_ID,
         "filterApp": "All",
         "filterStartDate": "2012-01-01",
@@ -86,14 +31,14 @@ def main():
     with open("all_sessions.xml", "w") as f:
         f.write(xml)
 
-    sessions = parse_xml_to_dict(xml)
+    sessions = client.list_sessions("2012-01-01", "2026-12-31", count=100)
     print(f"Found {len(sessions)} sessions")
     for s in sessions[:5]:
-        print(f"  [{s.get('sessionID')}] {s.get('sessionCreateDate')} - {s.get('sessionDisplayName')}")
+        print(f"  [{s['sessionID']}] {s['createDate']} - {s['displayName']}")
 
     # Step 3: Try different method names to get shot data
     if sessions:
-        session_id = sessions[0].get("sessionID")
+        session_id = sessions[0]["sessionID"]
         print(f"\nStep 3: Fetching shots for session {session_id}...")
 
         # Try several possible method names
@@ -108,7 +53,7 @@ def main():
         ]
 
         for method_name, params in methods_to_try:
-            resp = soap_post(session, method_name, params)
+            resp = soap_post(client, method_name, params)
             if len(resp) > 10 and "<error>" not in resp.lower() and "0 results" not in resp:
                 print(f"\n  [SUCCESS] Method '{method_name}' returned data:")
                 print(f"  {resp[:400]}")
@@ -117,6 +62,7 @@ def main():
                 break
             else:
                 print(f"  [SKIP] {method_name}: {resp[:80]}")
+    print(f"\n{client.stats.summary()}")
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,21 @@
 """
 Log in and capture the exact requests/responses made to the SOAP API.
 """
-import os
 import json
 import time
-from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 
-load_dotenv(os.path.expanduser("~/.config/flightscope/.env"))
-EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
-PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
+import fs_auth
+from cassette import Cassette
+from fs_client import SOAP_URL
 
-SOAP_URL = "https://myflightscope.com/wp-content/plugins/fs-soap-frame/public/index.php"
+# Complete responses, replayable with FlightScopeClient(replay=...).
+CASSETTE_FILE = "intercept_api.cassette"
 
 captured = []
 
 def main():
+    cassette = Cassette(CASSETTE_FILE)
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
@@ -34,6 +34,7 @@ def main():
         def on_response(response):
             if SOAP_URL in response.url:
                 try:
+                    cassette.record_playwright(response)
                     body = response.text()
                     captured.append({
                         "type": "RESPONSE",
@@ -49,18 +50,8 @@ def main():
 
         # Login
         print("Logging in...")
-        page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
-        page.click("text=LOGIN", timeout=10000)
-        page.wait_for_selector("input[type='email']", timeout=15000)
-        page.fill("input[type='email']", EMAIL)
-        page.fill("input[type='password']", PASSWORD)
-        page.click("button:has-text('LOG IN')")
-
-        try:
-            page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
-        except:
-            pass
-        time.sleep(5)
+        fs_auth.browser_login(page)
+        time.sleep(2)
 
         # Navigate to DATA section to trigger more API calls
         print("Navigating to DATA section...")
@@ -83,6 +74,8 @@ def main():
         with open("api_interactions.json", "w") as f:
             json.dump(captured, f, indent=2)
         print("\nSaved to api_interactions.json")
+        print(f"Full responses recorded in {CASSETTE_FILE}")
+        cassette.close()
 
         browser.close()
 
@@ -2,14 +2,16 @@
 Navigate into a session page and capture all SOAP API calls made to load shot data.
 Fixed: site is an Angular SPA — navigate via URL directly using known session IDs.
 """
-import os, json, time
-from dotenv import load_dotenv
+import json, time
 from playwright.sync_api import sync_playwright
 
-load_dotenv(os.path.expanduser("~/.config/flightscope/.env"))
-EMAIL = os.getenv("FLIGHTSCOPE_EMAIL")
-PASSWORD = os.getenv("FLIGHTSCOPE_PASSWORD")
-SOAP_URL = "https://myflightscope.com/wp-content/plugins/fs-soap-frame/public/index.php"
+import fs_auth
+from cassette import Cassette
+from fs_client import SOAP_URL
+
+# Complete responses, replayable with FlightScopeClient(replay=...).
+CASSETTE_FILE = "intercept_session.cassette"
+cassette = Cassette(CASSETTE_FILE)
 
 # Known session IDs from all_sessions.xml (most recent first)
 KNOWN_SESSION_IDS = ["9149941", "9112535", "9117036", "9095402"]
@@ -37,6 +39,7 @@ def on_request(request):
 def on_response(response):
     if SOAP_URL in response.url:
         try:
+            cassette.record_playwright(response)
             captured.append({
                 "type": "RESPONSE",
                 "url": response.url,
@@ -47,18 +50,16 @@ def on_response(response):
             pass
 
 def login(page):
-    print("Logging in...")
-    page.goto("https://myflightscope.com", timeout=60000, wait_until="networkidle")
-    page.click("text=LOGIN", timeout=10000)
-    page.wait_for_selector("input[type='email']", timeout=15000)
-    page.fill("input[type='email']", EMAIL)
-    page.fill("input[type='password']", PASSWORD)
-    page.click("button:has-text('LOG IN')")
-    try:
-        page.wait_for_url(lambda url: "login" not in url.lower(), timeout=20000)
-    except:
-        pass
-    time.sleep(5)
+    cookies = fs_auth.load_cookies()
+    if cookies and fs_auth.cookies_valid(cookies):
+        print("Reusing cached login cookies...")
+        page.context.add_cookies(cookies)
+        page.goto("https://myflightscope.com", timeout=60000, wait_until="domcontentloaded")
+    else:
+        print("Logging in...")
+        fs_auth.browser_login(page)
+        time.sleep(2)
+        fs_auth.save_cookies(page.context.cookies())
     print(f"Logged in. Current URL: {page.url}")
 
 def dump_page_links(page, label):
@@ -214,6 +215,8 @@ def main():
         with open("session_api_calls_v2.json", "w") as f:
             json.dump(captured, f, indent=2)
         print("\nSaved to session_api_calls_v2.json")
+        print(f"Full responses recorded in {CASSETTE_FILE}")
+        cassette.close()
 
         browser.close()
 
@@ -0,0 +1,181 @@
+"""
+Run metrics for download_all: where the time goes, and how the API behaved.
+
+Collected per run:
+  - per SOAP method: request count, latency p50/p95/p99/max and a fixed-bucket
+    histogram of the exchanges themselves, seconds spent waiting for the rate
+    limiter, wire and decoded bytes (from FlightScopeClient.stats)
+  - retries per method and failure kind (from the client's RetryPolicy)
+  - per pipeline stage: wall seconds spent in the main thread, items
+    processed and items/sec (login, list, lite, load_previous, result_data,
+    flatten, write, save)
+  - peak RSS of the process
+
+Written as JSON and, optionally, as a Prometheus textfile (for node_exporter's
+textfile collector).
+"""
+import os, json, time, threading
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:         # not on Windows
+    resource = None
+
+METRICS_FILE = "download_metrics.json"
+
+# Histogram upper bounds in seconds (Prometheus `le` labels).
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def quantile(sorted_values, q):
+    """Nearest-rank quantile of an already sorted sequence (None if empty)."""
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[i]
+
+
+def latency_summary(samples):
+    values = sorted(samples)
+    buckets = []
+    i = 0
+    for bound in LATENCY_BUCKETS:
+        while i < len(values) and values[i] <= bound:
+            i += 1
+        buckets.append([bound, i])          # cumulative, like Prometheus
+    return {
+        "p50": quantile(values, 0.50),
+        "p95": quantile(values, 0.95),
+        "p99": quantile(values, 0.99),
+        "max": values[-1] if values else None,
+        "buckets": buckets,
+    }
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class Metrics:
+    """
+    Stage timers for the main thread plus a snapshot of the client's counters.
+    With a profiling.Profiler, every stage is also profiled.
+    """
+
+    def __init__(self, profiler=None):
+        self.started = time.time()
+        self.profiler = profiler
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds=0.0, items=0):
+        with self._lock:
+            s = self.stages.setdefault(stage, {"seconds": 0.0, "items": 0, "calls": 0})
+            s["seconds"] += seconds
+            s["items"] += items
+            s["calls"] += 1
+
+    @contextmanager
+    def stage(self, name, items=0):
+        """
+        Time a block as (part of) stage `name`; `items` = shots (or sessions)
+        it handled. Yields a dict whose "items" can be set inside the block.
+        """
+        counter = {"items": items}
+        # The profiler's own bookkeeping stays outside the timed block.
+        with nullcontext() if self.profiler is None else self.profiler.stage(name):
+            t0 = time.perf_counter()
+            try:
+                yield counter
+            finally:
+                self.add(name, time.perf_counter() - t0, counter["items"])
+
+    def snapshot(self, client=None):
+        stages = {}
+        for name, s in self.stages.items():
+            stages[name] = dict(s, seconds=round(s["seconds"], 4),
+                                per_sec=round(s["items"] / s["seconds"], 1) if s["seconds"] else None)
+        snap = {
+            "started_at": self.started,
+            "wall_seconds": round(time.time() - self.started, 3),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": stages,
+            "methods": {},
+            "retries": {},
+        }
+        if client is not None:
+            for method, m in client.stats.methods().items():
+                snap["methods"][method] = {
+                    "requests": m["requests"], "wire_bytes": m["wire_bytes"],
+                    "body_bytes": m["body_bytes"], "seconds": round(m["seconds"], 3),
+                    "throttled_seconds": round(m["throttled"], 3),
+                    "latency": latency_summary(m["latencies"]),
+                }
+            snap["retries"] = {f"{method}/{kind}": n
+                               for (method, kind), n in sorted(client.retry.by_method.items())}
+            snap["breaker_trips"] = client.breaker.trips
+        return snap
+
+    def write_json(self, path=METRICS_FILE, client=None):
+        snap = self.snapshot(client)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snap, f, indent=2)
+        os.replace(tmp, path)
+        return snap
+
+    def write_prometheus(self, path, client=None):
+        """Write a Prometheus textfile (atomically, so the collector never reads half a file)."""
+        snap = self.snapshot(client)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        lines.append("# HELP flightscope_request_seconds SOAP request latency")
+        lines.append("# TYPE flightscope_request_seconds histogram")
+        for method, m in snap["methods"].items():
+            for bound, count in m["latency"]["buckets"] + [["+Inf", m["requests"]]]:
+                lines.append(f'flightscope_request_seconds_bucket{{method="{method}",le="{bound}"}} {count}')
+            lines.append(f'flightscope_request_seconds_sum{{method="{method}"}} {m["seconds"]}')
+            lines.append(f'flightscope_request_seconds_count{{method="{method}"}} {m["requests"]}')
+
+        metric("flightscope_throttled_seconds_total", "counter",
+               "Seconds requests waited for the rate limiter (not in request_seconds)",
+               [({"method": method}, m["throttled_seconds"]) for method, m in snap["methods"].items()])
+        metric("flightscope_response_bytes_total", "counter", "Response bytes by encoding",
+               [({"method": method, "encoding": enc}, m[f"{enc}_bytes"])
+                for method, m in snap["methods"].items() for enc in ("wire", "body")])
+        metric("flightscope_retries_total", "counter", "Retried requests by method and failure kind",
+               [(dict(zip(("method", "kind"), key.split("/", 1))), n)
+                for key, n in snap["retries"].items()])
+        metric("flightscope_stage_seconds", "gauge", "Main-thread seconds per pipeline stage",
+               [({"stage": name}, round(s["seconds"], 3)) for name, s in snap["stages"].items()])
+        metric("flightscope_stage_items", "gauge", "Items processed per pipeline stage",
+               [({"stage": name}, s["items"]) for name, s in snap["stages"].items()])
+        if snap["peak_rss_bytes"] is not None:
+            metric("flightscope_peak_rss_bytes", "gauge", "Peak resident memory", [({}, snap["peak_rss_bytes"])])
+        metric("flightscope_last_run_timestamp_seconds", "gauge", "When the run finished",
+               [({}, round(time.time()))])
+
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def report(self):
+        """Short human-readable stage breakdown."""
+        out = []
+        for name, s in self.stages.items():
+            rate = f"  {s['items'] / s['seconds']:>9,.0f}/s" if s["seconds"] and s["items"] else ""
+            out.append(f"      {name:<12} {s['seconds']:>8.2f}s  {s['items']:>8} items{rate}")
+        return "\n".join(out)
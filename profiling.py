@@ -0,0 +1,135 @@
+"""
+Opt-in profiling for download_all (--profile DIR).
+
+Every pipeline stage (list, lite, load_previous, fetch, parse, flatten,
+write, save) runs under its own cProfile profiler and is written to
+DIR/<stage>.pstats; tracemalloc records how much memory each stage allocated
+and its peak, and the top allocation sites of its first call, in
+DIR/allocations.txt.
+
+Stages that run in worker threads (fetch, parse) get one profiler per thread,
+merged when written. A stage entered inside another one is profiled in its
+own file only: its parent is paused meanwhile. list and lite send their
+requests from the worker pool, so their files mostly show the main thread
+waiting; the parsing of those responses is in parse.pstats. Memory is only
+tracked for stages that run on the main thread, since tracemalloc's counters
+are global.
+
+Without --profile no Profiler exists and the stages run unwrapped.
+
+Inspect the results with:
+    python -m pstats profile/fetch.pstats        (then: sort cumtime, stats 20)
+    snakeviz profile/fetch.pstats                (if installed)
+"""
+import os
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+PROFILE_DIR = "profile"
+
+# Allocations are grouped by the line that made them, so one frame is enough.
+# Comparing two snapshots walks the whole heap (seconds once the previous
+# shots are loaded), so only each stage's first call is compared.
+TRACE_FRAMES = 1
+SNAPSHOTS_PER_STAGE = 1
+TOP_ALLOCATIONS = 15
+
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+class Profiler:
+    """Per-stage cProfile + tracemalloc; see the module docstring."""
+
+    def __init__(self, directory=PROFILE_DIR, top=TOP_ALLOCATIONS):
+        self.directory = directory
+        self.top = top
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = {}         # stage -> {thread id: cProfile.Profile}
+        self._memory = {}           # stage -> {"calls", "allocated", "peak"}
+        self._allocations = {}      # stage -> [StatisticDiff, ...]
+        self._main = threading.main_thread()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    def _profile_for(self, name):
+        tid = threading.get_ident()
+        with self._lock:
+            by_thread = self._profiles.setdefault(name, {})
+            if tid not in by_thread:
+                by_thread[tid] = cProfile.Profile()
+            return by_thread[tid]
+
+    @contextmanager
+    def stage(self, name):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        profile = self._profile_for(name)
+        if stack:
+            stack[-1].disable()
+        stack.append(profile)
+        track_memory = threading.current_thread() is self._main
+        if track_memory:
+            memory = self._memory.setdefault(name, {"calls": 0, "allocated": 0, "peak": 0})
+            before = (tracemalloc.take_snapshot()
+                      if memory["calls"] < SNAPSHOTS_PER_STAGE else None)
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            stack.pop()
+            if track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                memory["calls"] += 1
+                memory["allocated"] += current - start
+                memory["peak"] = max(memory["peak"], peak - start)
+                if before is not None:
+                    diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                    diff = [d for d in diff if d.traceback[0].filename not in _OWN_FILES]
+                    self._allocations.setdefault(name, []).extend(diff[:self.top])
+            if stack:
+                stack[-1].enable()
+
+    def wrap(self, name, fn):
+        """`fn` with every call profiled as stage `name` (for worker-thread callables)."""
+        @wraps(fn)
+        def profiled(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return profiled
+
+    def write(self):
+        """Write DIR/<stage>.pstats and DIR/allocations.txt; returns the stage names."""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            profiles = {name: list(by_thread.values()) for name, by_thread in self._profiles.items()}
+        for name, per_thread in profiles.items():
+            stats = pstats.Stats(per_thread[0])
+            for profile in per_thread[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.directory, f"{name}.pstats"))
+
+        lines = []
+        for name, memory in self._memory.items():
+            lines.append(f"== {name}: {memory['calls']} calls, "
+                         f"net {memory['allocated'] / 1e6:+.1f} MB, peak {memory['peak'] / 1e6:.1f} MB")
+            top = sorted(self._allocations.get(name, ()), key=lambda d: d.size_diff, reverse=True)
+            for diff in top[:self.top]:
+                frame = diff.traceback[0]
+                lines.append(f"   {diff.size_diff / 1e6:+8.2f} MB {diff.count_diff:+9} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+            lines.append("")
+        with open(os.path.join(self.directory, "allocations.txt"), "w") as f:
+            f.write("\n".join(lines))
+        return sorted(profiles)
+
+    def close(self):
+        tracemalloc.stop()
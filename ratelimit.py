@@ -0,0 +1,114 @@
+"""
+Adaptive token-bucket rate limiting for the FlightScope SOAP endpoint.
+
+A single TokenBucket is shared by every worker thread. ThrottledAdapter plugs it
+into a requests.Session so every request waits for a token, and every response
+feeds back into the rate: overload responses (429/503/504, connection failures)
+halve it (AIMD), at most once per second so a burst of errors from requests
+already in flight counts once; healthy responses slowly raise it again. Other
+5xx errors say nothing about load and are left to the retry layer.
+"""
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+
+OVERLOAD_STATUS = {429, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to server health."""
+
+    def __init__(self, rate=4.0, burst=4, min_rate=0.5, max_rate=20.0,
+                 increase=0.5, healthy_streak=10, decrease_interval=1.0):
+        self.rate = float(rate)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, self.rate)     # never clamp an explicit start rate
+        self.increase = increase
+        self.healthy_streak = healthy_streak
+        self.decrease_interval = decrease_interval
+        self._last_decrease = float("-inf")
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._streak = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_response(self, status, retry_after=None):
+        """Adapt the rate to a response status (and optional Retry-After seconds)."""
+        with self._lock:
+            if status in OVERLOAD_STATUS:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._last_decrease = now
+                self._tokens = 0.0
+                self._streak = 0
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                return
+            if status >= 500:
+                self._streak = 0
+                return
+            self._streak += 1
+            if self._streak >= self.healthy_streak:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                self._streak = 0
+
+    def on_error(self):
+        """Treat a connection-level failure like a 5xx."""
+        self.on_response(503)
+
+
+def _retry_after_seconds(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that paces every request through a shared TokenBucket. Each
+    response carries `sent_at` (perf_counter once the token was granted) and
+    `throttled` (seconds spent waiting for it), so callers can time the
+    exchange itself apart from the rate limiting.
+    """
+
+    def __init__(self, bucket, **kwargs):
+        self.bucket = bucket
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        t0 = time.perf_counter()
+        self.bucket.acquire()
+        sent_at = time.perf_counter()
+        try:
+            resp = super().send(request, **kwargs)
+        except Exception:
+            self.bucket.on_error()
+            raise
+        resp.sent_at, resp.throttled = sent_at, sent_at - t0
+        self.bucket.on_response(resp.status_code,
+                                _retry_after_seconds(resp.headers.get("Retry-After")))
+        return resp
@@ -0,0 +1,181 @@
+"""
+Retries and circuit breaking for the FlightScope SOAP endpoint.
+
+Every failed request is classified:
+
+    network    connection reset, timeout, truncated body
+    http       429 or a 5xx status
+    malformed  the server answered 200 but the body did not parse
+               (e.g. a truncated <Response> wrapper)
+
+All three are retried with exponential backoff and full jitter, so workers
+that failed together do not retry in lockstep. Anything else (4xx, auth
+failures, bugs) is raised immediately.
+
+Network and http failures also feed a per-host CircuitBreaker. After a run
+of consecutive failures it opens and every worker waits out a cool-down
+instead of hammering a degraded service; then a single probe request decides
+whether to close it again or to double the cool-down.
+"""
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Failure kinds that say something about the service rather than one request.
+SERVICE_ERRORS = {"network", "http"}
+
+
+def classify(exc):
+    """Return the retryable kind of an exception, or None if it should not be retried."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError)):
+        return "network"
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return "http" if status in RETRY_STATUS else None
+    if isinstance(exc, (ValueError, ET.ParseError)):
+        return "malformed"
+    return None
+
+
+class RetryError(Exception):
+    """A request still failed after its last retry."""
+
+    def __init__(self, message, kind, attempts):
+        super().__init__(message)
+        self.kind = kind
+        self.attempts = attempts
+
+    @property
+    def service(self):
+        """True if the service was failing, not this particular request."""
+        return self.kind in SERVICE_ERRORS
+
+
+class CircuitBreaker:
+    """
+    Shared by every worker talking to one host. Closed: requests pass.
+    Open: everyone waits until the cool-down ends. Half-open: one probe
+    request goes through while the others keep waiting for its outcome.
+    """
+
+    def __init__(self, threshold=5, cooldown=5.0, max_cooldown=120.0):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.trips = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._cond = threading.Condition()
+
+    def wait(self):
+        """Block until a request may be sent."""
+        with self._cond:
+            while True:
+                if self.state == "closed":
+                    return
+                now = time.monotonic()
+                if self.state == "open" and now >= self._open_until:
+                    self.state = "half-open"        # this caller is the probe
+                    return
+                timeout = self._open_until - now if self.state == "open" else None
+                self._cond.wait(timeout)
+
+    def on_success(self):
+        with self._cond:
+            self._failures = 0
+            if self.state != "closed":
+                self.state = "closed"
+                self.cooldown = self.base_cooldown
+                self._cond.notify_all()
+
+    def on_failure(self):
+        with self._cond:
+            self._failures += 1
+            if self.state == "half-open":
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.state == "open" or self._failures < self.threshold:
+                return
+            self.state = "open"
+            self.trips += 1
+            self._open_until = time.monotonic() + self.cooldown
+            print(f"    Service degraded: pausing requests for {self.cooldown:.1f}s")
+            self._cond.notify_all()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    """The CircuitBreaker for the host of `url` (created on first use)."""
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; counts retries per failure kind and method."""
+
+    def __init__(self, attempts=5, malformed_attempts=2, base=0.5, cap=30.0):
+        self.attempts = attempts
+        self.malformed_attempts = malformed_attempts
+        self.base = base
+        self.cap = cap
+        self.retries = Counter()
+        self.by_method = Counter()      # (what, kind) -> retries
+        self.gave_up = 0
+        self._lock = threading.Lock()
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    def call(self, fn, breaker=None, what="request"):
+        """
+        Run fn() until it succeeds, retrying classified failures. Raises
+        RetryError once the budget for the failure kind is used up.
+        """
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.wait()
+            try:
+                result = fn()
+            except Exception as e:
+                kind = classify(e)
+                if breaker is not None:
+                    (breaker.on_failure if kind in SERVICE_ERRORS else breaker.on_success)()
+                if kind is None:
+                    raise
+                attempt += 1
+                limit = self.malformed_attempts if kind == "malformed" else self.attempts
+                if attempt >= limit:
+                    with self._lock:
+                        self.gave_up += 1
+                    raise RetryError(f"{what} failed after {attempt} attempts: {e}",
+                                     kind, attempt) from e
+                with self._lock:
+                    self.retries[kind] += 1
+                    self.by_method[what, kind] += 1
+                # A 429 Retry-After is honoured by the rate limiter's pause.
+                time.sleep(self.delay(attempt))
+                continue
+            if breaker is not None:
+                breaker.on_success()
+            return result
+
+    def summary(self):
+        total = sum(self.retries.values())
+        kinds = ", ".join(f"{k} {n}" for k, n in sorted(self.retries.items()))
+        return f"{total} retries" + (f" ({kinds})" if kinds else "") + f", {self.gave_up} gave up"
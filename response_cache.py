@@ -0,0 +1,119 @@
+"""
+On-disk cache of SOAP responses, keyed by method + sorted request params.
+
+Bodies are stored zlib-compressed in a single SQLite file together with the
+time they were fetched. How long an entry stays fresh depends on the method
+(see DEFAULT_TTLS): shot data never expires, the session listing and
+GetSessionLite are only read back offline (a sync must see new sessions and
+shots), and anything not listed is never cached. Once the file grows
+past max_bytes the least recently used entries are evicted.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_FILE = "response_cache.sqlite"
+MAX_BYTES = 512 * 1024 * 1024
+
+FOREVER = None
+# Stored, but always stale online: only --offline (ignore_ttl) reads it back.
+OFFLINE_ONLY = -1
+HOUR = 3600
+
+# Seconds an entry stays fresh, per SOAP method. FOREVER = immutable data;
+# methods not listed here are never cached.
+DEFAULT_TTLS = {
+    "GetSessionResultData":                    FOREVER,
+    "GetSessionLite":                          OFFLINE_ONLY,
+    "listSessionsWithScoreForPlayerAndFilter": OFFLINE_ONLY,
+    "getTotalStatsForPlayer":                  HOUR,
+    "getDashboardStatsForPlayer":              HOUR,
+    "getDrivingStatsForPlayer":                HOUR,
+    "getApproachStatsForPlayer":               HOUR,
+}
+
+
+class CacheMiss(KeyError):
+    """Raised in offline mode when a request has no cached response."""
+
+
+def cache_key(params):
+    """Content address of a request: sha256 over its sorted params."""
+    canonical = json.dumps(sorted((str(k), str(v)) for k, v in params.items()))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe, size-bounded LRU cache of response bodies in SQLite."""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_BYTES, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key        TEXT PRIMARY KEY,
+                method     TEXT NOT NULL,
+                body       BLOB NOT NULL,
+                size       INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                used_at    REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+
+    def cacheable(self, params):
+        return params.get("method") in self.ttls and self.ttls[params.get("method")] != 0
+
+    def get(self, params, ignore_ttl=False):
+        """Return the cached body for `params`, or None if missing or stale."""
+        key = cache_key(params)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, fetched_at = row
+            ttl = self.ttls.get(params.get("method"), 0)
+            if not ignore_ttl and ttl is not FOREVER and time.time() - fetched_at > ttl:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return zlib.decompress(body).decode("utf-8")
+
+    def put(self, params, text):
+        if not self.cacheable(params):
+            return
+        body = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(params), params["method"], body, len(body), now, now))
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,454 @@
+"""
+SQLite shot database with indexed queries.
+
+Holds a sessions table (from get_all_sessions / sessions.json) and a shots
+table keyed by result_id with one typed column per shot_schema.SHOT_FIELDS
+entry. Indexed on session_date, club_id, shot_classification and is_invalid,
+so filters like "7-iron shots in the last 30 days with carry > 150" run in
+milliseconds without touching shots_all.csv.
+
+An aggregates table holds per-club, per-club-per-week and per-club-per-session
+summaries of the valid shots (count, mean, variance, histogram quantiles; see
+aggregates.py). Every ingest subtracts the replaced session's old shots and
+adds its new ones in the same transaction, so a shot that comes back
+IsDeleted/IsInvalid drops out and the summaries never need a full rescan.
+
+Usage:
+    python shot_db.py ingest [shots_all.csv] [sessions.json]
+    python shot_db.py query --club 115013403 --days 30 --min-carry 150
+    python shot_db.py clubs
+    python shot_db.py summary --grain week --club 115013403 --since 2025-01-01
+    python shot_db.py rebuild-aggregates
+"""
+import os, sys, csv, json, time, argparse, sqlite3
+from datetime import datetime, timedelta
+
+import aggregates
+from shot_schema import SHOT_FIELDS, CSV_FIELDS
+
+DB_FILE = "shots.sqlite"
+
+# Descriptive session columns live in the sessions table only.
+_SESSION_ONLY = {"session_name", "app_version", "session_location"}
+_SQL_TYPES = {"f32": "REAL", "f64": "REAL", "i32": "INTEGER", "i64": "INTEGER",
+              "bool": "INTEGER", "datetime": "TEXT", "category": "TEXT", "str": "TEXT"}
+_TRUE = {"1", "true", "yes", "y", "t"}
+
+SHOT_COLUMNS = [(name, dtype) for name, _, _, dtype in SHOT_FIELDS if name not in _SESSION_ONLY]
+INDEXED = ("session_date", "club_id", "shot_classification", "is_invalid")
+
+_POSITIONS = [(CSV_FIELDS.index(name), dtype) for name, dtype in SHOT_COLUMNS]
+_SESSION_ID = CSV_FIELDS.index("session_id")
+_AGG_POSITIONS = [[name for name, _ in SHOT_COLUMNS].index(c) for c in aggregates.COLUMNS]
+_AGG_SELECT = ", ".join(aggregates.COLUMNS)
+_RESULT_ID = [name for name, _ in SHOT_COLUMNS].index("result_id")
+
+# Bumped when the aggregates table needs rebuilding from the shots table.
+_SCHEMA_VERSION = 1
+
+
+def _convert(value, dtype):
+    if value is None or value == "":
+        return None
+    if dtype in ("f32", "f64"):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    if dtype in ("i32", "i64"):
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+    if dtype == "bool":
+        return int(str(value).strip().lower() in _TRUE)
+    return str(value)
+
+
+def row_values(row):
+    """Typed tuple for one flatten_rows row (CSV_FIELDS order), in SHOT_COLUMNS order."""
+    return tuple(_convert(row[i], dtype) for i, dtype in _POSITIONS)
+
+
+class ShotDB:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self._create()
+
+    def _create(self):
+        cols = ",\n".join(f"    {name} {_SQL_TYPES[dtype]}" for name, dtype in SHOT_COLUMNS)
+        with self.db:
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id      INTEGER PRIMARY KEY,
+                    display_name    TEXT,
+                    create_date     TEXT,
+                    app_version     TEXT,
+                    location        TEXT,
+                    session_type_id INTEGER,
+                    shots_loaded    INTEGER NOT NULL DEFAULT 0
+                )""")
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS shots (\n{cols},\n"
+                            "    PRIMARY KEY (result_id)\n)")
+            for col in INDEXED:
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS shots_{col} ON shots ({col})")
+            self.db.execute("CREATE INDEX IF NOT EXISTS shots_session_id ON shots (session_id)")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    grain   TEXT NOT NULL,
+                    bucket  TEXT NOT NULL,
+                    club_id TEXT NOT NULL,
+                    metric  TEXT NOT NULL,
+                    n       INTEGER NOT NULL,
+                    mean    REAL NOT NULL,
+                    m2      REAL NOT NULL,
+                    hist    BLOB NOT NULL,
+                    PRIMARY KEY (grain, bucket, club_id, metric)
+                )""")
+        (version,) = self.db.execute("PRAGMA user_version").fetchone()
+        if version < _SCHEMA_VERSION:
+            self.rebuild_aggregates()
+            self.db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    # ── Ingest ──
+
+    def upsert_sessions(self, sessions):
+        """Insert/update session metadata (dicts as returned by get_all_sessions)."""
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO sessions (session_id, display_name, create_date, app_version,
+                                      location, session_type_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    display_name = excluded.display_name, create_date = excluded.create_date,
+                    app_version = excluded.app_version, location = excluded.location,
+                    session_type_id = excluded.session_type_id""",
+                [(int(s["sessionID"]), s.get("displayName"), s.get("createDate"),
+                  s.get("appVersion"), s.get("location"),
+                  _convert(s.get("sessionTypeID"), "i32")) for s in sessions])
+
+    def replace_session_shots(self, session_id, rows):
+        """
+        Replace every shot of one session with `rows` (flatten_rows tuples) in
+        one transaction. A result_id stored under another session moves to
+        this one, and the last of repeated result_ids wins; the aggregates
+        follow both.
+        """
+        placeholders = ", ".join("?" * len(SHOT_COLUMNS))
+        values = list({(v[_RESULT_ID] if v[_RESULT_ID] is not None else ("row", i)): v
+                       for i, v in enumerate(map(row_values, rows))}.values())
+        with self.db:
+            old = self._session_agg_rows([int(session_id)])
+            self.db.execute("DELETE FROM shots WHERE session_id = ?", (int(session_id),))
+            old += self._result_agg_rows([v[_RESULT_ID] for v in values if v[_RESULT_ID] is not None])
+            self.db.executemany(f"INSERT OR REPLACE INTO shots VALUES ({placeholders})", values)
+            self._update_aggregates(removed=old,
+                                    added=[[v[i] for i in _AGG_POSITIONS] for v in values])
+            self.db.execute("UPDATE sessions SET shots_loaded = 1 WHERE session_id = ?",
+                            (int(session_id),))
+
+    def ingest_rows(self, rows, only_sessions=None):
+        """
+        Bulk-load flatten_rows tuples grouped by session (e.g. from
+        shots_all.csv). Every session in `only_sessions` is replaced by its
+        rows, so one without any ends up empty and loaded too.
+        """
+        by_session = {str(sid): [] for sid in only_sessions or ()}
+        for row in rows:
+            sid = row[_SESSION_ID]
+            if only_sessions is None or sid in by_session:
+                by_session.setdefault(sid, []).append(row)
+        for sid, session_rows in by_session.items():
+            self.replace_session_shots(sid, session_rows)
+        return sum(len(r) for r in by_session.values())
+
+    def ingest_csv(self, csv_path="shots_all.csv", only_sessions=None):
+        with open(csv_path, newline="") as f:
+            reader = csv.reader(f)
+            if next(reader, None) != CSV_FIELDS:
+                raise ValueError(f"{csv_path}: header does not match shot_schema.CSV_FIELDS")
+            return self.ingest_rows(reader, only_sessions)
+
+    def loaded_sessions(self):
+        return {str(sid) for (sid,) in
+                self.db.execute("SELECT session_id FROM sessions WHERE shots_loaded = 1")}
+
+    def prune_sessions(self, keep_ids):
+        """Drop sessions (and their shots) that no longer exist on the server."""
+        keep = {int(sid) for sid in keep_ids}
+        gone = [(sid,) for (sid,) in self.db.execute("SELECT session_id FROM sessions")
+                if sid not in keep]
+        with self.db:
+            self._update_aggregates(removed=self._session_agg_rows([sid for (sid,) in gone]))
+            self.db.executemany("DELETE FROM shots WHERE session_id = ?", gone)
+            self.db.executemany("DELETE FROM sessions WHERE session_id = ?", gone)
+        return len(gone)
+
+    # ── Aggregates ──
+
+    def _session_agg_rows(self, session_ids):
+        rows = []
+        for sid in session_ids:
+            rows += self.db.execute(f"SELECT {_AGG_SELECT} FROM shots WHERE session_id = ?",
+                                    (sid,)).fetchall()
+        return rows
+
+    def _result_agg_rows(self, result_ids, batch=500):
+        rows = []
+        for i in range(0, len(result_ids), batch):
+            ids = result_ids[i:i + batch]
+            rows += self.db.execute(f"""
+                SELECT {_AGG_SELECT} FROM shots
+                WHERE result_id IN ({", ".join("?" * len(ids))})""", ids).fetchall()
+        return rows
+
+    def _update_aggregates(self, removed=(), added=()):
+        """Subtract the summaries of `removed` shots and merge in `added` (aggregates.COLUMNS rows)."""
+        minus, plus = aggregates.summarize(removed), aggregates.summarize(added)
+        current = {}
+        # A session touches one bucket per grain, so read whole buckets at once.
+        for grain, bucket in {key[:2] for key in minus.keys() | plus.keys()}:
+            for club, metric, *row in self.db.execute("""
+                    SELECT club_id, metric, n, mean, m2, hist FROM aggregates
+                    WHERE grain = ? AND bucket = ?""", (grain, bucket)):
+                current[grain, bucket, club, metric] = aggregates.Summary.from_row(metric, *row)
+        upsert, delete = [], []
+        for key in minus.keys() | plus.keys():
+            summary = current.get(key) or aggregates.Summary(key[3])
+            if key in minus:
+                summary.remove(minus[key])
+            if key in plus:
+                summary.merge(plus[key])
+            if summary.n:
+                upsert.append((*key, summary.n, summary.mean, summary.m2, summary.hist_blob()))
+            elif key in current:
+                delete.append(key)
+        self.db.executemany("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            upsert)
+        self.db.executemany("""
+            DELETE FROM aggregates
+            WHERE grain = ? AND bucket = ? AND club_id = ? AND metric = ?""", delete)
+
+    def rebuild_aggregates(self):
+        """Recompute the aggregates table from every shot (for databases that predate it)."""
+        with self.db:
+            self.db.execute("DELETE FROM aggregates")
+            summaries = aggregates.summarize(self.db.execute(f"SELECT {_AGG_SELECT} FROM shots"))
+            self.db.executemany("INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                [(*key, s.n, s.mean, s.m2, s.hist_blob())
+                                 for key, s in summaries.items()])
+        return len(summaries)
+
+    def _load_summaries(self, grain, metrics, club=None, since=None):
+        """{(bucket, club_id) or (club_id,): {metric: Summary}} from the aggregates table."""
+        unknown = set(metrics) - set(aggregates.METRICS)
+        if unknown:
+            raise ValueError(f"unknown aggregate metrics: {', '.join(sorted(unknown))}")
+        if grain not in aggregates.GRAINS:
+            raise ValueError(f"unknown grain: {grain}")
+        # Per-club totals since a date are the merge of that club's weeks.
+        source = "week" if grain == "club" and since is not None else grain
+        where = ["grain = ?", f"metric IN ({', '.join('?' * (len(metrics) + 1))})"]
+        args = [source, aggregates.SHOTS, *metrics]
+        if club is not None:
+            where.append("club_id = ?"); args.append(str(club))
+        if since is not None and source == "week":
+            where.append("bucket >= ?"); args.append(aggregates.week_of(since))
+        groups = {}
+        for bucket, club_id, metric, *row in self.db.execute(f"""
+                SELECT bucket, club_id, metric, n, mean, m2, hist FROM aggregates
+                WHERE {" AND ".join(where)}""", args):
+            by_metric = groups.setdefault((club_id,) if grain == "club" else (bucket, club_id), {})
+            summary = aggregates.Summary.from_row(metric, *row)
+            if metric in by_metric:
+                by_metric[metric].merge(summary)
+            else:
+                by_metric[metric] = summary
+        return groups
+
+    def summaries(self, grain="club", metrics=("carry_dist_yards",), club=None, since=None,
+                  quantiles=(0.1, 0.5, 0.9)):
+        """
+        Precomputed per-group stats of valid shots as a list of dicts: shots,
+        then n/mean/std and the requested quantiles per metric. `since`
+        (YYYY-MM-DD) limits grain="week" to the week containing it and
+        later weeks, and makes grain="club" merge those weeks instead of
+        reading the all-time rows. Reads only the aggregates table, never
+        the shots.
+        """
+        out = []
+        for key, by_metric in self._load_summaries(grain, metrics, club, since).items():
+            r = {"club_id": key[0]} if grain == "club" else {grain: key[0], "club_id": key[1]}
+            r["shots"] = by_metric[aggregates.SHOTS].n if aggregates.SHOTS in by_metric else 0
+            for metric in metrics:
+                s = by_metric.get(metric, aggregates.Summary(metric))
+                r[f"{metric}_n"] = s.n
+                r[f"{metric}_mean"] = round(s.mean, 3) if s.n else None
+                r[f"{metric}_std"] = None if s.std is None else round(s.std, 3)
+                for q in quantiles:
+                    value = s.quantile(q)
+                    r[f"{metric}_p{round(q * 100)}"] = None if value is None else round(value, 3)
+            out.append(r)
+        out.sort(key=lambda r: (r.get(grain, ""), r["club_id"]))
+        return out
+
+    # ── Query ──
+
+    def query_shots(self, club=None, since=None, days=None, min_carry=None, max_carry=None,
+                    classification=None, session_id=None, include_invalid=False,
+                    columns=None, limit=None):
+        """
+        Return matching shots as a list of dicts, newest first.
+        `days` is shorthand for since = today - days. Invalid and deleted
+        shots are excluded unless include_invalid=True.
+        """
+        where, args = [], []
+        if club is not None:
+            where.append("club_id = ?"); args.append(str(club))
+        if days is not None:
+            since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        if since is not None:
+            where.append("session_date >= ?"); args.append(since)
+        if min_carry is not None:
+            where.append("carry_dist_yards >= ?"); args.append(min_carry)
+        if max_carry is not None:
+            where.append("carry_dist_yards <= ?"); args.append(max_carry)
+        if classification is not None:
+            where.append("shot_classification = ?"); args.append(classification)
+        if session_id is not None:
+            where.append("session_id = ?"); args.append(int(session_id))
+        if not include_invalid:
+            where.append("COALESCE(is_invalid, 0) = 0 AND COALESCE(is_deleted, 0) = 0")
+
+        unknown = set(columns or ()) - {name for name, _ in SHOT_COLUMNS}
+        if unknown:
+            raise ValueError(f"unknown shot columns: {', '.join(sorted(unknown))}")
+        cols = ", ".join(columns) if columns else "*"
+        sql = f"SELECT {cols} FROM shots"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY session_date DESC, swing_index"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        cur = self.db.execute(sql, args)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur]
+
+    def club_summary(self, include_invalid=False):
+        """Per-club shot count and average carry / ball speed / smash."""
+        if include_invalid:
+            cur = self.db.execute("""
+                SELECT club_id, COUNT(*) AS shots,
+                       ROUND(AVG(carry_dist_yards), 1) AS avg_carry,
+                       ROUND(AVG(ball_speed_ms), 2)    AS avg_ball_speed,
+                       ROUND(AVG(smash_factor), 3)     AS avg_smash
+                FROM shots
+                GROUP BY club_id ORDER BY avg_carry DESC""")
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, r)) for r in cur]
+        rows = []
+        for (club,), s in self._load_summaries(
+                "club", ("carry_dist_yards", "ball_speed_ms", "smash_factor")).items():
+            avg = {m: round(s[m].mean, digits) if m in s else None
+                   for m, digits in (("carry_dist_yards", 1), ("ball_speed_ms", 2),
+                                     ("smash_factor", 3))}
+            rows.append({"club_id": club, "shots": s[aggregates.SHOTS].n,
+                         "avg_carry": avg["carry_dist_yards"],
+                         "avg_ball_speed": avg["ball_speed_ms"],
+                         "avg_smash": avg["smash_factor"]})
+        rows.sort(key=lambda r: (r["avg_carry"] is None, -(r["avg_carry"] or 0)))
+        return rows
+
+    def close(self):
+        self.db.close()
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _print_table(rows):
+    if not rows:
+        print("(no rows)")
+        return
+    names = list(rows[0])
+    widths = [max(len(n), *(len(str(r[n])) for r in rows)) for n in names]
+    print("  ".join(n.ljust(w) for n, w in zip(names, widths)))
+    for r in rows:
+        print("  ".join(str(r[n]).ljust(w) for n, w in zip(names, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FlightScope shot database.")
+    parser.add_argument("--db", default=DB_FILE)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("ingest", help="load shots_all.csv (+ sessions.json) into the database")
+    p.add_argument("csv", nargs="?", default="shots_all.csv")
+    p.add_argument("sessions", nargs="?", default="sessions.json")
+
+    p = sub.add_parser("query", help="filter shots")
+    p.add_argument("--club")
+    p.add_argument("--days", type=int)
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--min-carry", type=float)
+    p.add_argument("--max-carry", type=float)
+    p.add_argument("--classification")
+    p.add_argument("--session")
+    p.add_argument("--include-invalid", action="store_true")
+    p.add_argument("--columns", default="session_date,club_id,carry_dist_yards,"
+                                        "ball_speed_ms,launch_angle_deg,backspin_rpm")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+
+    sub.add_parser("clubs", help="per-club averages")
+
+    p = sub.add_parser("summary", help="precomputed per-club/week/session stats")
+    p.add_argument("--grain", choices=aggregates.GRAINS, default="club")
+    p.add_argument("--metric", action="append", choices=list(aggregates.METRICS),
+                   help="repeatable (default: carry_dist_yards)")
+    p.add_argument("--club")
+    p.add_argument("--since", help="YYYY-MM-DD: from the week containing it (week and club grains)")
+
+    sub.add_parser("rebuild-aggregates", help="recompute the summaries from every shot")
+    args = parser.parse_args(argv)
+
+    db = ShotDB(args.db)
+    t0 = time.perf_counter()
+    if args.cmd == "ingest":
+        if os.path.exists(args.sessions):
+            with open(args.sessions) as f:
+                db.upsert_sessions(json.load(f))
+        n = db.ingest_csv(args.csv)
+        print(f"Ingested {n} shots into {args.db} in {time.perf_counter() - t0:.2f}s")
+    elif args.cmd == "query":
+        rows = db.query_shots(club=args.club, days=args.days, since=args.since,
+                              min_carry=args.min_carry, max_carry=args.max_carry,
+                              classification=args.classification, session_id=args.session,
+                              include_invalid=args.include_invalid,
+                              columns=args.columns.split(","), limit=args.limit)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if args.csv:
+            writer = csv.DictWriter(sys.stdout, fieldnames=args.columns.split(","))
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            _print_table(rows)
+        print(f"\n{len(rows)} shots in {elapsed:.1f} ms", file=sys.stderr)
+    elif args.cmd == "clubs":
+        _print_table(db.club_summary())
+    elif args.cmd == "summary":
+        rows = db.summaries(args.grain, args.metric or ["carry_dist_yards"],
+                            club=args.club, since=args.since)
+        _print_table(rows)
+        print(f"\n{len(rows)} groups in {(time.perf_counter() - t0) * 1000:.1f} ms",
+              file=sys.stderr)
+    elif args.cmd == "rebuild-aggregates":
+        n = db.rebuild_aggregates()
+        print(f"Rebuilt {n} summaries in {time.perf_counter() - t0:.2f}s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+The flattened shot layout shared by every output (CSV, columnar store, ...).
+
+SHOT_FIELDS is the single source of truth: one entry per output column with
+where the value comes from in the raw GetSessionResultData shot and what type
+it should be stored as in typed outputs.
+
+Sources:
+    session  sess_info[key]                                 (session list entry)
+    shot     shot[key]                                      (top level)
+    swing    shot["GolfSwingParameters"][key]
+    param    shot["ResultParameters"][key + "_PARAMETER_STRING"]
+    rparam   shot["ResultParameters"][key]                  (no suffix)
+    weather  shot["WeatherData"][key]
+
+Types: str, i64, i32, f32, f64, bool, datetime, category (dictionary-encoded).
+"""
+
+SHOT_FIELDS = [
+    # Session
+    ("session_id",               "session", "sessionID",                         "i64"),
+    ("session_name",             "session", "displayName",                       "str"),
+    ("session_date",             "session", "createDate",                        "datetime"),
+    ("app_version",              "session", "appVersion",                        "category"),
+    ("session_location",         "session", "location",                          "str"),
+    # Shot identity
+    ("result_id",                "shot",    "ResultID",                          "i64"),
+    ("swing_index",              "shot",    "SwingIndex",                        "i32"),
+    ("shot_datetime",            "shot",    "ShotDateTime",                      "datetime"),
+    ("club_id",                  "shot",    "ClubID",                            "category"),
+    ("club_type_id",             "shot",    "ClubTypeID",                        "i32"),
+    ("is_invalid",               "shot",    "IsInvalid",                         "bool"),
+    ("is_deleted",               "shot",    "IsDeleted",                         "bool"),
+    ("result_type",              "shot",    "ResultType",                        "category"),
+    # Shot classification
+    ("shot_classification",      "swing",   "SHOTCLASSIFICATION_PARAMETER_STRING", "category"),
+    ("detection_mode",           "swing",   "DETECTION_MODE_PARAMETER_STRING",   "category"),
+    ("radar_type",               "swing",   "RADARCAMERATYPE",                   "category"),
+    ("range_ball",               "swing",   "RANGEBALL",                         "category"),
+    # Distances
+    ("carry_dist_yards",         "param",   "CARRYDIST",                         "f32"),
+    ("total_dist_yards",         "param",   "TOTALDIST",                         "f32"),
+    ("roll_dist_yards",          "param",   "ROLLDIST",                          "f32"),
+    ("lateral_yards",            "param",   "LATERAL",                           "f32"),
+    ("curve_dist_yards",         "param",   "CURVEDIST",                         "f32"),
+    ("height_yards",             "param",   "HEIGHT",                            "f32"),
+    ("flight_time_sec",          "param",   "FLIGHTTIME",                        "f32"),
+    # Speed & power
+    ("ball_speed_ms",            "param",   "LAUNCHSPEED",                       "f32"),
+    ("club_head_speed_ms",       "param",   "CLUBHEADSPEED",                     "f32"),
+    ("club_head_speed_post_ms",  "param",   "CLUBHEADSPEEDPOST",                 "f32"),
+    ("smash_factor",             "param",   "SMASH",                             "f32"),
+    # Launch
+    ("launch_angle_deg",         "param",   "LAUNCHELEV",                        "f32"),
+    ("launch_direction_deg",     "param",   "LAUNCHAZIM",                        "f32"),
+    # Spin
+    ("backspin_rpm",             "param",   "BACKSPIN",                          "f32"),
+    ("sidespin_rpm",             "param",   "SIDESPIN",                          "f32"),
+    ("total_spin_rpm",           "param",   "SPIN",                              "f32"),
+    ("spin_is_estimate",         "rparam",  "SPIN_IS_ESTIMATE",                  "category"),
+    ("spin_axis_deg",            "param",   "SPINAXIS",                          "f32"),
+    ("spin_loft_deg",            "param",   "SPINLOFT",                          "f32"),
+    # Club / impact
+    ("face_angle_deg",           "param",   "CLUBFACEANGLE",                     "f32"),
+    ("face_to_path_deg",         "param",   "FACETOPATH",                        "f32"),
+    ("effective_loft_deg",       "param",   "EFFECTIVELOFT",                     "f32"),
+    ("swing_plane_tilt_deg",     "param",   "SWINGPLANETILT",                    "f32"),
+    ("swing_plane_rotation_deg", "param",   "SWINGPLANEROTATION",                "f32"),
+    ("club_strike_dir_deg",      "param",   "CLUBSTRIKEDIR",                     "f32"),
+    ("club_strike_dir_vert_deg", "param",   "CLUBSTRIKEDIRVERT",                 "f32"),
+    ("impact_elev_deg",          "param",   "IMPACTELEV",                        "f32"),
+    ("fusion_impact_lateral",    "rparam",  "FusionImpactLocationLateral",       "f32"),
+    ("fusion_impact_vertical",   "rparam",  "FusionImpactLocationVertical",      "f32"),
+    ("club_low_point",           "rparam",  "CLUB_LOW_POINT",                    "f32"),
+    # Weather
+    ("weather_temperature_c",    "weather", "WEATHER_TEMPERATURE",               "f32"),
+    ("weather_humidity_pct",     "weather", "WEATHER_HUMIDITY",                  "f32"),
+    ("weather_pressure_atm",     "weather", "WEATHER_PRESSURE",                  "f32"),
+    ("weather_wind_speed_ms",    "weather", "WEATHER_WIND_SPEED",                "f32"),
+    ("weather_wind_dir_deg",     "weather", "WEATHER_WIND_DIRECTION_ANGLE",      "f32"),
+    ("gps_latitude",             "weather", "LATITUDE",                          "f64"),
+    ("gps_longitude",            "weather", "LONGITUDE",                         "f64"),
+    ("altitude_m",               "weather", "ALTITUDE",                          "f32"),
+]
+
+CSV_FIELDS = [name for name, _, _, _ in SHOT_FIELDS]
+FIELD_TYPES = {name: dtype for name, _, _, dtype in SHOT_FIELDS}
+
+
+# ── Compiled flatteners ───────────────────────────────────────────────────────
+#
+# flatten_rows() and flatten_columns() are generated from SHOT_FIELDS once at
+# import time: a single function whose loop body is one tuple display (or one
+# bound .append() per column) of bound-method .get() calls with the full
+# "..._PARAMETER_STRING" keys baked in as constants. Session values are looked
+# up once per batch instead of once per shot.
+
+_SECTIONS = {
+    "swing":   "GolfSwingParameters",
+    "rparam":  "ResultParameters",
+    "weather": "WeatherData",
+}
+
+
+def _expression(source, key):
+    """Source expression of one field inside the per-shot loop (None for session fields)."""
+    if source == "session":
+        return None
+    if source == "shot":
+        return f"g({key!r}, '')"
+    if source == "param":
+        return f"(pg({key + '_PARAMETER_STRING'!r}, '') or '')"
+    if source == "rparam":
+        return f"pg({key!r}, '')"
+    if source == "swing":
+        return f"sg({key!r}, '')"
+    if source == "weather":
+        return f"wg({key!r}, '')"
+    raise ValueError(f"unknown field source {source!r}")
+
+
+_LOOP = [
+    "    for shot in shots:",
+    "        g = shot.get",
+    f"        sg = (g({_SECTIONS['swing']!r}) or _EMPTY).get",
+    f"        pg = (g({_SECTIONS['rparam']!r}) or _EMPTY).get",
+    f"        wg = (g({_SECTIONS['weather']!r}) or _EMPTY).get",
+]
+
+
+def _compile(name, lines):
+    namespace = {"_EMPTY": {}}
+    exec(compile("\n".join(lines), f"<shot_schema.{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def compile_flattener(fields=SHOT_FIELDS):
+    """Build fn(shots, sess_info) -> list of row tuples in `fields` order."""
+    lines = ["def flatten_rows(shots, sess_info):"]
+    items = []
+    for i, (_, source, key, _) in enumerate(fields):
+        expr = _expression(source, key)
+        if expr is None:
+            lines.append(f"    s{i} = sess_info[{key!r}]")
+            expr = f"s{i}"
+        items.append(expr)
+    lines += ["    out = []", "    append = out.append", *_LOOP,
+              "        append((" + ", ".join(items) + ",))",
+              "    return out"]
+    return _compile("flatten_rows", lines)
+
+
+def compile_column_flattener(fields=SHOT_FIELDS):
+    """Build fn(shots, sess_info) -> {name: list of values}, one list per field."""
+    lines = ["def flatten_columns(shots, sess_info):",
+             "    shots = shots if isinstance(shots, list) else list(shots)"]
+    body = []
+    for i, (_, source, key, _) in enumerate(fields):
+        expr = _expression(source, key)
+        if expr is None:
+            lines.append(f"    c{i} = [sess_info[{key!r}]] * len(shots)")
+        else:
+            lines.append(f"    c{i} = []; a{i} = c{i}.append")
+            body.append(f"        a{i}({expr})")
+    lines += [*_LOOP, *body,
+              "    return {" + ", ".join(f"{name!r}: c{i}"
+                                         for i, (name, *_) in enumerate(fields)) + "}"]
+    return _compile("flatten_columns", lines)
+
+
+flatten_rows = compile_flattener()
+flatten_rows.__doc__ = "Flatten a batch of raw shots from one session into row tuples (CSV_FIELDS order)."
+
+flatten_columns = compile_column_flattener()
+flatten_columns.__doc__ = "Flatten a batch of raw shots from one session straight into {column: list of values}."
+
+
+def flatten_shot(shot, sess_info):
+    """Convert a raw shot dict + session info into a flat CSV-ready row."""
+    return dict(zip(CSV_FIELDS, flatten_rows((shot,), sess_info)[0]))
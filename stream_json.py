@@ -0,0 +1,191 @@
+"""
+Incremental parser for SOAP bodies that are one big JSON array
+(GetSessionResultData), optionally inside the <Response>…</Response> wrapper.
+
+unwrap_response() needs the whole body as one string, strips and slices it
+(two more copies) and json.loads() the lot. iter_array() instead takes the
+body in chunks as they come off the socket and yields each array element as
+soon as its closing bracket arrives, so only one element's text is ever held.
+
+Heavy members of each element can be routed instead of parsed with it:
+
+    route={"RollModel": None}                      # drop it unparsed
+    route={"RollModel": lambda shot, raw: ...}     # hand over its raw JSON text
+
+A routed member is replaced by null before the element is parsed, and popped
+from the parsed element afterwards.
+
+    for shot in iter_array(resp.iter_content(65536), route={"RollModel": None}):
+        ...
+"""
+import re
+import json
+import codecs
+
+# Brackets are all the scanner needs to find element boundaries: everything
+# else, strings and innermost (bracket-free) containers included, is skipped
+# by the regex engine. Only the keys of each element are looked at one by
+# one, and only when routing. Possessive quantifiers (Python 3.11+) keep an
+# unfinished string or container at the end of a chunk from backtracking.
+_STR = r'"(?:[^"\\]++|\\.)*+"'
+_FLAT = rf'(?:[^"\[\]{{}}]++|{_STR})*+'
+_SKIP = re.compile(rf'(?:[^"\[\]{{}}]++|{_STR}|\{{{_FLAT}\}}|\[{_FLAT}\])*+')
+_STRUCT = re.compile(r'[\[\]{}"]')
+_OPEN = re.compile(r"[\[{]")
+_STRING_REST = re.compile(r'(?:[^"\\]|\\.)*"', re.S)    # after the opening quote
+_SPACE = re.compile(r"\s*")
+_SEPARATORS = re.compile(r"[\s,]*")
+_SCALAR = re.compile(r"[^\s,}\]]+")
+
+
+class ArrayParser:
+    """Push parser: feed() chunks, get back the elements they completed."""
+
+    def __init__(self, route=None):
+        self.route = route or {}
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0         # 0 before the array, 1 between elements, 2+ inside one
+        self._start = 0         # start of the current element in _buf
+        self._routed = []       # (key, value start, value end) in the current element
+        self._value = None      # (key, value start, depth) of a routed value being scanned
+        self.done = False
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = self._decode(chunk)
+        if self.done or not chunk:
+            return []
+        self._buf += chunk
+        return self._scan()
+
+    def close(self):
+        self.feed(self._decode(b"", final=True))
+        if not self.done:
+            raise ValueError("truncated JSON array")
+
+    def _scan(self):
+        buf, pos, depth = self._buf, self._pos, self._depth
+        items = []
+        while True:
+            if depth == 0:
+                m = _OPEN.search(buf, pos)
+                if m is None:
+                    buf, pos = "", 0            # wrapper or whitespace
+                    break
+                if m.group() == "{":
+                    raise ValueError("expected a JSON array, got an object")
+                depth, pos = 1, m.end()
+                continue
+
+            if depth == 1:
+                pos = _SEPARATORS.match(buf, pos).end()
+                if pos == len(buf):
+                    buf, pos = "", 0
+                    break
+                c = buf[pos]
+                if c == "]":
+                    self.done = True
+                    buf, pos = "", 0
+                    break
+                if c not in "{[":
+                    raise ValueError(f"unexpected {c!r} in JSON array")
+                self._start, depth, pos = pos, 2, pos + 1
+                continue
+
+            if depth == 2 and self.route:
+                m = _STRUCT.search(buf, pos)
+                i = len(buf) if m is None else m.start()
+            else:
+                i = _SKIP.match(buf, pos).end()
+            if i == len(buf):
+                pos = i
+                break
+            c = buf[i]
+            if c == '"':
+                end = _STRING_REST.match(buf, i + 1)
+                if end is None:
+                    pos = i                     # string continues in the next chunk
+                    break
+                pos = end.end()
+                if depth == 2 and self._value is None and buf[i + 1:pos - 1] in self.route:
+                    value = self._routed_value(buf, i, pos)
+                    if value is None:
+                        pos = i                 # wait for the value to start
+                        break
+                    pos = value
+            elif c in "{[":
+                depth += 1
+                pos = i + 1
+            else:
+                depth -= 1
+                pos = i + 1
+                if self._value is not None and depth == self._value[2]:
+                    key, start, _ = self._value
+                    self._routed.append((key, start, pos))
+                    self._value = None
+                if depth == 1:
+                    items.append(self._element(buf[self._start:pos]))
+                    buf, pos = buf[pos:], 0
+        self._buf, self._pos, self._depth = buf, pos, depth
+        return items
+
+    def _routed_value(self, buf, key_start, key_end):
+        """Position to continue scanning from after a routed key, or None if incomplete."""
+        colon = _SPACE.match(buf, key_end).end()
+        if colon >= len(buf):
+            return None
+        if buf[colon] != ":":
+            return key_end                      # a string value, not a key
+        start = _SPACE.match(buf, colon + 1).end()
+        if start >= len(buf):
+            return None
+        key = buf[key_start + 1:key_end - 1]
+        c = buf[start]
+        if c in "{[":
+            self._value = (key, start, 2)
+            return start
+        if c == '"':
+            end = _STRING_REST.match(buf, start + 1)
+        else:
+            end = _SCALAR.match(buf, start)
+            if end is not None and end.end() == len(buf):
+                end = None                      # the number may go on
+        if end is None:
+            return None
+        self._routed.append((key, start, end.end()))
+        return end.end()
+
+    def _element(self, text):
+        if not self._routed:
+            return json.loads(text)
+        offset = self._start
+        pieces, raw, last = [], [], 0
+        for key, start, end in self._routed:
+            start, end = start - offset, end - offset
+            pieces += [text[last:start], "null"]
+            raw.append((key, text[start:end]))
+            last = end
+        pieces.append(text[last:])
+        self._routed = []
+        item = json.loads("".join(pieces))
+        for key, value in raw:
+            item.pop(key, None)
+            handler = self.route[key]
+            if handler is not None:
+                handler(item, value)
+        return item
+
+
+def iter_array(chunks, route=None):
+    """Yield the elements of the JSON array spread over `chunks` (str or bytes)."""
+    parser = ArrayParser(route)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+
+def parse_array(chunks, route=None):
+    """iter_array() as a list, reading `chunks` to the end."""
+    return list(iter_array(chunks, route))
@@ -0,0 +1,111 @@
+"""Vectorized grouped reductions against plain per-group NumPy, and the CLI's --metrics."""
+import random
+
+import numpy as np
+import pytest
+
+import analytics
+import columnar
+
+CLUBS = {"driver": 230.0, "7-iron": 150.0, "wedge": 95.0}
+
+
+def _rows(seed, n=400):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        club = rng.choice(list(CLUBS))
+        rows.append({
+            "session_id": str(9000000 + i % 7),
+            "session_date": f"2026-03-{1 + i % 7:02d} 10:00:00",
+            "club_id": club,
+            "carry_dist_yards": "" if i % 17 == 0 else f"{rng.gauss(CLUBS[club], 8):.2f}",
+            "lateral_yards": f"{rng.gauss(0, 6):.2f}",
+            "ball_speed_ms": f"{rng.uniform(30, 75):.2f}",
+            "roll_dist_yards": f"{rng.uniform(0, 20):.2f}",
+            "is_invalid": "true" if i % 23 == 0 else "false",
+        })
+    return rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "alice" / "shots_columns")
+    columnar.build_from_rows(_rows(1), path)
+    return path
+
+
+def _reference(shots, club, metric):
+    code = list(shots.labels["club_id"]).index(club)
+    values = shots[metric][shots["club_id"] == code].astype(np.float64)
+    return values[~np.isnan(values)]
+
+
+def test_summary_matches_per_group_numpy(store):
+    shots = analytics.load(store, metrics=["carry_dist_yards", "lateral_yards"])
+    rows = analytics.summary(analytics.Groups(shots, ["club_id"]), shots,
+                             ["carry_dist_yards", "lateral_yards"])
+    assert sorted(r["club_id"] for r in rows) == sorted(CLUBS)
+    assert sum(r["shots"] for r in rows) == len(shots) == 400 - len(range(0, 400, 23))
+    for row in rows:
+        for metric in ("carry_dist_yards", "lateral_yards"):
+            v = _reference(shots, row["club_id"], metric)
+            assert row[f"{metric}_mean"] == pytest.approx(v.mean(), abs=0.006)
+            assert row[f"{metric}_std"] == pytest.approx(v.std(ddof=1), abs=0.006)
+            for q in analytics.PERCENTILES:
+                assert row[f"{metric}_p{q}"] == pytest.approx(np.percentile(v, q), abs=0.006)
+
+
+def test_dispersion_and_gapping(store):
+    shots = analytics.load(store)
+    (row,) = [r for r in analytics.dispersion(analytics.Groups(shots, ["club_id"]), shots)
+              if r["club_id"] == "7-iron"]
+    code = list(shots.labels["club_id"]).index("7-iron")
+    x, y = shots["lateral_yards"].astype(np.float64), shots["carry_dist_yards"].astype(np.float64)
+    both = (shots["club_id"] == code) & ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[both], y[both]
+    # Only shots with both values count toward the ellipse.
+    assert row["shots"] == len(y) and row["carry_dist_yards_center"] == pytest.approx(y.mean(), abs=0.006)
+    minor, major = np.linalg.eigvalsh(np.cov(np.vstack([x, y])))
+    scale = np.sqrt(-2 * np.log(0.05))
+    assert row["semi_major"] == pytest.approx(scale * np.sqrt(major), abs=0.006)
+    assert row["semi_minor"] == pytest.approx(scale * np.sqrt(minor), abs=0.006)
+
+    gaps = analytics.gapping(shots)
+    assert [r["club_id"] for r in gaps] == ["driver", "7-iron", "wedge"]
+    assert gaps[0]["gap_to_next"] == pytest.approx(gaps[0]["carry_dist_yards_p50"]
+                                                   - gaps[1]["carry_dist_yards_p50"], abs=0.011)
+    assert gaps[-1]["gap_to_next"] is None
+
+
+def test_several_stores_merge_categories(store, tmp_path):
+    other = str(tmp_path / "bob" / "shots_columns")
+    columnar.build_from_rows([dict(r, club_id="putter" if i % 2 else r["club_id"])
+                              for i, r in enumerate(_rows(2, 50))], other)
+    shots = analytics.load(store, other)
+    assert list(shots.labels["store"]) == ["alice", "bob"]
+    rows = analytics.summary(analytics.Groups(shots, ["store", "club_id"]), shots, ["carry_dist_yards"])
+    assert {(r["store"], r["club_id"]) for r in rows} >= {("bob", "putter"), ("alice", "driver")}
+    assert not any(r["store"] == "alice" and r["club_id"] == "putter" for r in rows)
+
+
+def test_cli_uses_the_requested_metrics(store, capsys):
+    # roll_dist_yards is not among analytics.METRICS, the columns load() reads by default.
+    analytics.main(["clubs", "--dir", store, "--metrics", "roll_dist_yards"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["club_id", "shots", "roll_dist_yards_mean", "roll_dist_yards_std",
+                                "roll_dist_yards_p50"]
+    assert all(len(line.split()) == 5 for line in lines[1:])
+
+    analytics.main(["sessions", "--dir", store, "--metrics", "lateral_yards"])
+    header = capsys.readouterr().out.splitlines()[0].split()
+    assert [h for h in header if h.endswith("_mean")] == ["lateral_yards_mean"]
+
+    analytics.main(["gapping", "--dir", store, "--metrics", "ball_speed_ms"])
+    assert "carry_dist_yards_p50" in capsys.readouterr().out
+
+    for bad in ("carry", "club_id"):
+        with pytest.raises(SystemExit) as e:
+            analytics.main(["clubs", "--dir", store, "--metrics", f"carry_dist_yards,{bad}"])
+        assert e.value.code == 2
+        assert f"--metrics: {bad} not a numeric column" in capsys.readouterr().err
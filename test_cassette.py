@@ -0,0 +1,34 @@
+"""Recording SOAP exchanges to a cassette and replaying them without the network."""
+import pytest
+
+from cassette import Cassette, CassetteMiss
+from conftest import dataset, read
+
+
+def test_lookup_order_and_misses(tmp_path):
+    cassette = Cassette(str(tmp_path / "run.cassette"))
+    params = {"method": "GetSessionLite", "SessionID": "1"}
+    cassette.record(params, 503, {"Content-Encoding": "gzip", "Retry-After": "1"}, b"busy", 0.1)
+    cassette.record(dict(reversed(params.items())), 200, {}, "<ok/>", 0.02)
+
+    assert cassette.lookup(params) == (503, {"Retry-After": "1"}, b"busy")
+    assert cassette.lookup(params) == (200, {}, b"<ok/>")
+    assert cassette.lookup(params) == (200, {}, b"<ok/>")    # the last response repeats
+    with pytest.raises(CassetteMiss):
+        cassette.lookup({"method": "GetSessionLite", "SessionID": "2"})
+    assert [(m, n, size) for m, n, size, *_ in cassette.stats()] == [("GetSessionLite", 2, 9)]
+    assert [ex["body"] for ex in cassette.exchanges("GetSessionLite")] == ["busy", "<ok/>"]
+    cassette.close()
+
+
+def test_replay_reproduces_the_recorded_run(fake, download, tmp_path):
+    server = fake(dataset())
+    cassette = str(tmp_path / "run.cassette")
+    download(server, tmp_path / "recorded", "--full", "--no-cache", "--record", cassette)
+
+    requests = server.stats.requests
+    out = download(server, tmp_path / "replayed", "--full", "--no-cache", "--replay", cassette)
+    assert server.stats.requests == requests            # nothing went over the network
+    assert "Login skipped" in out
+    for name in ("sessions.json", "shots_all.json", "shots_all.csv", "sync_state.json"):
+        assert read(tmp_path / "replayed" / name) == read(tmp_path / "recorded" / name), name
@@ -0,0 +1,69 @@
+"""An interrupted download resumes from its journal and ends up identical to an uninterrupted one."""
+import os
+
+import pytest
+
+from checkpoint import Journal, JOURNAL_FILE
+from conftest import dataset, read
+
+FILES = {"json": ("sessions.json", "shots_all.json", "shots_all.csv", "sync_state.json"),
+         "stream": ("sessions.json", "shots_all.ndjson", "shots_all.csv", "sync_state.json")}
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_after(monkeypatch, n):
+    """Make the n-th completed session the last one before the process dies."""
+    record = Journal.record
+    count = [0]
+
+    def crashing(self, sid, **fields):
+        record(self, sid, **fields)
+        count[0] += 1
+        if count[0] == n:
+            raise Crash(sid)
+    monkeypatch.setattr(Journal, "record", crashing)
+
+
+@pytest.mark.parametrize("mode", ["json", "stream"])
+def test_resume_after_crash(fake, download, tmp_path, monkeypatch, mode):
+    args = ["--no-cache"] + (["--stream"] if mode == "stream" else [])
+    server = fake(dataset())
+    download(server, tmp_path / "fresh", *args)
+    fresh_requests = server.stats.requests
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 5)
+        with pytest.raises(Crash):
+            download(server, tmp_path / "resumed", *args)
+    assert os.path.exists(tmp_path / "resumed" / JOURNAL_FILE)
+    assert not os.path.exists(tmp_path / "resumed" / "sync_state.json")
+
+    server.stats.reset()
+    out = download(server, tmp_path / "resumed", *args)
+    assert "Mode: resuming interrupted full download (5 sessions already done)" in out
+    assert 0 < server.stats.requests < fresh_requests
+    assert not os.path.exists(tmp_path / "resumed" / JOURNAL_FILE)
+    for name in FILES[mode]:
+        assert read(tmp_path / "resumed" / name) == read(tmp_path / "fresh" / name), name
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = Journal(str(tmp_path / JOURNAL_FILE))
+    journal.start({"full": True})
+    journal.record("1", sizes={"csv": 10})
+    journal.record("2", sizes={"csv": 20})
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b'{"sid":"3","si')
+    header, entries = journal.load()
+    assert header == {"full": True}
+    assert [e["sid"] for e in entries] == ["1", "2"]
+
+    journal.reopen(entries[:1])
+    journal.close()
+    assert [e["sid"] for e in journal.load()[1]] == ["1"]
+    journal.finish()
+    assert not journal.exists() and journal.load() == (None, [])
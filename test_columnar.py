@@ -0,0 +1,64 @@
+"""The column store holds every CSV value with the type SHOT_FIELDS declares."""
+import csv, math
+
+import numpy as np
+
+import columnar
+from shot_schema import SHOT_FIELDS
+
+ROWS = [
+    {"session_id": "9149941", "session_date": "2026-02-24 22:41:03", "club_id": "115013403",
+     "carry_dist_yards": "127.889", "swing_index": "3", "is_invalid": "False"},
+    {"session_id": "9149941", "session_date": "", "club_id": "", "carry_dist_yards": "",
+     "swing_index": "x", "is_invalid": "true"},
+    {"session_id": "9149942", "session_date": "2026-02-25T10:00:00+02:00", "club_id": "115013404",
+     "carry_dist_yards": "-3.5", "swing_index": "7.0", "is_invalid": "0"},
+]
+
+
+def _write_csv(path, rows):
+    names = [name for name, *_ in SHOT_FIELDS]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, names, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_types_and_missing_values(tmp_path):
+    _write_csv(tmp_path / "shots.csv", ROWS)
+    out = str(tmp_path / "cols")
+    schema = columnar.build_from_csv(str(tmp_path / "shots.csv"), out)
+    assert schema["rows"] == 3
+    assert set(schema["columns"]) == {name for name, *_ in SHOT_FIELDS}
+
+    cols = columnar.load_columns(out, ["session_id", "session_date", "club_id",
+                                       "carry_dist_yards", "swing_index", "is_invalid"])
+    assert cols["session_id"].dtype == np.int64 and list(cols["session_id"]) == [9149941, 9149941, 9149942]
+    carry = cols["carry_dist_yards"]
+    assert carry.dtype == np.float32 and carry[0] == np.float32(127.889) and math.isnan(carry[1])
+    assert list(cols["swing_index"]) == [3, -1, 7]
+    assert list(cols["is_invalid"]) == [False, True, False]
+    dates = cols["session_date"]
+    assert str(dates[0]) == "2026-02-24T22:41:03" and np.isnat(dates[1])
+    assert str(dates[2]) == "2026-02-25T08:00:00"        # converted to UTC
+    clubs = columnar.decode(cols["club_id"], schema["columns"]["club_id"]["categories"])
+    assert list(clubs) == ["115013403", "", "115013404"]
+
+
+def test_chunks_concatenate_in_order(tmp_path):
+    rows = [{"session_id": str(i), "carry_dist_yards": str(i / 2)} for i in range(25)]
+    writer = columnar.ColumnWriter(str(tmp_path / "cols"), chunk_rows=4)
+    for row in rows:
+        writer.add(row)
+    writer.finish()
+    cols = columnar.load_columns(str(tmp_path / "cols"), mmap=False)
+    assert list(cols["session_id"]) == list(range(25))
+    assert list(cols["carry_dist_yards"]) == [i / 2 for i in range(25)]
+
+
+def test_rebuild_replaces_store(tmp_path):
+    out = str(tmp_path / "cols")
+    columnar.build_from_rows(ROWS, out)
+    columnar.build_from_rows(ROWS[:1], out)
+    assert columnar.load_schema(out)["rows"] == 1
+    assert not (tmp_path / "cols.tmp").exists()
@@ -0,0 +1,124 @@
+"""DedupIndex claims, persistence, and shots moving between re-fetched sessions."""
+import io
+import json
+import random
+import contextlib
+from datetime import datetime, timedelta
+
+import fake_server
+import download_players
+from conftest import read, serve
+from dedup_index import DedupIndex
+
+
+def _shot(rid, gsid=None):
+    return {"ResultID": str(rid), "GolfSwingID": str(gsid or rid + 1000)}
+
+
+def _rids(shots):
+    return [int(s["ResultID"]) for s in shots]
+
+
+def test_claim_drops_duplicates():
+    index = DedupIndex()
+    assert _rids(index.claim("1", [_shot(1), _shot(2), _shot(2)])) == [1, 2]
+    assert _rids(index.claim("2", [_shot(2), _shot(3), _shot(4, gsid=1001)])) == [3]
+    assert [(sid, rid) for sid, rid, _ in index.dropped] == [(1, 2), (2, 2), (2, 4)]
+    assert [reason for *_, reason in index.dropped] == [
+        "repeated in session", "already in session 1", "GolfSwingID 1001 is ResultID 1"]
+
+    # Claiming a session again replaces what it held.
+    assert _rids(index.claim("1", [_shot(1)])) == [1]
+    assert 2 not in index and _rids(index.claim("2", [_shot(2)])) == [2]
+
+
+def test_release_all_lets_a_moved_shot_follow():
+    index = DedupIndex()
+    index.claim("1", [_shot(1), _shot(2)])
+    index.claim("2", [_shot(3), _shot(4)])
+    index.release_all(["1", "2"])
+    # Shot 3 moved to session 1; session 1 is claimed first.
+    assert _rids(index.claim("1", [_shot(1), _shot(2), _shot(3)])) == [1, 2, 3]
+    assert _rids(index.claim("2", [_shot(4)])) == [4]
+    assert index.dropped == [] and index.owner[3] == 1
+
+
+def test_save_load_seed_and_retain(tmp_path):
+    path = str(tmp_path / "dedup_index.bin")
+    index = DedupIndex(path)
+    index.claim("9000001", [_shot(250000001), _shot(250000002)])
+    index.claim("9000002", [_shot(250000003)])
+    index.save()
+
+    loaded = DedupIndex.load(path)
+    assert loaded.loaded and loaded.owner == index.owner and loaded.swing == index.swing
+    loaded.retain(["9000002"])
+    assert len(loaded) == 1 and list(loaded.sessions) == [9000002]
+    assert not DedupIndex.load(str(tmp_path / "missing.bin")).loaded
+
+    seeded = DedupIndex()
+    seeded.seed({"sessions": {"9000001": {"shot_ids": ["250000001", "250000002"]},
+                              "9000002": {"shot_ids": ["250000002", "250000003"]}}})
+    assert seeded.sessions == {9000001: [250000001, 250000002], 9000002: [250000003]}
+
+
+# ── Shots moving between sessions ──
+
+def _moving_data():
+    """Two sessions from today (both re-checked on every sync) and two old ones."""
+    now = datetime.now()
+    rng = random.Random(9)
+    sessions, shots = [], {}
+    for k, created in enumerate([now, now - timedelta(hours=1),
+                                 now - timedelta(days=400), now - timedelta(days=800)]):
+        sid = str(9100000 + k)
+        sessions.append({"sessionID": sid, "displayName": f"S{k}",
+                         "createDate": created.strftime("%Y-%m-%d %H:%M:%S"),
+                         "appVersion": "FS Skills_3.1", "location": "", "sessionTypeID": "17"})
+        shots[sid] = [fake_server.make_shot(k * 10 + j, rng) for j in range(4)]
+    return sessions, shots
+
+
+def _moved(sessions, shots):
+    """The older of today's sessions loses its first shot to the newer one."""
+    shots = {sid: list(s) for sid, s in shots.items()}
+    newer, older = sessions[0]["sessionID"], sessions[1]["sessionID"]
+    shots[newer].append(shots[older].pop(0))
+    return fake_server.Dataset(sessions, shots)
+
+
+def test_download_keeps_a_shot_that_moved(fake, download, tmp_path):
+    sessions, shots = _moving_data()
+    server = fake(fake_server.Dataset(sessions, shots))
+    download(server, tmp_path / "synced", "--no-cache")
+
+    serve(server, _moved(sessions, shots))
+    out = download(server, tmp_path / "synced", "--no-cache")
+    assert "2 to fetch" in out and "duplicate" not in out
+    download(server, tmp_path / "fresh", "--no-cache")
+    for name in ("shots_all.json", "shots_all.csv", "sync_state.json"):
+        assert read(tmp_path / "synced" / name) == read(tmp_path / "fresh" / name), name
+
+
+def _players(server, cwd, monkeypatch):
+    monkeypatch.chdir(cwd)
+    with open("accounts.json", "w") as f:
+        json.dump([{"name": "coach", "players": [fake_server.PLAYER_ID]}], f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        download_players.main(["--no-login", "--accounts", "accounts.json", "--url", server.url,
+                               "--no-cache", "--rate", "1000"])
+    return cwd / "players" / fake_server.PLAYER_ID
+
+
+def test_players_keep_a_shot_that_moved(fake, tmp_path, monkeypatch):
+    sessions, shots = _moving_data()
+    server = fake(fake_server.Dataset(sessions, shots))
+    (tmp_path / "synced").mkdir()
+    (tmp_path / "fresh").mkdir()
+    _players(server, tmp_path / "synced", monkeypatch)
+
+    serve(server, _moved(sessions, shots))
+    synced = _players(server, tmp_path / "synced", monkeypatch)
+    fresh = _players(server, tmp_path / "fresh", monkeypatch)
+    for name in ("shots_all.ndjson", "shots_all.csv", "sync_state.json"):
+        assert read(synced / name) == read(fresh / name), name
@@ -0,0 +1,102 @@
+"""Multi-player jobs: fair scheduling, players that fail to plan, and resuming partitions."""
+import io
+import json
+import contextlib
+
+import pytest
+
+import download_players
+import fake_server
+from checkpoint import Journal, JOURNAL_FILE
+from conftest import read
+from download_players import Player, fair_order
+
+PLAYERS = [str(int(fake_server.PLAYER_ID) + p) for p in range(3)]
+FILES = ("sessions.json", "shots_all.ndjson", "shots_all.csv", "sync_state.json")
+
+
+def _player(pid, shots_per_session):
+    player = Player(pid, None, None)
+    player.sessions = [{"sessionID": f"{pid}-{k}"} for k in range(len(shots_per_session))]
+    player.to_fetch = {f"{pid}-{k}": ["r"] * n for k, n in enumerate(shots_per_session)}
+    return player
+
+
+def test_fair_order_gives_the_least_served_player_the_next_session():
+    big, small, empty = _player("big", [50] * 6), _player("small", [5] * 3), _player("empty", [0, 0])
+    order = [(p.id, sid) for p, sid in fair_order([big, small, empty])]
+    assert order == [("big", "big-0"), ("small", "small-0"), ("empty", "empty-0"),
+                     ("empty", "empty-1"), ("small", "small-1"), ("small", "small-2"),
+                     *[("big", f"big-{k}") for k in range(1, 6)]]
+
+    # Sessions an interrupted run already wrote are not scheduled again.
+    small.done = {"small-0": {}}
+    assert [sid for p, sid in fair_order([small])] == ["small-1", "small-2"]
+
+
+def _data():
+    return fake_server.Dataset.synthetic(6, 8, roll_points=0, players=len(PLAYERS))
+
+
+def _run(server, cwd, monkeypatch, *args):
+    monkeypatch.chdir(cwd)
+    with open("accounts.json", "w") as f:
+        json.dump([{"name": "coach", "players": PLAYERS}], f)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        download_players.main(["--no-login", "--accounts", "accounts.json", "--url", server.url,
+                               "--no-cache", "--rate", "1000", *args])
+    return out.getvalue()
+
+
+def test_a_player_that_cannot_be_listed_is_skipped(fake, tmp_path, monkeypatch):
+    server = fake(_data())
+    listing = download_players.get_all_sessions
+
+    def get_all_sessions(client, pool=None):
+        if client.player_id == PLAYERS[1]:
+            raise ValueError("listSessionsWithScoreForPlayerAndFilter failed")
+        return listing(client, pool=pool)
+    monkeypatch.setattr(download_players, "get_all_sessions", get_all_sessions)
+
+    out = _run(server, tmp_path, monkeypatch)
+    assert f"{PLAYERS[1]}: listing failed: listSessionsWithScoreForPlayerAndFilter failed" in out
+    for pid in (PLAYERS[0], PLAYERS[2]):
+        assert (tmp_path / "players" / pid / "sync_state.json").exists()
+    assert not (tmp_path / "players" / PLAYERS[1] / "sync_state.json").exists()
+
+
+class Crash(Exception):
+    pass
+
+
+def test_interrupted_job_resumes_every_partition(fake, tmp_path, monkeypatch):
+    server = fake(_data())
+    (tmp_path / "fresh").mkdir()
+    (tmp_path / "resumed").mkdir()
+    _run(server, tmp_path / "fresh", monkeypatch)
+    fresh_requests = server.stats.requests
+
+    record, count = Journal.record, [0]
+
+    def crashing(self, sid, **fields):
+        record(self, sid, **fields)
+        count[0] += 1
+        if count[0] == 7:
+            raise Crash(sid)
+    with monkeypatch.context() as m:
+        m.setattr(Journal, "record", crashing)
+        with pytest.raises(Crash):
+            _run(server, tmp_path / "resumed", monkeypatch)
+    journals = [tmp_path / "resumed" / "players" / pid / JOURNAL_FILE for pid in PLAYERS]
+    assert all(path.exists() for path in journals)
+
+    server.stats.reset()
+    out = _run(server, tmp_path / "resumed", monkeypatch)
+    assert "resuming" in out
+    assert 0 < server.stats.requests < fresh_requests
+    assert not any(path.exists() for path in journals)
+    for pid in PLAYERS:
+        for name in FILES:
+            assert read(tmp_path / "resumed" / "players" / pid / name) == \
+                read(tmp_path / "fresh" / "players" / pid / name), (pid, name)
@@ -0,0 +1,53 @@
+"""An incremental sync must leave the same files as a fresh full download."""
+import random
+from datetime import datetime
+
+import fake_server
+from conftest import dataset, raw_shots, read, serve
+
+OUTPUTS = ("sessions.json", "shots_all.json", "shots_all.csv", "sync_state.json")
+
+
+NOW = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _with_recent(data):
+    """`data` with its fourth session dated today (so every sync re-checks it)."""
+    sessions = [dict(s) for s in data.sessions]
+    sessions[3]["createDate"] = NOW
+    return fake_server.Dataset(sessions, raw_shots(data))
+
+
+def _grow(data):
+    """The server a little later: a new session, and the recent one with an extra shot."""
+    sessions = [dict(s) for s in data.sessions]
+    shots = raw_shots(data)
+    recent = next(s["sessionID"] for s in sessions if s["createDate"] == NOW)
+    shots[recent].append(fake_server.make_shot(5000, random.Random(1)))
+    sessions.append({"sessionID": "9999999", "displayName": "New", "createDate": NOW,
+                     "appVersion": "FS Skills_3.1", "location": "", "sessionTypeID": "17"})
+    shots["9999999"] = [fake_server.make_shot(6000 + i, random.Random(i)) for i in range(4)]
+    return fake_server.Dataset(sessions, shots)
+
+
+def test_incremental_equals_full(fake, download, tmp_path):
+    data = _with_recent(dataset())
+    server = fake(data)
+    download(server, tmp_path / "inc", "--no-cache")
+
+    serve(server, _grow(data))
+    out = download(server, tmp_path / "inc", "--no-cache")
+    assert "Mode: incremental sync" in out and "2 to fetch" in out
+    download(server, tmp_path / "full", "--no-cache", "--full")
+
+    for name in OUTPUTS:
+        assert read(tmp_path / "inc" / name) == read(tmp_path / "full" / name), name
+
+
+def test_unchanged_sync_fetches_nothing(fake, download, tmp_path):
+    server = fake()
+    download(server, tmp_path, "--no-cache")
+    before = read(tmp_path / "shots_all.csv")
+    out = download(server, tmp_path, "--no-cache", "--recheck-days", "0")
+    assert "0 to fetch" in out
+    assert read(tmp_path / "shots_all.csv") == before
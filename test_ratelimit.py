@@ -0,0 +1,69 @@
+"""TokenBucket pacing and AIMD adaptation; concurrent downloads stay deterministic."""
+import time
+
+import fake_server
+from conftest import read
+from ratelimit import TokenBucket
+
+
+def test_burst_then_paced():
+    bucket = TokenBucket(rate=50, burst=3)
+    t0 = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - t0 < 0.02
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - t0 >= 5 / 50 * 0.9
+
+
+def test_overload_halves_once_per_interval():
+    bucket = TokenBucket(rate=8, decrease_interval=60)
+    bucket.on_response(429)
+    assert bucket.rate == 4
+    bucket.on_response(503)        # same burst of errors: counted once
+    assert bucket.rate == 4
+    bucket._last_decrease -= 60
+    bucket.on_error()
+    assert bucket.rate == 2
+
+
+def test_rate_floor_and_other_5xx():
+    bucket = TokenBucket(rate=1, min_rate=0.5, decrease_interval=0)
+    for _ in range(5):
+        bucket.on_response(429)
+    assert bucket.rate == 0.5
+    bucket.on_response(500)
+    assert bucket.rate == 0.5
+
+
+def test_healthy_streak_raises_rate_up_to_max():
+    bucket = TokenBucket(rate=4, max_rate=5, increase=0.5, healthy_streak=3)
+    for _ in range(2):
+        bucket.on_response(200)
+    assert bucket.rate == 4
+    bucket.on_response(200)
+    assert bucket.rate == 4.5
+    for _ in range(30):
+        bucket.on_response(200)
+    assert bucket.rate == 5
+    bucket.on_response(500)        # a 5xx breaks the streak without lowering the rate
+    bucket.on_response(200)
+    bucket.on_response(200)
+    assert bucket.rate == 5
+
+
+def test_retry_after_pauses_every_caller():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.on_response(429, retry_after=0.2)
+    t0 = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - t0 >= 0.18
+
+
+def test_concurrent_download_matches_serial(fake, download, tmp_path):
+    server = fake(faults=fake_server.Faults(latency_ms=5, jitter_ms=10))
+    download(server, tmp_path / "serial", "--no-cache", "--workers", "1")
+    download(server, tmp_path / "parallel", "--no-cache", "--workers", "8")
+    for name in ("shots_all.json", "shots_all.csv", "sessions.json"):
+        assert read(tmp_path / "serial" / name) == read(tmp_path / "parallel" / name)
@@ -0,0 +1,110 @@
+"""Retry classification, backoff budgets and CircuitBreaker state transitions."""
+import threading
+import time
+
+import pytest
+import requests
+
+from resilience import CircuitBreaker, RetryError, RetryPolicy, classify
+
+
+def _http_error(status):
+    resp = requests.Response()
+    resp.status_code = status
+    return requests.HTTPError(f"{status}", response=resp)
+
+
+def _failing(*errors, result="ok"):
+    """fn() raising `errors` one per call, then returning `result`."""
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn
+
+
+def test_classify():
+    assert classify(requests.ConnectionError()) == "network"
+    assert classify(requests.Timeout()) == "network"
+    assert classify(_http_error(503)) == "http"
+    assert classify(_http_error(429)) == "http"
+    assert classify(_http_error(404)) is None
+    assert classify(ValueError("truncated")) == "malformed"
+    assert classify(KeyError("bug")) is None
+
+
+def test_retries_until_success():
+    policy = RetryPolicy(attempts=5, base=0)
+    # Attempts count across kinds; a malformed body only gets a second try.
+    fn = _failing(ValueError("bad xml"), requests.ConnectionError(), _http_error(502))
+    assert policy.call(fn, what="GetSessionLite") == "ok"
+    assert dict(policy.retries) == {"network": 1, "http": 1, "malformed": 1}
+    assert policy.by_method["GetSessionLite", "http"] == 1
+    assert policy.gave_up == 0
+
+
+def test_budgets_per_kind():
+    policy = RetryPolicy(attempts=4, malformed_attempts=2, base=0)
+    with pytest.raises(RetryError) as e:
+        policy.call(_failing(*[ValueError("bad xml")] * 5))
+    assert e.value.kind == "malformed" and e.value.attempts == 2 and not e.value.service
+
+    with pytest.raises(RetryError) as e:
+        policy.call(_failing(*[requests.ConnectionError()] * 5))
+    assert e.value.kind == "network" and e.value.attempts == 4 and e.value.service
+    assert policy.gave_up == 2
+
+    calls = []
+    with pytest.raises(requests.HTTPError):
+        policy.call(lambda: calls.append(1) or _failing(_http_error(403))())
+    assert calls == [1]                     # never retried
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.05, max_cooldown=0.15)
+    for _ in range(2):
+        breaker.on_failure()
+    breaker.on_success()                    # a success resets the run of failures
+    for _ in range(2):
+        breaker.on_failure()
+    assert breaker.state == "closed"
+    breaker.on_failure()
+    assert breaker.state == "open" and breaker.trips == 1
+
+    t0 = time.monotonic()
+    breaker.wait()
+    assert time.monotonic() - t0 >= 0.04
+    assert breaker.state == "half-open"
+
+    breaker.on_failure()                    # failed probe: open again, twice as long
+    assert breaker.state == "open" and breaker.trips == 2 and breaker.cooldown == 0.1
+    breaker.wait()
+    breaker.on_failure()
+    assert breaker.cooldown == 0.15         # capped
+    breaker.wait()
+    breaker.on_success()
+    assert breaker.state == "closed" and breaker.cooldown == 0.05
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.02)
+    breaker.on_failure()
+    breaker.wait()                          # this caller is the probe
+    waiter = threading.Thread(target=breaker.wait)
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()                # everyone else waits for its outcome
+    breaker.on_success()
+    waiter.join(1)
+    assert not waiter.is_alive()
+
+
+def test_policy_feeds_the_breaker():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.01)
+    policy = RetryPolicy(attempts=5, base=0)
+    fn = _failing(requests.ConnectionError(), requests.ConnectionError(), _http_error(404))
+    with pytest.raises(requests.HTTPError):
+        policy.call(fn, breaker=breaker)        # a non-service failure still closes it
+    assert breaker.trips == 1 and breaker.state == "closed"
@@ -0,0 +1,71 @@
+"""ResponseCache TTLs and LRU eviction; cached syncs still see new sessions."""
+import time, random
+from datetime import datetime
+
+import fake_server
+from conftest import dataset, raw_shots, read, serve
+from response_cache import ResponseCache, FOREVER, OFFLINE_ONLY
+
+
+def _params(method, **kw):
+    return {"method": method, **kw}
+
+
+def test_ttls(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"),
+                          ttls={"Shots": FOREVER, "Lite": 60, "List": OFFLINE_ONLY})
+    for method in ("Shots", "Lite", "List", "Other"):
+        cache.put(_params(method), f"<{method}>")
+    assert cache.get(_params("Shots")) == "<Shots>"
+    assert cache.get(_params("Lite")) == "<Lite>"
+    assert cache.get(_params("List")) is None                        # online: always fetched
+    assert cache.get(_params("List"), ignore_ttl=True) == "<List>"   # offline
+    assert cache.get(_params("Other"), ignore_ttl=True) is None      # never cached
+
+    # An hour later the Lite entry is stale; immutable shot data is not.
+    cache._db.execute("UPDATE responses SET fetched_at = fetched_at - 3600")
+    assert cache.get(_params("Lite")) is None
+    assert cache.get(_params("Lite"), ignore_ttl=True) == "<Lite>"
+    assert cache.get(_params("Shots")) == "<Shots>"
+
+
+def test_keys_ignore_param_order(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), ttls={"Shots": FOREVER})
+    cache.put({"method": "Shots", "SessionID": "1", "Limit": "5"}, "body")
+    assert cache.get({"Limit": "5", "SessionID": "1", "method": "Shots"}) == "body"
+    assert cache.get({"Limit": "6", "SessionID": "1", "method": "Shots"}) is None
+
+
+def test_lru_eviction(tmp_path):
+    body = "".join(random.Random(0).choice("abcdefghij") for _ in range(4000))
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), ttls={"Shots": FOREVER})
+    cache.put(_params("Shots", n=0), body)
+    size = cache._db.execute("SELECT size FROM responses").fetchone()[0]
+    cache.max_bytes = int(size * 3.5)
+    for n in (1, 2):
+        cache.put(_params("Shots", n=n), body)
+    time.sleep(0.01)
+    assert cache.get(_params("Shots", n=0)) == body      # 0 is now the most recently used
+    cache.put(_params("Shots", n=3), body)               # over the limit: evicts down to 90%
+    kept = {n for n in range(4) if cache.get(_params("Shots", n=n)) is not None}
+    assert kept == {0, 2, 3}
+
+
+def test_cached_sync_sees_new_sessions(fake, download, tmp_path):
+    data = dataset()
+    server = fake(data)
+    download(server, tmp_path / "cached")
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    shots = raw_shots(data)
+    shots["9999999"] = [fake_server.make_shot(6000, random.Random(6))]
+    new = {"sessionID": "9999999", "displayName": "New", "createDate": now,
+           "appVersion": "FS Skills_3.1", "location": "", "sessionTypeID": "17"}
+    serve(server, fake_server.Dataset(data.sessions + [new], shots))
+    download(server, tmp_path / "cached")
+    download(server, tmp_path / "fresh", "--no-cache")
+    assert read(tmp_path / "cached" / "shots_all.csv") == read(tmp_path / "fresh" / "shots_all.csv")
+
+    # Everything the sync needs is still cached for --offline.
+    download(server, tmp_path / "cached", "--offline", "--full")
+    assert read(tmp_path / "cached" / "shots_all.csv") == read(tmp_path / "fresh" / "shots_all.csv")
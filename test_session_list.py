@@ -0,0 +1,61 @@
+"""get_all_sessions: concurrent date windows, full-page splitting and dedup."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from download_all import get_all_sessions, LIST_PAGE_SIZE
+
+
+class StubClient:
+    """Lists `sessions` inclusively at both window ends, newest first, one page at a time."""
+
+    def __init__(self, sessions):
+        self.sessions = sorted(sessions, key=lambda s: s["createDate"], reverse=True)
+        self.calls = []
+
+    def list_sessions(self, start_date, end_date, start=0, count=100):
+        self.calls.append((start_date, end_date, start))
+        hits = [s for s in self.sessions if start_date <= s["createDate"][:10] <= end_date]
+        return [dict(s) for s in hits[start:start + count]]
+
+
+def _session(i, when):
+    return {"sessionID": str(9000000 + i), "createDate": when.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def _spread(n, first, days):
+    return [_session(i, datetime.combine(first, datetime.min.time()) + timedelta(days=i * days / n))
+            for i in range(n)]
+
+
+def _expected(sessions):
+    return sorted(sessions, key=lambda s: (s["createDate"], int(s["sessionID"])), reverse=True)
+
+
+def test_full_windows_are_split_and_merged():
+    sessions = _spread(3 * LIST_PAGE_SIZE, date(2024, 1, 1), 700)
+    client = StubClient(sessions)
+    with ThreadPoolExecutor(4) as pool:
+        listed = get_all_sessions(client, pool, first_year=2024)
+    assert listed == _expected(sessions)
+    # Yearly windows with more than a page were listed again in halves.
+    assert len(client.calls) > 4
+    assert all(start == 0 for *_, start in client.calls)
+
+
+def test_full_single_day_is_paged():
+    day = datetime(2025, 6, 1, 8)
+    sessions = [_session(i, day + timedelta(seconds=i)) for i in range(2 * LIST_PAGE_SIZE + 5)]
+    sessions.append(_session(999, datetime(2025, 6, 3)))
+    client = StubClient(sessions)
+    listed = get_all_sessions(client, first_year=2025)
+    assert listed == _expected(sessions)
+    assert {start for *_, start in client.calls} == {0, LIST_PAGE_SIZE, 2 * LIST_PAGE_SIZE}
+
+
+def test_sessions_on_a_shared_boundary_are_listed_once():
+    sessions = _spread(LIST_PAGE_SIZE + 1, date(2025, 1, 1), 364)
+    # Windows halve on day boundaries and both halves include the shared day.
+    sessions += [_session(500 + i, datetime(2025, 7, 2, i)) for i in range(3)]
+    listed = get_all_sessions(StubClient(sessions), first_year=2025)
+    assert listed == _expected(sessions)
+    assert len({s["sessionID"] for s in listed}) == len(listed)
@@ -0,0 +1,124 @@
+"""ShotDB ingest and query filters."""
+import csv
+
+import pytest
+
+from shot_db import ShotDB
+from shot_schema import CSV_FIELDS
+
+SESSIONS = [
+    {"sessionID": "9149941", "displayName": "Range", "createDate": "2026-02-24 22:41:03",
+     "appVersion": "FS Skills_3.1", "location": "", "sessionTypeID": "17"},
+    {"sessionID": "9149942", "displayName": "Course", "createDate": "2026-03-02 09:10:00",
+     "appVersion": "FS Skills_3.1", "location": "", "sessionTypeID": "17"},
+]
+
+
+def _row(session, result_id, club, carry, swing_index=1, invalid="False", deleted="False",
+         classification="Draw"):
+    values = {"session_id": session["sessionID"], "session_date": session["createDate"],
+              "result_id": str(result_id), "club_id": club, "carry_dist_yards": carry,
+              "swing_index": str(swing_index), "is_invalid": invalid, "is_deleted": deleted,
+              "shot_classification": classification}
+    return tuple(values.get(name, "") for name in CSV_FIELDS)
+
+
+ROWS = [
+    _row(SESSIONS[0], 1, "115013403", "151.5", 1),
+    _row(SESSIONS[0], 2, "115013403", "139.0", 2, classification="Fade"),
+    _row(SESSIONS[0], 3, "115013404", "210.25", 3),
+    _row(SESSIONS[0], 4, "115013403", "160.0", 4, invalid="True"),
+    _row(SESSIONS[1], 5, "115013403", "155.0", 1),
+    _row(SESSIONS[1], 6, "115013404", "", 2),
+    _row(SESSIONS[1], 7, "115013403", "170.0", 3, deleted="true"),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ShotDB(str(tmp_path / "shots.sqlite"))
+    db.upsert_sessions(SESSIONS)
+    db.ingest_rows(ROWS)
+    yield db
+    db.close()
+
+
+def _ids(rows):
+    return [r["result_id"] for r in rows]
+
+
+def test_ingest_types_and_loaded_sessions(db):
+    assert db.loaded_sessions() == {"9149941", "9149942"}
+    (shot,) = db.query_shots(session_id="9149941", club="115013404")
+    assert shot["result_id"] == 3 and shot["session_id"] == 9149941
+    assert shot["carry_dist_yards"] == 210.25 and shot["swing_index"] == 3
+    assert shot["is_invalid"] == 0 and shot["session_date"] == "2026-02-24 22:41:03"
+    (empty,) = db.query_shots(session_id="9149942", club="115013404")
+    assert empty["carry_dist_yards"] is None
+
+
+def test_query_filters(db):
+    assert _ids(db.query_shots()) == [5, 6, 1, 2, 3]          # newest session first
+    assert _ids(db.query_shots(include_invalid=True)) == [5, 6, 7, 1, 2, 3, 4]
+    assert _ids(db.query_shots(club="115013403")) == [5, 1, 2]
+    assert _ids(db.query_shots(since="2026-03-01")) == [5, 6]
+    assert _ids(db.query_shots(min_carry=150)) == [5, 1, 3]
+    assert _ids(db.query_shots(min_carry=140, max_carry=155)) == [5, 1]
+    assert _ids(db.query_shots(classification="Fade")) == [2]
+    assert _ids(db.query_shots(club="115013403", limit=2)) == [5, 1]
+    assert db.query_shots(club="115013404", columns=["result_id", "carry_dist_yards"]) == [
+        {"result_id": 6, "carry_dist_yards": None}, {"result_id": 3, "carry_dist_yards": 210.25}]
+    with pytest.raises(ValueError):
+        db.query_shots(columns=["result_id", "nope"])
+
+
+def test_reingest_replaces_the_session(db):
+    db.replace_session_shots("9149941", [_row(SESSIONS[0], 2, "115013403", "141.0", 2)])
+    assert _ids(db.query_shots(session_id="9149941", include_invalid=True)) == [2]
+    assert db.query_shots(session_id="9149941")[0]["carry_dist_yards"] == 141.0
+    assert _ids(db.query_shots(session_id="9149942", include_invalid=True)) == [5, 6, 7]
+
+
+def test_prune_sessions(db):
+    assert db.prune_sessions(["9149942"]) == 1
+    assert db.loaded_sessions() == {"9149942"}
+    assert _ids(db.query_shots(include_invalid=True)) == [5, 6, 7]
+
+
+def test_ingest_csv(tmp_path):
+    path = tmp_path / "shots_all.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(ROWS)
+    db = ShotDB(str(tmp_path / "shots.sqlite"))
+    db.upsert_sessions(SESSIONS)
+    assert db.ingest_csv(str(path), only_sessions={"9149942"}) == 3
+    assert db.loaded_sessions() == {"9149942"}
+    assert db.ingest_csv(str(path)) == 7
+    assert _ids(db.query_shots()) == [5, 6, 1, 2, 3]
+
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerow(CSV_FIELDS[::-1])
+    with pytest.raises(ValueError):
+        db.ingest_csv(str(path))
+    db.close()
+
+
+def test_sessions_without_rows_are_loaded(tmp_path):
+    path = tmp_path / "shots_all.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(ROWS[4:])
+    db = ShotDB(str(tmp_path / "shots.sqlite"))
+    db.upsert_sessions(SESSIONS)
+    assert db.ingest_csv(str(path), only_sessions={"9149941", "9149942"}) == 3
+    assert db.loaded_sessions() == {"9149941", "9149942"}
+
+    # A session that lost all its shots: the CSV replaces the old ones with none.
+    db.ingest_rows(ROWS)
+    assert db.ingest_csv(str(path), only_sessions={"9149941"}) == 0
+    assert _ids(db.query_shots(include_invalid=True)) == [5, 6, 7]
+    assert db.loaded_sessions() == {"9149941", "9149942"}
+    db.close()
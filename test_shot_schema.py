@@ -0,0 +1,39 @@
+"""The compiled flatteners against the original hand-written flatten_shot."""
+import random
+
+from bench_flatten import reference_flatten
+from fake_server import make_shot
+from shot_schema import CSV_FIELDS, flatten_rows, flatten_columns, flatten_shot
+
+SESS = {"sessionID": "9149941", "displayName": "Tuesday, 02:40 PM",
+        "createDate": "2026-02-24 22:41:03", "appVersion": "iOS_FS Golf_9.5.0", "location": ""}
+
+
+def _shots(n=50):
+    rng = random.Random(7)
+    shots = [make_shot(i, rng) for i in range(n)]
+    # Missing sections, None parameters and absent keys all flatten to "".
+    del shots[0]["ResultParameters"], shots[0]["WeatherData"]
+    shots[1]["GolfSwingParameters"] = None
+    shots[2]["ResultParameters"]["CARRYDIST_PARAMETER_STRING"] = None
+    del shots[3]["ClubID"]
+    return shots
+
+
+def test_rows_match_reference():
+    shots = _shots()
+    expected = [tuple(reference_flatten(s, SESS)[k] for k in CSV_FIELDS) for s in shots]
+    assert flatten_rows(shots, SESS) == expected
+    assert flatten_rows(iter(shots), SESS) == expected
+    assert flatten_shot(shots[2], SESS) == reference_flatten(shots[2], SESS)
+    assert flatten_rows([], SESS) == []
+
+
+def test_columns_match_rows():
+    shots = _shots()
+    rows = flatten_rows(shots, SESS)
+    expected = dict(zip(CSV_FIELDS, map(list, zip(*rows))))
+    assert flatten_columns(shots, SESS) == expected
+    assert flatten_columns(iter(shots), SESS) == expected
+    assert list(flatten_columns(shots, SESS)) == CSV_FIELDS
+    assert flatten_columns([], SESS) == {name: [] for name in CSV_FIELDS}
@@ -0,0 +1,83 @@
+"""Fetching known sessions without GetSessionLite, and every way that falls back."""
+import random
+
+import pytest
+
+import fake_server
+from cassette import CassetteMiss
+from conftest import dataset, raw_shots, read, serve
+from download_all import fetch_session, get_shots_speculative
+from resilience import RetryError
+from response_cache import CacheMiss
+
+IDS = [str(250000000 + i) for i in range(7)]
+
+
+class StubClient:
+    """A session holding `ids`; the API runs on into `after` past its last shot."""
+
+    def __init__(self, ids=IDS, after=(), error=None):
+        self.ids, self.after, self.error = list(ids), list(after), error
+        self.calls, self.lite_calls = [], 0
+
+    def get_result_data(self, session_id, start, limit):
+        self.calls.append((start, limit))
+        if self.error is not None:
+            raise self.error
+        run = self.ids + self.after
+        i = run.index(start) if start in run else len(run)
+        return [{"ResultID": rid} for rid in run[i:i + limit]]
+
+    def get_session_lite(self, session_id):
+        self.lite_calls += 1
+        return {"ResultsRange": [{"ResultID": rid} for rid in self.ids]}
+
+
+def test_known_shots_only_the_last_window_asks_for_one_more():
+    client = StubClient()
+    ids, shots = get_shots_speculative(client, "1", IDS, chunk_size=3)
+    assert ids == IDS and [s["ResultID"] for s in shots] == IDS
+    assert sorted(client.calls) == [(IDS[0], 3), (IDS[3], 3), (IDS[6], 2)]
+
+
+@pytest.mark.parametrize("client", [
+    StubClient(ids=IDS + ["250000099"]),                     # the session grew
+    StubClient(after=["260000000"]),                         # the API ran into the next session
+    StubClient(ids=IDS[:3] + IDS[4:]),                       # a known shot is gone
+    StubClient(error=RetryError("gave up", "network", 5)),
+    StubClient(error=ValueError("bad xml")),
+    StubClient(error=CacheMiss("not cached")),
+    StubClient(error=CassetteMiss("not recorded")),
+], ids=["grew", "ran-on", "missing", "retry", "malformed", "cache", "cassette"])
+def test_unprovable_results_fall_back(client):
+    assert get_shots_speculative(client, "1", IDS, chunk_size=3) is None
+
+
+def test_fetch_session_falls_back_to_getsessionlite():
+    grown = IDS + ["250000099"]
+    client, fell_back = StubClient(ids=grown), []
+    ids, shots = fetch_session(client, "1", IDS, chunk_size=3, speculate=True, fell_back=fell_back)
+    assert ids == grown and [s["ResultID"] for s in shots] == grown
+    assert fell_back == ["1"] and client.lite_calls == 1
+
+    client, fell_back = StubClient(), []
+    fetch_session(client, "1", IDS, chunk_size=3, speculate=True, fell_back=fell_back)
+    assert fell_back == [] and client.lite_calls == 0
+
+
+def test_full_resync_speculates_and_matches_a_fresh_download(fake, download, tmp_path):
+    data = dataset()
+    server = fake(data)
+    download(server, tmp_path / "synced", "--no-cache")
+
+    shots = raw_shots(data)
+    grown = data.sessions[3]["sessionID"]
+    shots[grown].append(fake_server.make_shot(5000, random.Random(5)))
+    serve(server, fake_server.Dataset(data.sessions, shots))
+    out = download(server, tmp_path / "synced", "--full", "--no-cache")
+    known = sum(1 for sid in data.result_ids if data.result_ids[sid])
+    assert f"{known - 1} of {known} known sessions fetched without GetSessionLite" in out
+
+    download(server, tmp_path / "fresh", "--no-cache")
+    for name in ("shots_all.json", "shots_all.csv", "sync_state.json"):
+        assert read(tmp_path / "synced" / name) == read(tmp_path / "fresh" / name), name
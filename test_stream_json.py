@@ -0,0 +1,70 @@
+"""ArrayParser gives the same elements however the body is split into chunks."""
+import json
+import random
+
+import pytest
+
+import fake_server
+from stream_json import ArrayParser, parse_array
+
+SHOTS = [
+    {"ResultID": "1", "Note": 'brackets ] } [ { and "quotes" \\ in a string', "Club": "Ünïcødé ⛳",
+     "RollModel": {"BallFlight": [{"Pos": "1;2;3", "Time": 0}], "Empty": {}}},
+    {"ResultID": "2", "RollModel": 12345.5, "Tag": "RollModel", "Nested": [[1, [2]], {"a": {}}]},
+    {"ResultID": "3", "RollModel": "a \"routed\" string", "Last": -1e-05},
+    {"ResultID": "4", "Values": [], "RollModel": None, "T": True},
+    [1, 2, {"not": "a shot"}],
+]
+BODY = ("<Response>" + json.dumps(SHOTS, ensure_ascii=False) + "</Response>").encode()
+
+
+def _without_roll(item):
+    return {k: v for k, v in item.items() if k != "RollModel"} if isinstance(item, dict) else item
+
+
+def _chunks(data, cuts):
+    cuts = [0, *sorted(cuts), len(data)]
+    return [data[a:b] for a, b in zip(cuts, cuts[1:])]
+
+
+def test_every_two_way_split():
+    for cut in range(len(BODY) + 1):
+        assert parse_array(_chunks(BODY, [cut])) == SHOTS, cut
+
+
+def test_every_split_with_routing():
+    for cut in range(len(BODY) + 1):
+        raw = {}
+        items = parse_array(_chunks(BODY, [cut]),
+                            route={"RollModel": lambda item, text: raw.__setitem__(item["ResultID"], text)})
+        assert items == [_without_roll(s) for s in SHOTS], cut
+        assert {rid: json.loads(text) for rid, text in raw.items()} == \
+            {s["ResultID"]: s["RollModel"] for s in SHOTS[:4]}, cut
+
+
+def test_random_small_chunks():
+    rng = random.Random(3)
+    shots = [fake_server.make_shot(i, rng, roll_points=20) for i in range(20)]
+    body = json.dumps(shots).encode()
+    for _ in range(20):
+        chunks = _chunks(body, rng.sample(range(len(body)), 400))
+        assert parse_array(chunks) == shots
+        assert parse_array(chunks, route={"RollModel": None}) == [_without_roll(s) for s in shots]
+
+
+def test_elements_arrive_as_soon_as_complete():
+    parser = ArrayParser()
+    assert parser.feed('<Response>[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': [2]}') == [{"b": [2]}]
+    assert parser.feed(", ]</Response>") == [] and parser.done
+    parser.close()
+
+
+def test_errors():
+    assert parse_array([b"[]"]) == []
+    with pytest.raises(ValueError):
+        parse_array([b'[{"a": 1}, {"b": '])
+    with pytest.raises(ValueError):
+        parse_array([b'{"a": [1]}'])
+    with pytest.raises(ValueError):
+        parse_array([b"[1, 2]"])
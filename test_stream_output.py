@@ -0,0 +1,34 @@
+"""--stream writes the same shots and CSV as the in-memory output, incrementally too."""
+import json, random
+
+import fake_server
+from conftest import dataset, raw_shots, read, serve
+
+
+def test_stream_matches_json_output(fake, download, tmp_path):
+    server = fake()
+    download(server, tmp_path / "json", "--no-cache")
+    download(server, tmp_path / "stream", "--no-cache", "--stream")
+
+    assert read(tmp_path / "json" / "shots_all.csv") == read(tmp_path / "stream" / "shots_all.csv")
+    with open(tmp_path / "json" / "shots_all.json") as f:
+        shots = json.load(f)
+    with open(tmp_path / "stream" / "shots_all.ndjson") as f:
+        assert [json.loads(line) for line in f] == shots
+    assert not list(tmp_path.glob("stream/*.partial"))
+
+
+def test_incremental_stream_copies_unchanged_sessions(fake, download, tmp_path):
+    data = dataset()
+    server = fake(data)
+    download(server, tmp_path / "inc", "--no-cache", "--stream")
+
+    # One session disappears from the server and another gains a shot; every
+    # session is re-checked, the rest are copied over.
+    shots = raw_shots(data)
+    shots[data.sessions[2]["sessionID"]].append(fake_server.make_shot(5000, random.Random(1)))
+    serve(server, fake_server.Dataset(data.sessions[:5] + data.sessions[6:], shots))
+    download(server, tmp_path / "inc", "--no-cache", "--stream", "--recheck-days", "100000")
+    download(server, tmp_path / "full", "--no-cache", "--stream", "--full")
+    for name in ("shots_all.ndjson", "shots_all.csv"):
+        assert read(tmp_path / "inc" / name) == read(tmp_path / "full" / name)
@@ -0,0 +1,61 @@
+"""Round trips of RollModel data through TrajectoryStore."""
+import os, json, random
+
+import fake_server
+from trajectory_store import TrajectoryStore
+
+# Layout of the BounceRoll points in session_api_calls_v2.json.
+REAL_POINTS = [
+    {"Pos": "11.956794;127.33218;-0.00014300396", "Time": 0},
+    {"Pos": "11.9609165;127.359474;0.07716389", "Time": 0.03},
+    {"Pos": "11.965038;127.38677;0.1456448", "Time": 0.06},
+    {"Pos": "11.969161;127.41407;0.20529972", "Time": 0.09},
+]
+
+
+def _round_trip(tmp_path, models):
+    path = str(tmp_path / "trajectories.bin")
+    store = TrajectoryStore(path).open(truncate=True)
+    for rid, model in enumerate(models):
+        store.add(rid, model)
+    store.commit()
+    store.close()
+    return path, TrajectoryStore(path)
+
+
+def test_real_pos_layout_is_packed_and_exact(tmp_path):
+    model = {"RollDistance": 1.9197891, "TotalDistance": 129.8091245364925,
+             "BallFlight": REAL_POINTS, "BounceRoll": REAL_POINTS[:2]}
+    path, store = _round_trip(tmp_path, [model])
+
+    # 3 Pos parts + Time per point, float32 each
+    assert os.path.getsize(path) == (4 + 2) * 4 * 4
+    with open(os.path.splitext(path)[0] + ".idx") as f:
+        assert "11.956794" not in f.read()
+    assert store.get(0) == model
+    assert store.get(0)["BallFlight"][0]["Pos"] == "11.956794;127.33218;-0.00014300396"
+
+
+def test_fake_server_trajectories(tmp_path):
+    models = [fake_server.make_shot(i, random.Random(i), roll_points=40)["RollModel"]
+              for i in range(5)]
+    path, store = _round_trip(tmp_path, models)
+    assert os.path.getsize(path) > 0
+    assert [store.get(i) for i in range(5)] == models
+
+
+def test_unpackable_series_stays_json(tmp_path):
+    model = {"Points": [{"Pos": "1.5;2"}, {"Pos": "1.5"}], "Labels": ["a", "b"],
+             "Precise": [0.1234567891234, 2.5], "Big": [2 ** 30 + 1, 3]}
+    path, store = _round_trip(tmp_path, [model])
+    assert os.path.getsize(path) == 0
+    assert json.dumps(store.get(0)) == json.dumps(model)
+
+
+def test_numbers_keep_their_values(tmp_path):
+    model = {"Samples": [1, 2.5, 0.03], "Counts": [0, 7, -3]}
+    path, store = _round_trip(tmp_path, [model])
+    assert os.path.getsize(path) == 6 * 4
+    back = store.get(0)
+    assert back == model
+    assert all(isinstance(x, int) for x in back["Counts"])
@@ -0,0 +1,60 @@
+"""Windowed GetSessionResultData paging and its bisection fallback."""
+from concurrent.futures import ThreadPoolExecutor
+
+from download_all import get_shots_for_session, _fetch_window_split
+from resilience import RetryError
+
+IDS = [str(250000000 + i) for i in range(16)]
+
+
+class StubClient:
+    """Serves IDS in order; `bad` ResultIDs fail any request covering them, `missing` are left out."""
+
+    def __init__(self, bad=(), missing=(), kind="malformed"):
+        self.bad, self.missing, self.kind = set(bad), set(missing), kind
+        self.calls = []
+
+    def get_result_data(self, session_id, start, limit):
+        self.calls.append((start, limit))
+        i = IDS.index(start)
+        window = IDS[i:i + limit + 2]           # the API runs past the requested range
+        if self.bad & set(window[:limit]):
+            raise RetryError("GetSessionResultData failed after 2 attempts", self.kind, 2)
+        return [{"ResultID": rid} for rid in window if rid not in self.missing]
+
+
+def _ids(shots):
+    return [s["ResultID"] for s in shots]
+
+
+def test_clean_windows_in_order():
+    client, failed = StubClient(), []
+    with ThreadPoolExecutor(4) as pool:
+        shots = get_shots_for_session(client, "1", IDS, chunk_size=5, pool=pool, failed=failed)
+    assert _ids(shots) == IDS and failed == []
+    assert sorted(client.calls) == [(IDS[0], 5), (IDS[5], 5), (IDS[10], 5), (IDS[15], 1)]
+
+
+def test_bad_shot_is_isolated_by_bisection():
+    client, failed = StubClient(bad={IDS[5]}), []
+    shots = _fetch_window_split(client, "1", IDS, failed)
+    assert _ids(shots) == [rid for rid in IDS if rid != IDS[5]]
+    assert [(sid, rid) for sid, rid, _ in failed] == [("1", IDS[5])]
+    # One failing call per level down to the single shot, plus its clean sibling.
+    assert len(client.calls) == 1 + 2 * 4
+
+
+def test_missing_shot_is_reported():
+    client, failed = StubClient(missing={IDS[9], IDS[10]}), []
+    shots = get_shots_for_session(client, "1", IDS, chunk_size=8, failed=failed)
+    assert _ids(shots) == [rid for rid in IDS if rid not in (IDS[9], IDS[10])]
+    assert sorted(rid for _, rid, _ in failed) == [IDS[9], IDS[10]]
+    assert all("missing" in error for *_, error in failed)
+
+
+def test_service_failure_is_not_split():
+    client, failed = StubClient(bad={IDS[3]}, kind="network"), []
+    shots = get_shots_for_session(client, "1", IDS, chunk_size=8, failed=failed)
+    assert _ids(shots) == IDS[8:]
+    assert [rid for _, rid, _ in failed] == IDS[:8]
+    assert len(client.calls) == 2
@@ -0,0 +1,281 @@
+"""
+Binary store for the RollModel trajectory data of each shot.
+
+RollModel (ball flight + BounceRoll time series) is the bulk of every raw shot
+but nothing in the flat outputs uses it. The ingest pipeline pops it off each
+shot and appends it here instead:
+
+    trajectories.bin   packed little-endian float32 values, one block per shot
+    trajectories.idx   one JSON line per shot: ResultID, offset and count into
+                       the .bin file, and a small skeleton of the RollModel in
+                       which every numeric time series is a {"__series__": ...}
+                       placeholder
+
+A series is a list of numbers or of points such as
+{"Pos": "11.956794;127.33218;-0.00014300396", "Time": 0.03}: every number, and
+every part of a ";"-joined string, becomes a float32 column. Strings come back
+as the exact same text (the placeholder records whether each part was written
+with shortest round-trip digits or a fixed number of decimals); numbers come
+back equal in value, as ints if the whole column was ints. A series that does
+not survive float32 that way stays JSON in the skeleton.
+
+Nothing is read until a consumer asks for a shot; get() then loads the index
+once and decodes just that shot's block back into a RollModel-shaped dict.
+
+Usage:
+    python trajectory_store.py split shots_all.ndjson shots_scalar.ndjson
+    python trajectory_store.py show <ResultID>
+"""
+import os, sys, json
+from array import array
+from decimal import Decimal
+
+TRAJ_FILE = "trajectories.bin"
+
+_SWAP = sys.byteorder != "little"
+
+
+def _f32(x):
+    """x rounded to float32."""
+    return array("f", (x,))[0]
+
+
+def _shortest(v):
+    """Shortest decimal text that reads back as the float32 `v` (.NET's float formatting)."""
+    for digits in range(1, 10):
+        text = f"{v:.{digits}g}"
+        if _f32(float(text)) == v:
+            break
+    if "e" in text:
+        mantissa, exp = text.split("e")
+        text = format(Decimal(text), "f") if 0 <= int(exp) < 15 else f"{mantissa}E{int(exp):+03d}"
+    return text
+
+
+def _format_of(texts, values):
+    """A format that turns every float32 of `values` back into its text, or None."""
+    if all(_shortest(v) == t for v, t in zip(values, texts)):
+        return "r"
+    head = texts[0]
+    decimals = len(head) - head.index(".") - 1 if "." in head else 0
+    if all(f"{v:.{decimals}f}" == t for v, t in zip(values, texts)):
+        return f"{decimals}f"
+    return None
+
+
+def _column(cells):
+    """
+    (formats, rows of floats) for one column of a series: "int" or "num" for
+    plain numbers, else one format per part of "x;y;z"-style strings. Raises
+    ValueError if the column cannot be rebuilt from float32 values: strings
+    to the same text, numbers to the same value.
+    """
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in cells):
+        values = [_f32(v) for v in cells]
+        if all(isinstance(v, int) and abs(v) < 2 ** 24 for v in cells):
+            fmt, back = "int", [int(x) for x in values]
+        else:
+            fmt, back = "num", [float(_shortest(x)) for x in values]
+        if back != cells:
+            raise ValueError("not representable as float32")
+        return fmt, [[x] for x in values]
+    if not all(isinstance(v, str) for v in cells):
+        raise ValueError("mixed column")
+    parts = [v.split(";") for v in cells]
+    width = len(parts[0])
+    if any(len(p) != width for p in parts):
+        raise ValueError("ragged column")
+    rows = [[float(x) for x in p] for p in parts]
+    formats = []
+    for j in range(width):
+        fmt = _format_of([p[j] for p in parts], [_f32(row[j]) for row in rows])
+        if fmt is None:
+            raise ValueError("not representable as float32")
+        formats.append(fmt)
+    return formats, rows
+
+
+def _render(values, formats):
+    if formats == "int":
+        return int(values[0])
+    if formats == "num":
+        return float(_shortest(values[0]))
+    return ";".join(_shortest(v) if fmt == "r" else f"{v:.{fmt[:-1]}f}"
+                    for v, fmt in zip(values, formats))
+
+
+def _pack(obj, columns, values):
+    """Append the series `obj` column-interleaved to `values`; its placeholder."""
+    if columns is None:
+        names, cells = [None], [obj]
+    else:
+        names, cells = columns, [[row.get(c) for row in obj] for c in columns]
+    packed = [_column(col) for col in cells]
+    start = len(values)
+    for i in range(len(obj)):
+        for _, rows in packed:
+            values.extend(rows[i])
+    return {"__series__": [start, len(obj), [[name, fmts] for name, (fmts, _) in zip(names, packed)]]}
+
+
+def _encode(obj, values):
+    """Replace numeric series in `obj` with placeholders, appending their data to `values`."""
+    if isinstance(obj, dict):
+        return {k: _encode(v, values) for k, v in obj.items()}
+    if isinstance(obj, list) and obj:
+        columns = None
+        if all(isinstance(x, dict) for x in obj):
+            columns = list(dict.fromkeys(k for row in obj for k in row))
+        if columns or columns is None:
+            try:
+                return _pack(obj, columns, values)
+            except ValueError:
+                pass
+        return [_encode(x, values) for x in obj]
+    return obj
+
+
+def _decode(obj, values):
+    if isinstance(obj, dict):
+        if "__series__" in obj and len(obj) == 1:
+            start, rows, columns = obj["__series__"]
+            widths = [1 if isinstance(fmts, str) else len(fmts) for _, fmts in columns]
+            out, pos = [], start
+            for _ in range(rows):
+                row = {}
+                for (name, fmts), width in zip(columns, widths):
+                    row[name] = _render(values[pos:pos + width], fmts)
+                    pos += width
+                out.append(row)
+            if columns[0][0] is None and len(columns) == 1:
+                return [row[None] for row in out]
+            return out
+        return {k: _decode(v, values) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode(x, values) for x in obj]
+    return obj
+
+
+class TrajectoryStore:
+    """Append-only float32 trajectory store with a lazily loaded offset index."""
+
+    def __init__(self, path=TRAJ_FILE):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        self._bin = self._idx = None
+        self._index = None
+
+    # ── Writing ──
+
+    def open(self, truncate=False, sizes=None):
+        """
+        Open for appending. truncate=True starts an empty store; `sizes` (from
+        sizes()) rolls both files back to a checkpoint, dropping torn writes.
+        """
+        if sizes is not None:
+            self._bin = open(self.path, "r+b")
+            self._idx = open(self.index_path, "r+b")
+            for f, size in zip((self._bin, self._idx), sizes):
+                f.truncate(size)
+                f.seek(0, os.SEEK_END)
+        else:
+            mode = "wb" if truncate else "ab"
+            self._bin = open(self.path, mode)
+            self._idx = open(self.index_path, mode)
+        self._index = None
+        return self
+
+    def sizes(self):
+        return [self._bin.tell(), self._idx.tell()]
+
+    def add(self, result_id, roll_model):
+        values = array("f")
+        skeleton = _encode(roll_model, values)
+        if _SWAP:
+            values.byteswap()
+        offset = self._bin.tell()
+        values.tofile(self._bin)
+        entry = {"rid": str(result_id), "offset": offset, "count": len(values), "model": skeleton}
+        self._idx.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+
+    def split_shot(self, shot):
+        """Move shot["RollModel"] into the store, leaving only scalar data on the shot."""
+        roll_model = shot.pop("RollModel", None)
+        if roll_model:
+            self.add(shot.get("ResultID", ""), roll_model)
+        return shot
+
+    def commit(self):
+        """Flush and fsync both files (call at session boundaries)."""
+        for f in (self._bin, self._idx):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        for f in (self._bin, self._idx):
+            if f is not None:
+                f.close()
+        self._bin = self._idx = None
+
+    # ── Reading ──
+
+    def _load_index(self):
+        index = {}
+        with open(self.index_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    index[entry["rid"]] = entry     # later records win
+        self._index = index
+        return index
+
+    def __contains__(self, result_id):
+        return str(result_id) in (self._index or self._load_index())
+
+    def get(self, result_id):
+        """Return the RollModel of one shot, or None if it has none stored."""
+        entry = (self._index or self._load_index()).get(str(result_id))
+        if entry is None:
+            return None
+        values = array("f")
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            values.fromfile(f, entry["count"])
+        if _SWAP:
+            values.byteswap()
+        return _decode(entry["model"], values)
+
+
+def _iter_shots(path):
+    with open(path, "rb") as f:
+        if path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def split_file(src, dst, store_path=TRAJ_FILE):
+    """Split an existing shots_all.json/.ndjson into scalar NDJSON + trajectory store."""
+    store = TrajectoryStore(store_path).open(truncate=True)
+    n = 0
+    with open(dst, "wb") as out:
+        for shot in _iter_shots(src):
+            store.split_shot(shot)
+            out.write(json.dumps(shot, separators=(",", ":")).encode() + b"\n")
+            n += 1
+    store.commit()
+    store.close()
+    return n
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "split":
+        n = split_file(sys.argv[2], sys.argv[3])
+        sizes = [os.path.getsize(p) for p in (sys.argv[2], sys.argv[3], TRAJ_FILE)]
+        print(f"Split {n} shots: {sizes[0]:,} bytes -> {sizes[1]:,} scalar + {sizes[2]:,} trajectory")
+    elif len(sys.argv) == 3 and sys.argv[1] == "show":
+        print(json.dumps(TrajectoryStore().get(sys.argv[2]), indent=2))
+    else:
+        print(__doc__.split("Usage:")[1])